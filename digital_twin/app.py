@@ -1,249 +1,465 @@
-import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from datetime import datetime, timedelta
-import os
-from streamlit_option_menu import option_menu
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
-import warnings
-warnings.filterwarnings('ignore')
-
-# Configure page
-st.set_page_config(
-    page_title="Energy Consumption Analytics",
-    page_icon="⚡",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Import modules
-from modules.data_generator import generate_sample_data
-from modules.analytics import EnergyAnalytics
-from modules.forecasting import EnergyForecasting
-from modules.calculator import EnergyCalculator
-from modules.reports import ReportGenerator
-
-def main():
-    st.title("⚡ Energy Consumption Analytics Dashboard")
-    
-    # Initialize session state
-    if 'energy_data' not in st.session_state:
-        st.session_state.energy_data = generate_sample_data()
-    
-    # Navigation menu
-    selected = option_menu(
-        menu_title=None,
-        options=["Dashboard", "Data Input", "Analytics", "Forecasting", "Calculator", "Reports"],
-        icons=["speedometer2", "upload", "graph-up", "crystal-ball", "calculator", "file-earmark-text"],
-        menu_icon="cast",
-        default_index=0,
-        orientation="horizontal",
-    )
-    
-    if selected == "Dashboard":
-        show_dashboard()
-    elif selected == "Data Input":
-        show_data_input()
-    elif selected == "Analytics":
-        show_analytics()
-    elif selected == "Forecasting":
-        show_forecasting()
-    elif selected == "Calculator":
-        show_calculator()
-    elif selected == "Reports":
-        show_reports()
-
-def show_dashboard():
-    st.header("📊 Energy Consumption Dashboard")
-    
-    df = st.session_state.energy_data
-    
-    # Key metrics
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        total_consumption = df['consumption_kwh'].sum()
-        st.metric("Total Consumption", f"{total_consumption:,.2f} kWh")
-    
-    with col2:
-        avg_daily = df.groupby(df['timestamp'].dt.date)['consumption_kwh'].sum().mean()
-        st.metric("Avg Daily Consumption", f"{avg_daily:.2f} kWh")
-    
-    with col3:
-        total_cost = df['cost'].sum()
-        st.metric("Total Cost", f"${total_cost:,.2f}")
-    
-    with col4:
-        avg_rate = df['rate_per_kwh'].mean()
-        st.metric("Avg Rate", f"${avg_rate:.4f}/kWh")
-    
-    # Charts
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("Daily Consumption Trend")
-        daily_consumption = df.groupby(df['timestamp'].dt.date)['consumption_kwh'].sum().reset_index()
-        daily_consumption.columns = ['date', 'consumption']
-        
-        fig = px.line(daily_consumption, x='date', y='consumption',
-                     title="Daily Energy Consumption",
-                     labels={'consumption': 'Consumption (kWh)', 'date': 'Date'})
-        st.plotly_chart(fig, use_container_width=True)
-    
-    with col2:
-        st.subheader("Consumption by Category")
-        category_consumption = df.groupby('category')['consumption_kwh'].sum().reset_index()
-        
-        fig = px.pie(category_consumption, values='consumption_kwh', names='category',
-                    title="Energy Consumption by Category")
-        st.plotly_chart(fig, use_container_width=True)
-    
-    # Hourly pattern
-    st.subheader("Hourly Consumption Pattern")
-    hourly_pattern = df.groupby(df['timestamp'].dt.hour)['consumption_kwh'].mean().reset_index()
-    hourly_pattern.columns = ['hour', 'avg_consumption']
-    
-    fig = px.bar(hourly_pattern, x='hour', y='avg_consumption',
-                title="Average Hourly Consumption Pattern",
-                labels={'avg_consumption': 'Avg Consumption (kWh)', 'hour': 'Hour of Day'})
-    st.plotly_chart(fig, use_container_width=True)
-
-def show_data_input():
-    st.header("📤 Data Input & Management")
-    
-    tab1, tab2, tab3 = st.tabs(["Upload Data", "Manual Entry", "Database Connection"])
-    
-    with tab1:
-        st.subheader("Upload Energy Data")
-        uploaded_file = st.file_uploader(
-            "Choose a CSV file", 
-            type=['csv', 'xlsx'],
-            help="Upload your energy consumption data"
-        )
-        
-        if uploaded_file is not None:
-            try:
-                if uploaded_file.name.endswith('.csv'):
-                    df = pd.read_csv(uploaded_file)
-                else:
-                    df = pd.read_excel(uploaded_file)
-                
-                st.success("File uploaded successfully!")
-                st.dataframe(df.head())
-                
-                # Data validation and processing
-                if st.button("Process Data"):
-                    if 'timestamp' in df.columns:
-                        df['timestamp'] = pd.to_datetime(df['timestamp'])
-                    st.session_state.energy_data = df
-                    st.success("Data processed and saved!")
-                    
-            except Exception as e:
-                st.error(f"Error processing file: {str(e)}")
-    
-    with tab2:
-        st.subheader("Manual Data Entry")
-        
-        with st.form("manual_entry"):
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                date = st.date_input("Date", datetime.now().date())
-                time = st.time_input("Time", datetime.now().time())
-                consumption = st.number_input("Consumption (kWh)", min_value=0.0, step=0.1)
-                rate = st.number_input("Rate per kWh ($)", min_value=0.0, step=0.001, value=0.12)
-            
-            with col2:
-                category = st.selectbox("Category", 
-                    ["Lighting", "HVAC", "Equipment", "Other"])
-                device = st.text_input("Device/Equipment")
-                location = st.text_input("Location")
-                notes = st.text_area("Notes")
-            
-            submitted = st.form_submit_button("Add Entry")
-            
-            if submitted:
-                new_entry = {
-                    'timestamp': datetime.combine(date, time),
-                    'consumption_kwh': consumption,
-                    'rate_per_kwh': rate,
-                    'cost': consumption * rate,
-                    'category': category,
-                    'device': device,
-                    'location': location,
-                    'notes': notes
-                }
-                
-                if 'energy_data' not in st.session_state:
-                    st.session_state.energy_data = pd.DataFrame([new_entry])
-                else:
-                    st.session_state.energy_data = pd.concat([
-                        st.session_state.energy_data, 
-                        pd.DataFrame([new_entry])
-                    ], ignore_index=True)
-                
-                st.success("Entry added successfully!")
-    
-    with tab3:
-        st.subheader("Database Connection")
-        st.info("Database connection features can be implemented here")
-
-def show_analytics():
-    st.header("📈 Energy Analytics")
-    
-    if 'energy_data' not in st.session_state:
-        st.warning("Please upload or enter energy data first.")
-        return
-    
-    df = st.session_state.energy_data
-    analytics = EnergyAnalytics(df)
-    
-    # Analytics options
-    analysis_type = st.selectbox(
-        "Select Analysis Type",
-        ["Consumption Patterns", "Cost Analysis", "Efficiency Metrics", "Peak Usage Analysis"]
-    )
-    
-    if analysis_type == "Consumption Patterns":
-        analytics.show_consumption_patterns()
-    elif analysis_type == "Cost Analysis":
-        analytics.show_cost_analysis()
-    elif analysis_type == "Efficiency Metrics":
-        analytics.show_efficiency_metrics()
-    elif analysis_type == "Peak Usage Analysis":
-        analytics.show_peak_usage_analysis()
-
-def show_forecasting():
-    st.header("🔮 Energy Consumption Forecasting")
-    
-    if 'energy_data' not in st.session_state:
-        st.warning("Please upload or enter energy data first.")
-        return
-    
-    df = st.session_state.energy_data
-    forecasting = EnergyForecasting(df)
-    forecasting.show_forecasting_interface()
-
-def show_calculator():
-    st.header("🧮 Energy Cost Calculator")
-    
-    calculator = EnergyCalculator()
-    calculator.show_calculator_interface()
-
-def show_reports():
-    st.header("📄 Energy Reports")
-    
-    if 'energy_data' not in st.session_state:
-        st.warning("Please upload or enter energy data first.")
-        return
-    
-    df = st.session_state.energy_data
-    report_generator = ReportGenerator(df)
-    report_generator.show_reports_interface()
-
-if __name__ == "__main__":
-    main()
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from datetime import datetime, timedelta
+import os
+import time
+from streamlit_option_menu import option_menu
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import PolynomialFeatures
+import warnings
+warnings.filterwarnings('ignore')
+
+# Configure page
+st.set_page_config(
+    page_title="Energy Consumption Analytics",
+    page_icon="⚡",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Import modules
+from modules.data_generator import generate_sample_data
+from modules.analytics import EnergyAnalytics
+from modules.forecasting import EnergyForecasting
+from modules.calculator import EnergyCalculator
+from modules.reports import ReportGenerator
+from modules.anomalies import carry_forward
+from modules.running_stats import carry_forward_stats
+from modules.sketches import carry_forward_sketches
+from modules.normalization import MeterNormalizer, DEFAULT_NORMALIZATION, GAP_FILL_POLICIES, looks_cumulative, read_chunks, frame_chunks
+from modules.profiling import timed, install_hooks, begin_page, set_page, end_page, show_performance_panel
+from modules.datasets import REGISTRY, get_dataset, set_dataset, use_shared_dataset, dataset_label, upload_key
+from modules.live import get_live_feed
+from modules.quality import DataQualityChecker, DEFAULT_QUALITY, save_report, get_report, show_quality_report
+
+# Rows of an upload read on every rerun, for the preview and the normalization defaults
+UPLOAD_PREVIEW_ROWS = 10_000
+
+# Live mode waits for the next refresh in ticks of this length, so it can be interrupted
+LIVE_TICK_SECONDS = 0.5
+
+def main():
+    # Figures and chart renders are timed while the Performance panel is switched on
+    install_hooks()
+    
+    st.title("⚡ Energy Consumption Analytics Dashboard")
+    
+    # Navigation menu
+    selected = option_menu(
+        menu_title=None,
+        options=["Dashboard", "Data Input", "Analytics", "Forecasting", "Calculator", "Reports"],
+        icons=["speedometer2", "upload", "graph-up", "crystal-ball", "calculator", "file-earmark-text"],
+        menu_icon="cast",
+        default_index=0,
+        orientation="horizontal",
+    )
+    begin_page(selected)
+    
+    # Every session starts on the one shared copy of the sample data
+    if get_dataset() is None:
+        with timed("Generate sample data", 'load'):
+            use_shared_dataset('sample', generate_sample_data, "Sample data")
+    
+    if selected == "Dashboard":
+        show_dashboard()
+    elif selected == "Data Input":
+        show_data_input()
+    elif selected == "Analytics":
+        show_analytics()
+    elif selected == "Forecasting":
+        show_forecasting()
+    elif selected == "Calculator":
+        show_calculator()
+    elif selected == "Reports":
+        show_reports()
+    
+    end_page()
+    show_performance_panel()
+    
+    # Live mode reruns the page once everything, including the sidebar, has been drawn
+    refresh = st.session_state.pop('live_refresh', None)
+    if refresh:
+        wait_for_refresh(refresh)
+        st.rerun()
+
+def wait_for_refresh(seconds):
+    """Wait for the next live refresh without holding up the session.
+    
+    The countdown is redrawn every tick, and each redraw is a point where
+    Streamlit can stop the script: a widget change or a closed tab ends the
+    wait at once instead of after the whole interval.
+    """
+    countdown = st.empty()
+    deadline = time.monotonic() + seconds
+    while (remaining := deadline - time.monotonic()) > 0:
+        countdown.caption(f"Next refresh in {int(np.ceil(remaining))}s")
+        time.sleep(min(LIVE_TICK_SECONDS, remaining))
+
+def show_dashboard():
+    st.header("📊 Energy Consumption Dashboard")
+    
+    if st.toggle("Live mode", key="live_mode", help="Tail a meter drop directory and update as new readings arrive"):
+        show_live_dashboard()
+        return
+    
+    df = get_dataset()
+    
+    # Key metrics
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        total_consumption = df['consumption_kwh'].sum()
+        st.metric("Total Consumption", f"{total_consumption:,.2f} kWh")
+    
+    with col2:
+        with timed("Average daily consumption"):
+            avg_daily = df.groupby(df['timestamp'].dt.date)['consumption_kwh'].sum().mean()
+        st.metric("Avg Daily Consumption", f"{avg_daily:.2f} kWh")
+    
+    with col3:
+        total_cost = df['cost'].sum()
+        st.metric("Total Cost", f"${total_cost:,.2f}")
+    
+    with col4:
+        avg_rate = df['rate_per_kwh'].mean()
+        st.metric("Avg Rate", f"${avg_rate:.4f}/kWh")
+    
+    # Charts
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Daily Consumption Trend")
+        with timed("Daily consumption"):
+            daily_consumption = df.groupby(df['timestamp'].dt.date)['consumption_kwh'].sum().reset_index()
+        daily_consumption.columns = ['date', 'consumption']
+        
+        fig = px.line(daily_consumption, x='date', y='consumption',
+                     title="Daily Energy Consumption",
+                     labels={'consumption': 'Consumption (kWh)', 'date': 'Date'})
+        st.plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        st.subheader("Consumption by Category")
+        with timed("Consumption by category"):
+            category_consumption = df.groupby('category')['consumption_kwh'].sum().reset_index()
+        
+        fig = px.pie(category_consumption, values='consumption_kwh', names='category',
+                    title="Energy Consumption by Category")
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # Hourly pattern
+    st.subheader("Hourly Consumption Pattern")
+    with timed("Hourly pattern"):
+        hourly_pattern = df.groupby(df['timestamp'].dt.hour)['consumption_kwh'].mean().reset_index()
+    hourly_pattern.columns = ['hour', 'avg_consumption']
+    
+    fig = px.bar(hourly_pattern, x='hour', y='avg_consumption',
+                title="Average Hourly Consumption Pattern",
+                labels={'avg_consumption': 'Avg Consumption (kWh)', 'hour': 'Hour of Day'})
+    st.plotly_chart(fig, use_container_width=True)
+
+def show_live_dashboard():
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        path = st.text_input("Drop Directory or File", key="live_path", placeholder="/data/meters",
+                             help="CSV files are tailed as they grow; new Parquet files are read once")
+    with col2:
+        interval = st.number_input("Refresh (s)", min_value=1, max_value=300, value=10, key="live_interval")
+    with col3:
+        window = st.selectbox("Raw Window", ["6H", "1D", "2D", "7D"], index=2, key="live_window",
+                              help="Older readings are kept as hourly totals")
+    
+    if not path:
+        st.info("Enter a directory (or a single CSV/Parquet file) that meters write to.")
+        return
+    if not os.path.exists(path):
+        st.error(f"{path} does not exist.")
+        return
+    
+    # One feed per path, shared by every session watching it; each poll reads only new rows
+    feed = get_live_feed(path, {'window': window})
+    with timed("Live poll", 'load'):
+        new_rows = feed.poll()
+    metrics = feed.metrics()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Consumption", f"{metrics['total_consumption']:,.2f} kWh",
+                  delta=f"{new_rows:,} new readings" if new_rows else None)
+    with col2:
+        st.metric("Avg Daily Consumption", f"{metrics['avg_daily']:.2f} kWh")
+    with col3:
+        st.metric("Total Cost", f"${metrics['total_cost']:,.2f}")
+    with col4:
+        st.metric("Avg Rate", f"${metrics['avg_rate']:.4f}/kWh" if pd.notna(metrics['avg_rate']) else "-")
+    
+    if not metrics['readings']:
+        st.info("Waiting for readings...")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            fig = px.line(feed.daily_consumption(), x='date', y='consumption',
+                         title="Daily Energy Consumption",
+                         labels={'consumption': 'Consumption (kWh)', 'date': 'Date'})
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            fig = px.pie(feed.category_consumption(), values='consumption_kwh', names='category',
+                        title="Energy Consumption by Category")
+            st.plotly_chart(fig, use_container_width=True)
+        
+        fig = px.bar(feed.hourly_pattern(), x='hour', y='avg_consumption',
+                    title="Average Hourly Consumption Pattern",
+                    labels={'avg_consumption': 'Avg Consumption (kWh)', 'hour': 'Hour of Day'})
+        st.plotly_chart(fig, use_container_width=True)
+        
+        fig = px.line(feed.history('1H'), x='timestamp', y='consumption_kwh',
+                     title="Hourly Consumption",
+                     labels={'consumption_kwh': 'Consumption (kWh)', 'timestamp': 'Time'})
+        st.plotly_chart(fig, use_container_width=True)
+    
+    st.caption(f"{metrics['readings']:,} readings ingested · {len(feed.window):,} in the raw window · "
+               f"{len(feed.rollup):,} hourly totals · refreshing every {interval}s")
+    for file, error in feed.tail.errors.items():
+        st.warning(f"Could not read {os.path.basename(file)} yet: {error}")
+    
+    if len(feed.window) and st.button("Analyze Raw Window", help="Use the raw window on the other pages"):
+        set_dataset(feed.window, label=f"Live window: {path}")
+        st.success("Raw window loaded for analysis.")
+    
+    st.session_state.live_refresh = interval
+
+def show_data_input():
+    st.header("📤 Data Input & Management")
+    
+    tab1, tab2, tab3 = st.tabs(["Upload Data", "Manual Entry", "Database Connection"])
+    
+    with tab1:
+        st.subheader("Upload Energy Data")
+        uploaded_file = st.file_uploader(
+            "Choose a CSV file", 
+            type=['csv', 'xlsx'],
+            help="Upload your energy consumption data"
+        )
+        
+        if uploaded_file is not None:
+            try:
+                # Only the first rows are read here; the whole file is read when it is processed
+                with timed(f"Read {uploaded_file.name} (preview)", 'load'):
+                    df = read_upload(uploaded_file, nrows=UPLOAD_PREVIEW_ROWS)
+                
+                st.success("File uploaded successfully!")
+                st.dataframe(df.head())
+                
+                # Optional normalization of irregular meter exports
+                normalize = st.checkbox("Normalize readings to a fixed interval",
+                                        help="De-duplicate, convert register totals to consumption, resample and fill gaps")
+                if normalize:
+                    options = show_normalization_inputs(df)
+                check_quality = st.checkbox("Check and clean data", value=True,
+                                            help="Quarantine invalid or duplicate readings and repair rates and costs")
+                quality = None
+                if check_quality:
+                    # Register totals and the normalizer's duplicate policy take precedence over these rules
+                    quality = {
+                        'max_kwh': None if normalize and options['cumulative'] else DEFAULT_QUALITY['max_kwh'],
+                        'duplicates': None if normalize else DEFAULT_QUALITY['duplicates']
+                    }
+                
+                # Sessions uploading the same file with the same settings share one dataset
+                key = upload_key(uploaded_file, options if normalize else None, quality)
+                
+                # Data validation and processing
+                if st.button("Process Data"):
+                    # Only runs when no session has this file with these settings loaded yet
+                    def process():
+                        processed = None
+                        if uploaded_file.name.endswith('.csv'):
+                            # Large exports are read, checked and normalized chunk by chunk
+                            uploaded_file.seek(0)
+                            chunks = read_chunks(uploaded_file)
+                        else:
+                            chunks = [read_upload(uploaded_file)]
+                        if quality is not None:
+                            checker = DataQualityChecker(quality)
+                            with timed("Check data quality", 'load'):
+                                processed = checker.check_chunks(chunks)
+                            save_report(key, checker.report())
+                            chunks = frame_chunks(processed)
+                        if normalize:
+                            normalizer = MeterNormalizer(options)
+                            with timed("Normalize readings", 'load'):
+                                processed = normalizer.normalize_chunks(chunks)
+                            st.json(normalizer.report)
+                        elif processed is None:
+                            processed = pd.concat(chunks, ignore_index=True)
+                            if 'timestamp' in processed.columns:
+                                processed['timestamp'] = pd.to_datetime(processed['timestamp'])
+                        return processed
+                    
+                    use_shared_dataset(key, process, uploaded_file.name)
+                    st.success("Data processed and saved!")
+                
+                # Checks of a file are cached by its hash, so the report survives reruns and re-uploads
+                report = get_report(key) if check_quality else None
+                if report is not None:
+                    show_quality_report(report)
+                    
+            except Exception as e:
+                st.error(f"Error processing file: {str(e)}")
+    
+    with tab2:
+        st.subheader("Manual Data Entry")
+        
+        with st.form("manual_entry"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                date = st.date_input("Date", datetime.now().date())
+                time = st.time_input("Time", datetime.now().time())
+                consumption = st.number_input("Consumption (kWh)", min_value=0.0, step=0.1)
+                rate = st.number_input("Rate per kWh ($)", min_value=0.0, step=0.001, value=0.12)
+            
+            with col2:
+                category = st.selectbox("Category", 
+                    ["Lighting", "HVAC", "Equipment", "Other"])
+                device = st.text_input("Device/Equipment")
+                location = st.text_input("Location")
+                notes = st.text_area("Notes")
+            
+            submitted = st.form_submit_button("Add Entry")
+            
+            if submitted:
+                new_entry = {
+                    'timestamp': datetime.combine(date, time),
+                    'consumption_kwh': consumption,
+                    'rate_per_kwh': rate,
+                    'cost': consumption * rate,
+                    'category': category,
+                    'device': device,
+                    'location': location,
+                    'notes': notes
+                }
+                
+                previous = get_dataset()
+                if previous is None:
+                    set_dataset(pd.DataFrame([new_entry]), label="Manual entries")
+                else:
+                    # Copy on write: the extended data becomes this session's own dataset,
+                    # other sessions keep the shared one
+                    updated = set_dataset(pd.concat([
+                        previous, 
+                        pd.DataFrame([new_entry])
+                    ], ignore_index=True))
+                    # Score the new reading against the existing baselines instead of refitting
+                    carry_forward(previous, updated, pd.DataFrame([new_entry]))
+                    carry_forward_stats(previous, updated, pd.DataFrame([new_entry]))
+                    carry_forward_sketches(previous, updated, pd.DataFrame([new_entry]))
+                
+                st.success("Entry added successfully!")
+    
+    with tab3:
+        st.subheader("Database Connection")
+        st.info("Database connection features can be implemented here")
+    
+    # Datasets are held once per server process and shared between sessions
+    with st.expander("Loaded Datasets"):
+        st.write(f"**This session:** {dataset_label()}")
+        st.dataframe(REGISTRY.stats().round(1), use_container_width=True, hide_index=True)
+
+def read_upload(uploaded_file, nrows=None):
+    """Frame of an uploaded CSV or Excel file (its first `nrows` rows if given)"""
+    uploaded_file.seek(0)
+    if uploaded_file.name.endswith('.csv'):
+        return pd.read_csv(uploaded_file, nrows=nrows)
+    return pd.read_excel(uploaded_file, nrows=nrows)
+
+def show_normalization_inputs(df):
+    """Normalization settings for an uploaded file"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        interval = st.selectbox("Interval", ["15min", "30min", "1H", "1D"], index=2)
+        cumulative = st.checkbox("Register (cumulative) readings", value=looks_cumulative(df),
+                                 help="Readings are meter totals; consumption is the difference between them")
+    with col2:
+        gap_fill = st.selectbox("Gap Fill", GAP_FILL_POLICIES, index=GAP_FILL_POLICIES.index(DEFAULT_NORMALIZATION['gap_fill']))
+        max_gap = st.number_input("Max Gap to Fill (intervals)", min_value=1, value=DEFAULT_NORMALIZATION['max_gap'])
+    with col3:
+        source_timezone = st.text_input("Source Timezone", placeholder="e.g. Europe/Berlin",
+                                        help="Timezone of naive timestamps in the file; blank means UTC")
+        timezone = st.text_input("Display Timezone", placeholder="Same as source")
+    duplicates = st.radio("Duplicate Readings", ["Keep last", "Average"], horizontal=True)
+    
+    return {
+        'interval': interval,
+        'cumulative': cumulative,
+        'gap_fill': gap_fill,
+        'max_gap': int(max_gap),
+        'source_timezone': source_timezone.strip() or None,
+        'timezone': timezone.strip() or None,
+        'duplicates': 'last' if duplicates == "Keep last" else 'mean'
+    }
+
+def show_analytics():
+    st.header("📈 Energy Analytics")
+    
+    df = get_dataset()
+    if df is None:
+        st.warning("Please upload or enter energy data first.")
+        return
+    analytics = EnergyAnalytics(df)
+    
+    # Analytics options
+    analysis_type = st.selectbox(
+        "Select Analysis Type",
+        ["Consumption Patterns", "Cost Analysis", "Efficiency Metrics", "Peak Usage Analysis", "Anomaly Detection",
+         "Load Duration", "Site Comparison"]
+    )
+    set_page(f"Analytics: {analysis_type}")
+    
+    if analysis_type == "Consumption Patterns":
+        analytics.show_consumption_patterns()
+    elif analysis_type == "Cost Analysis":
+        analytics.show_cost_analysis()
+    elif analysis_type == "Efficiency Metrics":
+        analytics.show_efficiency_metrics()
+    elif analysis_type == "Peak Usage Analysis":
+        analytics.show_peak_usage_analysis()
+    elif analysis_type == "Anomaly Detection":
+        analytics.show_anomaly_detection()
+    elif analysis_type == "Load Duration":
+        analytics.show_load_duration()
+    elif analysis_type == "Site Comparison":
+        analytics.show_site_comparison()
+
+def show_forecasting():
+    st.header("🔮 Energy Consumption Forecasting")
+    
+    df = get_dataset()
+    if df is None:
+        st.warning("Please upload or enter energy data first.")
+        return
+    forecasting = EnergyForecasting(df)
+    forecasting.show_forecasting_interface()
+
+def show_calculator():
+    st.header("🧮 Energy Cost Calculator")
+    
+    calculator = EnergyCalculator(get_dataset())
+    calculator.show_calculator_interface()
+
+def show_reports():
+    st.header("📄 Energy Reports")
+    
+    df = get_dataset()
+    if df is None:
+        st.warning("Please upload or enter energy data first.")
+        return
+    report_generator = ReportGenerator(df)
+    report_generator.show_reports_interface()
+
+if __name__ == "__main__":
+    main()
@@ -1,109 +1,397 @@
-from pymongo import MongoClient
-from datetime import datetime, timedelta
-import pandas as pd
-from typing import List, Dict, Optional
-
-class CNCDataModel:
-    def __init__(self, mongo_uri: str):
-        self.client = MongoClient(mongo_uri)
-        self.db = self.client.cnc_database  # Adjust database name as needed
-        self.collection = self.db.cutting_data  # Adjust collection name as needed
-    
-    def get_cutting_time_data(self, machine_id: str = None, 
-                             start_date: datetime = None, 
-                             end_date: datetime = None) -> List[Dict]:
-        """Retrieve cutting time data from MongoDB"""
-        query = {}
-        
-        if machine_id:
-            query['machine_id'] = machine_id
-        
-        if start_date and end_date:
-            query['timestamp'] = {
-                '$gte': start_date,
-                '$lte': end_date
-            }
-        
-        cursor = self.collection.find(query).sort('timestamp', -1)
-        return list(cursor)
-    
-    def get_machine_status(self, machine_id: str) -> Dict:
-        """Get current machine status"""
-        latest_data = self.collection.find_one(
-            {'machine_id': machine_id},
-            sort=[('timestamp', -1)]
-        )
-        
-        if not latest_data:
-            return {'status': 'offline', 'last_seen': None}
-        
-        # Check if machine is active (last data within 5 minutes)
-        time_diff = datetime.now() - latest_data['timestamp']
-        is_active = time_diff < timedelta(minutes=5)
-        
-        return {
-            'status': 'active' if is_active else 'idle',
-            'last_seen': latest_data['timestamp'],
-            'current_cutting_time': latest_data.get('cutting_time', 0),
-            'spindle_speed': latest_data.get('spindle_speed', 0),
-            'feed_rate': latest_data.get('feed_rate', 0)
-        }
-    
-    def get_performance_metrics(self, machine_id: str, hours: int = 24) -> Dict:
-        """Calculate performance metrics for the digital twin"""
-        end_time = datetime.now()
-        start_time = end_time - timedelta(hours=hours)
-        
-        data = self.get_cutting_time_data(machine_id, start_time, end_time)
-        
-        if not data:
-            return {'error': 'No data available'}
-        
-        df = pd.DataFrame(data)
-        
-        metrics = {
-            'total_cutting_time': df['cutting_time'].sum(),
-            'average_cutting_time': df['cutting_time'].mean(),
-            'max_cutting_time': df['cutting_time'].max(),
-            'min_cutting_time': df['cutting_time'].min(),
-            'total_operations': len(df),
-            'efficiency': self._calculate_efficiency(df),
-            'utilization': self._calculate_utilization(df, hours)
-        }
-        
-        return metrics
-    
-    def _calculate_efficiency(self, df: pd.DataFrame) -> float:
-        """Calculate machine efficiency based on cutting time data"""
-        if df.empty:
-            return 0.0
-        
-        # Efficiency = (Actual cutting time / Planned cutting time) * 100
-        # For now, we'll use a simple metric based on consistency
-        std_dev = df['cutting_time'].std()
-        mean_time = df['cutting_time'].mean()
-        
-        if mean_time == 0:
-            return 0.0
-        
-        coefficient_of_variation = std_dev / mean_time
-        efficiency = max(0, 100 - (coefficient_of_variation * 100))
-        
-        return round(efficiency, 2)
-    
-    def _calculate_utilization(self, df: pd.DataFrame, hours: int) -> float:
-        """Calculate machine utilization"""
-        if df.empty:
-            return 0.0
-        
-        total_cutting_time = df['cutting_time'].sum()
-        total_available_time = hours * 3600  # Convert to seconds
-        
-        utilization = (total_cutting_time / total_available_time) * 100
-        return round(min(utilization, 100), 2)
-    
-    def insert_cutting_data(self, data: Dict) -> str:
-        """Insert new cutting data"""
-        data['timestamp'] = datetime.now()
-        result = self.collection.insert_one(data)
-        return str(result.inserted_id)
\ No newline at end of file
+from pymongo import MongoClient, ASCENDING
+from datetime import datetime, timedelta
+from itertools import islice
+import numpy as np
+from typing import Any, List, Dict, Optional, Tuple
+
+# Fields the digital twin reads from each reading
+TWIN_FIELDS = ['timestamp', 'cutting_time', 'spindle_speed', 'feed_rate']
+
+# Fields summarized per bucket by the downsampled data request
+BUCKET_FIELDS = ['cutting_time', 'spindle_speed', 'feed_rate']
+
+# Timestamps are stored naive; bucket starts and page cursors count milliseconds from here
+EPOCH = datetime(1970, 1, 1)
+
+# Order of raw reading pages: newest first, with _id breaking ties so readings
+# sharing a timestamp are neither repeated nor skipped across pages
+PAGE_ORDER = [('timestamp', -1), ('_id', -1)]
+
+# Documents per round trip (and per conversion step) of the columnar fetch
+COLUMNAR_BATCH_SIZE = 10_000
+
+# Indexes the model's queries need: per-machine time ranges, latest readings and
+# pages ordered by (timestamp, _id) (either sort direction), and time ranges
+# across all machines. The first replaces the former (machine_id, timestamp)
+# index, which can be dropped.
+INDEXES = {
+    'machine_id_timestamp_id': [('machine_id', ASCENDING), ('timestamp', ASCENDING), ('_id', ASCENDING)],
+    'timestamp': [('timestamp', ASCENDING)]
+}
+
+# Latest reading of every machine (fleet status), walking the machine_id_timestamp_id index
+LATEST_READINGS_PIPELINE = [
+    {'$sort': {'machine_id': -1, 'timestamp': -1}},
+    {'$group': {
+        '_id': '$machine_id',
+        'timestamp': {'$first': '$timestamp'},
+        'cutting_time': {'$first': '$cutting_time'},
+        'spindle_speed': {'$first': '$spindle_speed'},
+        'feed_rate': {'$first': '$feed_rate'}
+    }},
+    {'$sort': {'_id': 1}}
+]
+
+def _winning_plan(explain: Dict) -> Dict:
+    """Winning plan of a find or aggregate explain (pipelines nest it in their first stage)"""
+    if 'queryPlanner' in explain:
+        return explain['queryPlanner']['winningPlan']
+    return explain['stages'][0]['$cursor']['queryPlanner']['winningPlan']
+
+def _plan_stages(plan) -> List[str]:
+    """All stage names in an explain plan tree"""
+    if isinstance(plan, dict):
+        stages = [plan['stage']] if 'stage' in plan else []
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+        return stages
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in _plan_stages(item)]
+    return []
+
+class CNCDataModel:
+    """Queries on the cutting data collection.
+    
+    Created unbound so blueprints and services can import it at module level;
+    `init_client` binds it to the client create_app owns.
+    """
+    
+    def __init__(self, client: Optional[MongoClient] = None, database: str = 'cnc_database'):
+        self.client = None
+        self.db = None
+        self.collection = None
+        if client is not None:
+            self.init_client(client, database)
+    
+    def init_client(self, client: MongoClient, database: str = 'cnc_database'):
+        """Use `client` (and its connection pool) for all queries"""
+        self.client = client
+        self.db = client[database]
+        self.collection = self.db.cutting_data
+    
+    def ensure_indexes(self, verify: bool = True) -> Dict[str, List[str]]:
+        """Create the indexes the queries need and check that the planner uses them.
+        
+        Returns the winning plan stages of each query; raises RuntimeError if
+        any of them would still scan the whole collection.
+        """
+        existing = {tuple(info['key']) for info in self.collection.index_information().values()}
+        for name, keys in INDEXES.items():
+            if tuple(keys) not in existing:
+                self.collection.create_index(keys, name=name)
+        
+        if not verify:
+            return {}
+        now = datetime.now()
+        queries = {
+            'machine window': self.collection.find(self._time_query('explain', now - timedelta(days=7))).sort('timestamp', -1),
+            'latest reading': self.collection.find({'machine_id': 'explain'}).sort('timestamp', -1).limit(1),
+            'readings page': self.collection.find(
+                self._page_query('explain', now - timedelta(days=7), None, (now, 'explain'))
+            ).sort(PAGE_ORDER).limit(1000),
+            'time range': self.collection.find(self._time_query(None, now - timedelta(hours=24), now)).sort('timestamp', -1)
+        }
+        explains = {name: cursor.explain() for name, cursor in queries.items()}
+        explains['fleet status'] = self.db.command('aggregate', self.collection.name,
+                                                   pipeline=LATEST_READINGS_PIPELINE, explain=True)
+        plans = {name: _plan_stages(_winning_plan(explain)) for name, explain in explains.items()}
+        scans = [name for name, stages in plans.items() if 'COLLSCAN' in stages]
+        if scans:
+            raise RuntimeError(f"Queries on {self.collection.full_name} would scan the whole collection: "
+                               f"{', '.join(scans)} (indexes: {sorted(self.collection.index_information())})")
+        return plans
+    
+    @staticmethod
+    def _time_query(machine_id: Optional[str], start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None) -> Dict:
+        """Filter for a machine (or all machines) over a range open at either end"""
+        query = {}
+        
+        if machine_id:
+            query['machine_id'] = machine_id
+        
+        timestamp = {}
+        if start_date:
+            timestamp['$gte'] = start_date
+        if end_date:
+            timestamp['$lte'] = end_date
+        if timestamp:
+            query['timestamp'] = timestamp
+        
+        return query
+    
+    def get_cutting_time_data(self, machine_id: str = None, 
+                             start_date: datetime = None, 
+                             end_date: datetime = None,
+                             limit: int = 0) -> List[Dict]:
+        """Retrieve cutting time data from MongoDB, newest first (at most `limit` readings if given)"""
+        query = self._time_query(machine_id, start_date, end_date)
+        
+        cursor = self.collection.find(query).sort('timestamp', -1)
+        if limit:
+            cursor = cursor.limit(limit)
+        return list(cursor)
+    
+    @classmethod
+    def _page_query(cls, machine_id: Optional[str], start_date: Optional[datetime],
+                    end_date: Optional[datetime], after: Optional[Tuple[datetime, Any]]) -> Dict:
+        """Time range filter continuing after the (timestamp, _id) of a previous page's last reading"""
+        query = cls._time_query(machine_id, start_date, end_date)
+        if after is not None:
+            timestamp, last_id = after
+            query['$or'] = [
+                {'timestamp': {'$lt': timestamp}},
+                {'timestamp': timestamp, '_id': {'$lt': last_id}}
+            ]
+        return query
+    
+    def get_readings_page(self, machine_id: str = None,
+                          start_date: datetime = None,
+                          end_date: datetime = None,
+                          after: Optional[Tuple[datetime, Any]] = None,
+                          limit: int = 1000) -> Tuple[List[Dict], Optional[Tuple[datetime, Any]]]:
+        """One page of readings newest first, and the (timestamp, _id) to continue after (None on the last page).
+        
+        Pages are keyed on the last reading rather than skipped over, so each
+        one is an index range scan however deep into the window it is, and
+        readings inserted meanwhile do not shift later pages.
+        """
+        cursor = self.collection.find(
+            self._page_query(machine_id, start_date, end_date, after)
+        ).sort(PAGE_ORDER).limit(limit + 1)
+        readings = list(cursor)
+        if len(readings) <= limit:
+            return readings, None
+        readings = readings[:limit]
+        return readings, (readings[-1]['timestamp'], readings[-1]['_id'])
+    
+    def get_bucketed_data(self, machine_id: str = None,
+                          start_date: datetime = None,
+                          end_date: datetime = None,
+                          resolution: int = 3600,
+                          fields: List[str] = BUCKET_FIELDS) -> List[Dict]:
+        """Readings reduced by the server to one bucket per `resolution` seconds, newest first.
+        
+        Each bucket has its start time, the number of readings and the
+        min/max/avg of every field. Buckets start at whole multiples of the
+        resolution since the epoch; buckets without readings are left out.
+        """
+        millis = {'$toLong': '$timestamp'}
+        group = {
+            '_id': {'$subtract': [millis, {'$mod': [millis, resolution * 1000]}]},
+            'count': {'$sum': 1}
+        }
+        for field in fields:
+            group[f'{field}_min'] = {'$min': f'${field}'}
+            group[f'{field}_max'] = {'$max': f'${field}'}
+            group[f'{field}_avg'] = {'$avg': f'${field}'}
+        pipeline = [
+            {'$match': self._time_query(machine_id, start_date, end_date)},
+            {'$group': group},
+            {'$sort': {'_id': -1}}
+        ]
+        
+        buckets = []
+        for row in self.collection.aggregate(pipeline):
+            bucket = {'timestamp': EPOCH + timedelta(milliseconds=row['_id']), 'count': row['count']}
+            for field in fields:
+                bucket[field] = {stat: row[f'{field}_{stat}'] for stat in ['min', 'max', 'avg']}
+            buckets.append(bucket)
+        return buckets
+    
+    def fetch_columns(self, machine_id: str = None,
+                      start_date: datetime = None,
+                      end_date: datetime = None,
+                      fields: List[str] = TWIN_FIELDS,
+                      limit: int = 0,
+                      batch_size: int = COLUMNAR_BATCH_SIZE) -> Dict[str, np.ndarray]:
+        """Readings newest first as one array per field.
+        
+        Timestamps are datetime64[ms] (int64 underneath), other fields float64
+        (a missing field is 0, a null NaN, as with `item.get(field, 0)`). Only
+        `fields` are fetched, and documents are converted a batch at a time, so
+        the decoded documents of the whole result are never held at once.
+        """
+        projection = {field: 1 for field in fields}
+        projection['_id'] = 0
+        cursor = self.collection.find(
+            self._time_query(machine_id, start_date, end_date),
+            projection
+        ).sort('timestamp', -1).batch_size(batch_size)
+        if limit:
+            cursor = cursor.limit(limit)
+        
+        parts = {field: [] for field in fields}
+        while True:
+            batch = list(islice(cursor, batch_size))
+            if not batch:
+                break
+            for field, values in self._to_columns(batch, fields).items():
+                parts[field].append(values)
+        
+        if not parts[fields[0]]:
+            return self._to_columns([], fields)
+        return {field: np.concatenate(parts[field]) for field in fields}
+    
+    def get_columns_page(self, machine_id: str = None,
+                         start_date: datetime = None,
+                         end_date: datetime = None,
+                         after: Optional[Tuple[datetime, Any]] = None,
+                         limit: int = 1000,
+                         fields: List[str] = TWIN_FIELDS) -> Tuple[Dict[str, np.ndarray], Optional[Tuple[datetime, Any]]]:
+        """One page of `fetch_columns` arrays, continued like `get_readings_page`"""
+        projection = {field: 1 for field in fields}
+        projection['timestamp'] = 1
+        documents = list(self.collection.find(
+            self._page_query(machine_id, start_date, end_date, after), projection
+        ).sort(PAGE_ORDER).limit(limit + 1))
+        last = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            last = (documents[-1]['timestamp'], documents[-1]['_id'])
+        return self._to_columns(documents, fields), last
+    
+    @staticmethod
+    def _to_columns(documents: List[Dict], fields: List[str]) -> Dict[str, np.ndarray]:
+        """One array per field, filled straight from the documents without a list in between"""
+        columns = {}
+        for field in fields:
+            if field == 'timestamp':
+                dtype, default = 'datetime64[ms]', None
+            else:
+                dtype, default = float, 0
+            columns[field] = np.fromiter((doc.get(field, default) for doc in documents),
+                                         dtype=dtype, count=len(documents))
+        return columns
+    
+    def get_machine_status(self, machine_id: str) -> Dict:
+        """Get current machine status"""
+        latest_data = self.collection.find_one(
+            {'machine_id': machine_id},
+            sort=[('timestamp', -1)]
+        )
+        
+        return self.status_from_reading(latest_data)
+    
+    def status_from_reading(self, latest_data: Optional[Dict]) -> Dict:
+        """Machine status given its latest reading (None if it never reported)"""
+        if not latest_data:
+            return {'status': 'offline', 'last_seen': None}
+        
+        # Check if machine is active (last data within 5 minutes)
+        time_diff = datetime.now() - latest_data['timestamp']
+        is_active = time_diff < timedelta(minutes=5)
+        
+        return {
+            'status': 'active' if is_active else 'idle',
+            'last_seen': latest_data['timestamp'],
+            'current_cutting_time': latest_data.get('cutting_time', 0),
+            'spindle_speed': latest_data.get('spindle_speed', 0),
+            'feed_rate': latest_data.get('feed_rate', 0)
+        }
+    
+    def get_latest_readings(self) -> List[Dict]:
+        """Latest reading of every machine, from one aggregation over the (machine_id, timestamp) index"""
+        readings = list(self.collection.aggregate(LATEST_READINGS_PIPELINE))
+        for reading in readings:
+            reading['machine_id'] = reading.pop('_id')
+        return readings
+    
+    def get_performance_metrics(self, machine_id: str, hours: int = 24) -> Dict:
+        """Calculate performance metrics for the digital twin"""
+        end_time = datetime.now()
+        start_time = end_time - timedelta(hours=hours)
+        
+        # The server reduces the window to one document of statistics
+        pipeline = [
+            {'$match': self._time_query(machine_id, start_time, end_time)},
+            {'$group': {
+                '_id': None,
+                'total': {'$sum': '$cutting_time'},
+                'mean': {'$avg': '$cutting_time'},
+                'max': {'$max': '$cutting_time'},
+                'min': {'$min': '$cutting_time'},
+                'count': {'$sum': 1},
+                'std': {'$stdDevSamp': '$cutting_time'}
+            }}
+        ]
+        stats = next(self.collection.aggregate(pipeline), None)
+        
+        return self._metrics_from_stats(stats, hours)
+    
+    def metrics_from_cutting_times(self, cutting_times: np.ndarray, hours: int = 24) -> Dict:
+        """Performance metrics of the cutting times logged in the last `hours`"""
+        if not len(cutting_times):
+            return self._metrics_from_stats(None, hours)
+        
+        # The statistics the metrics pipeline groups, from an array
+        values = cutting_times[~np.isnan(cutting_times)]
+        stats = {
+            'total': float(values.sum()),
+            'mean': float(values.mean()) if len(values) else None,
+            'max': float(values.max()) if len(values) else None,
+            'min': float(values.min()) if len(values) else None,
+            'count': len(cutting_times),
+            'std': float(values.std(ddof=1)) if len(values) > 1 else None
+        }
+        return self._metrics_from_stats(stats, hours)
+    
+    def _metrics_from_stats(self, stats: Optional[Dict], hours: int) -> Dict:
+        if not stats or not stats['count']:
+            return {'error': 'No data available'}
+        
+        metrics = {
+            'total_cutting_time': stats['total'],
+            'average_cutting_time': stats['mean'],
+            'max_cutting_time': stats['max'],
+            'min_cutting_time': stats['min'],
+            'total_operations': stats['count'],
+            'efficiency': self._calculate_efficiency(stats),
+            'utilization': self._calculate_utilization(stats, hours)
+        }
+        
+        return metrics
+    
+    def _calculate_efficiency(self, stats: Dict) -> float:
+        """Calculate machine efficiency based on cutting time statistics"""
+        # Efficiency = (Actual cutting time / Planned cutting time) * 100
+        # For now, we'll use a simple metric based on consistency
+        std_dev = stats['std']
+        mean_time = stats['mean']
+        
+        # A single reading has no spread to measure
+        if not mean_time or std_dev is None:
+            return 0.0
+        
+        coefficient_of_variation = std_dev / mean_time
+        efficiency = max(0, 100 - (coefficient_of_variation * 100))
+        
+        return round(efficiency, 2)
+    
+    def _calculate_utilization(self, stats: Dict, hours: int) -> float:
+        """Calculate machine utilization"""
+        total_cutting_time = stats['total']
+        total_available_time = hours * 3600  # Convert to seconds
+        
+        utilization = (total_cutting_time / total_available_time) * 100
+        return round(min(utilization, 100), 2)
+    
+    def insert_cutting_data(self, data: Dict) -> str:
+        """Insert new cutting data"""
+        data['timestamp'] = datetime.now()
+        result = self.collection.insert_one(data)
+        return str(result.inserted_id)
+    
+    def insert_readings(self, readings: List[Dict]):
+        """Insert readings as sent (device timestamps kept); unordered, so one bad document does not stop the rest"""
+        return self.collection.insert_many(readings, ordered=False)
\ No newline at end of file
@@ -0,0 +1,23 @@
+from flask import request
+from flask_socketio import join_room, leave_room
+from app import socketio
+from app.routes.api import publisher
+from app.services.realtime import machine_room
+
+@socketio.on('subscribe')
+def subscribe(data):
+    """Join the room of a machine; its new readings are pushed as 'readings' events"""
+    machine_id = str((data or {}).get('machine_id', ''))
+    if machine_id:
+        join_room(publisher.subscribe(request.sid, machine_id))
+
+@socketio.on('unsubscribe')
+def unsubscribe(data):
+    machine_id = str((data or {}).get('machine_id', ''))
+    if machine_id:
+        leave_room(machine_room(machine_id))
+        publisher.unsubscribe(request.sid, machine_id)
+
+@socketio.on('disconnect')
+def disconnect():
+    publisher.unsubscribe(request.sid)
\ No newline at end of file
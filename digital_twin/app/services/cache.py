@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+class _Load:
+    """A loader call in progress, awaited by the requests that missed the same key"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+    
+    def wait(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+class TTLCache:
+    """Values shared by all requests of the process for `ttl` seconds.
+    
+    Concurrent misses of a key are coalesced: one request runs the loader and
+    the others wait for its result. With `max_entries`, the least recently
+    used entries are evicted beyond that size.
+    """
+    
+    def __init__(self, ttl: float, max_entries: Optional[int] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._loading: Dict[Hashable, _Load] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Cached value of `key`, loaded with `loader()` when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if time.monotonic() - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+            
+            load = self._loading.get(key)
+            if load is not None:
+                waiting = True
+            else:
+                waiting = False
+                load = self._loading[key] = _Load()
+        if waiting:
+            return load.wait()
+        
+        try:
+            load.value = loader()
+        except Exception as e:
+            load.error = e
+            raise
+        finally:
+            with self._lock:
+                # Invalidated while loading: the value may predate the change, so it is not kept
+                if self._loading.get(key) is load:
+                    del self._loading[key]
+                    if load.error is None:
+                        self._store(key, load.value)
+            load.done.set()
+        return load.value
+    
+    def _store(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        if self.max_entries is not None:
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or all of them; loads already running for them are not stored"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._loading.clear()
+            else:
+                self._entries.pop(key, None)
+                self._loading.pop(key, None)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
\ No newline at end of file
@@ -1,119 +1,163 @@
-import numpy as np
-from datetime import datetime, timedelta
-from typing import Dict, List
-import json
-
-class DigitalTwinService:
-    def __init__(self, cnc_model):
-        self.cnc_model = cnc_model
-        self.prediction_models = {}
-    
-    def get_twin_state(self, machine_id: str) -> Dict:
-        """Get the current state of the digital twin"""
-        # Get real-time data
-        status = self.cnc_model.get_machine_status(machine_id)
-        metrics = self.cnc_model.get_performance_metrics(machine_id)
-        
-        # Get recent cutting data for visualization
-        recent_data = self.cnc_model.get_cutting_time_data(
-            machine_id, 
-            datetime.now() - timedelta(hours=24)
-        )
-        
-        # Prepare time series data for charts
-        time_series = self._prepare_time_series(recent_data)
-        
-        # Predict next maintenance
-        maintenance_prediction = self._predict_maintenance(machine_id)
-        
-        # Calculate anomalies
-        anomalies = self._detect_anomalies(recent_data)
-        
-        return {
-            'machine_id': machine_id,
-            'status': status,
-            'metrics': metrics,
-            'time_series': time_series,
-            'maintenance_prediction': maintenance_prediction,
-            'anomalies': anomalies,
-            'last_updated': datetime.now().isoformat()
-        }
-    
-    def _prepare_time_series(self, data: List[Dict]) -> Dict:
-        """Prepare time series data for visualization"""
-        if not data:
-            return {'timestamps': [], 'cutting_times': [], 'spindle_speeds': []}
-        
-        timestamps = [item['timestamp'].isoformat() for item in data]
-        cutting_times = [item.get('cutting_time', 0) for item in data]
-        spindle_speeds = [item.get('spindle_speed', 0) for item in data]
-        feed_rates = [item.get('feed_rate', 0) for item in data]
-        
-        return {
-            'timestamps': timestamps,
-            'cutting_times': cutting_times,
-            'spindle_speeds': spindle_speeds,
-            'feed_rates': feed_rates
-        }
-    
-    def _predict_maintenance(self, machine_id: str) -> Dict:
-        """Simple maintenance prediction based on cutting time patterns"""
-        # Get data from last 7 days
-        data = self.cnc_model.get_cutting_time_data(
-            machine_id,
-            datetime.now() - timedelta(days=7)
-        )
-        
-        if len(data) < 10:
-            return {'prediction': 'Insufficient data', 'confidence': 0}
-        
-        cutting_times = [item.get('cutting_time', 0) for item in data]
-        
-        # Simple trend analysis
-        recent_avg = np.mean(cutting_times[-10:])
-        overall_avg = np.mean(cutting_times)
-        
-        if recent_avg > overall_avg * 1.2:
-            return {
-                'prediction': 'Maintenance recommended within 3 days',
-                'confidence': 75,
-                'reason': 'Cutting times increasing above normal'
-            }
-        elif recent_avg < overall_avg * 0.8:
-            return {
-                'prediction': 'Tool wear detected',
-                'confidence': 60,
-                'reason': 'Cutting times decreasing significantly'
-            }
-        else:
-            return {
-                'prediction': 'Normal operation',
-                'confidence': 80,
-                'reason': 'Cutting times within normal range'
-            }
-    
-    def _detect_anomalies(self, data: List[Dict]) -> List[Dict]:
-        """Detect anomalies in cutting time data"""
-        if len(data) < 20:
-            return []
-        
-        cutting_times = [item.get('cutting_time', 0) for item in data]
-        
-        # Calculate z-scores
-        mean_time = np.mean(cutting_times)
-        std_time = np.std(cutting_times)
-        
-        anomalies = []
-        for i, item in enumerate(data):
-            cutting_time = item.get('cutting_time', 0)
-            z_score = abs((cutting_time - mean_time) / std_time) if std_time > 0 else 0
-            
-            if z_score > 2:  # Threshold for anomaly
-                anomalies.append({
-                    'timestamp': item['timestamp'].isoformat(),
-                    'cutting_time': cutting_time,
-                    'z_score': round(z_score, 2),
-                    'type': 'high' if cutting_time > mean_time else 'low'
-                })
-        
-        return anomalies[-10:]  # Return last 10 anomalies
\ No newline at end of file
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, List
+import json
+from app.services.cache import TTLCache
+
+# Seconds the fleet status is shared between requests (the machines page polls every 30s).
+# Writes do not invalidate it (every write would), so this also bounds how far it lags them.
+FLEET_STATUS_TTL = 10
+
+# Seconds a machine's twin state is shared between requests. Readings written
+# through this process invalidate it at once; the TTL bounds how stale it can
+# get from writes by other processes and from the clock (status, 24h window).
+TWIN_STATE_TTL = 30
+
+# Machines whose twin state is kept, least recently requested evicted first
+TWIN_STATE_CACHE_SIZE = 256
+
+class DigitalTwinService:
+    def __init__(self, cnc_model, twin_state_ttl: float = TWIN_STATE_TTL,
+                 twin_state_cache_size: int = TWIN_STATE_CACHE_SIZE):
+        self.cnc_model = cnc_model
+        self.prediction_models = {}
+        self.fleet_cache = TTLCache(FLEET_STATUS_TTL)
+        self.twin_cache = TTLCache(twin_state_ttl, max_entries=twin_state_cache_size)
+    
+    def readings_inserted(self, machine_ids):
+        """Drop the twin states new readings of these machines make stale"""
+        for machine_id in set(machine_ids):
+            self.twin_cache.invalidate(machine_id)
+    
+    def get_fleet_status(self) -> List[Dict]:
+        """Status of every machine, from one aggregation shared by all requests for FLEET_STATUS_TTL seconds"""
+        return self.fleet_cache.get('fleet', self._load_fleet_status)
+    
+    def _load_fleet_status(self) -> List[Dict]:
+        return [dict(self.cnc_model.status_from_reading(reading), machine_id=reading['machine_id'])
+                for reading in self.cnc_model.get_latest_readings()]
+    
+    def get_twin_state(self, machine_id: str) -> Dict:
+        """Get the current state of the digital twin (computed once for all tabs watching the machine)"""
+        return self.twin_cache.get(machine_id, lambda: self._load_twin_state(machine_id))
+    
+    def _load_twin_state(self, machine_id: str) -> Dict:
+        now = datetime.now()
+        
+        # One projected fetch of the maintenance window (7 days, newest first);
+        # everything else is derived from its arrays
+        window = self.cnc_model.fetch_columns(machine_id, now - timedelta(days=7))
+        recent = self._slice_window(window, window['timestamp'] >= np.datetime64(now - timedelta(hours=24)))
+        
+        # Get real-time data
+        if len(window['timestamp']):
+            status = self.cnc_model.status_from_reading(self._reading_at(window, 0))
+        else:
+            # Nothing in the window: only the last-seen time of an idle machine is left to look up
+            status = self.cnc_model.get_machine_status(machine_id)
+        metrics = self.cnc_model.metrics_from_cutting_times(recent['cutting_time'], hours=24)
+        
+        # Prepare time series data for charts
+        time_series = self._prepare_time_series(recent)
+        
+        # Predict next maintenance
+        maintenance_prediction = self._predict_maintenance(window)
+        
+        # Calculate anomalies
+        anomalies = self._detect_anomalies(recent)
+        
+        return {
+            'machine_id': machine_id,
+            'status': status,
+            'metrics': metrics,
+            'time_series': time_series,
+            'maintenance_prediction': maintenance_prediction,
+            'anomalies': anomalies,
+            'last_updated': now.isoformat()
+        }
+    
+    @staticmethod
+    def _slice_window(window: Dict[str, np.ndarray], mask: np.ndarray) -> Dict[str, np.ndarray]:
+        return {field: values[mask] for field, values in window.items()}
+    
+    @staticmethod
+    def _to_list(values: np.ndarray) -> List:
+        """A float array as a JSON-safe list (null readings, NaN in the arrays, back to None)"""
+        return np.where(np.isnan(values), None, values).tolist()
+    
+    @staticmethod
+    def _reading_at(window: Dict[str, np.ndarray], position: int) -> Dict:
+        """One reading of a window as a document-like dict"""
+        reading = {field: None if np.isnan(values[position]) else float(values[position])
+                   for field, values in window.items() if field != 'timestamp'}
+        reading['timestamp'] = window['timestamp'][position].astype(datetime)
+        return reading
+    
+    def _prepare_time_series(self, window: Dict[str, np.ndarray]) -> Dict:
+        """Prepare time series data for visualization"""
+        if not len(window['timestamp']):
+            return {'timestamps': [], 'cutting_times': [], 'spindle_speeds': []}
+        
+        return {
+            'timestamps': np.datetime_as_string(window['timestamp'], unit='ms').tolist(),
+            'cutting_times': self._to_list(window['cutting_time']),
+            'spindle_speeds': self._to_list(window['spindle_speed']),
+            'feed_rates': self._to_list(window['feed_rate'])
+        }
+    
+    def _predict_maintenance(self, window: Dict[str, np.ndarray]) -> Dict:
+        """Simple maintenance prediction based on cutting time patterns"""
+        # Null cutting times (NaN) are left out of the averages
+        cutting_times = window['cutting_time']
+        cutting_times = cutting_times[~np.isnan(cutting_times)]
+        
+        if len(cutting_times) < 10:
+            return {'prediction': 'Insufficient data', 'confidence': 0}
+        
+        # Simple trend analysis (readings are newest first)
+        recent_avg = np.mean(cutting_times[:10])
+        overall_avg = np.mean(cutting_times)
+        
+        if recent_avg > overall_avg * 1.2:
+            return {
+                'prediction': 'Maintenance recommended within 3 days',
+                'confidence': 75,
+                'reason': 'Cutting times increasing above normal'
+            }
+        elif recent_avg < overall_avg * 0.8:
+            return {
+                'prediction': 'Tool wear detected',
+                'confidence': 60,
+                'reason': 'Cutting times decreasing significantly'
+            }
+        else:
+            return {
+                'prediction': 'Normal operation',
+                'confidence': 80,
+                'reason': 'Cutting times within normal range'
+            }
+    
+    def _detect_anomalies(self, window: Dict[str, np.ndarray]) -> List[Dict]:
+        """Detect anomalies in cutting time data"""
+        cutting_times = window['cutting_time']
+        if len(cutting_times) < 20:
+            return []
+        
+        # Calculate z-scores; null cutting times (NaN) are skipped and never flagged
+        if np.count_nonzero(~np.isnan(cutting_times)) < 2:
+            return []
+        mean_time = np.nanmean(cutting_times)
+        std_time = np.nanstd(cutting_times)
+        if std_time == 0:
+            return []
+        z_scores = np.abs(cutting_times - mean_time) / std_time
+        
+        # Threshold for anomaly; the 10 most recent are returned
+        positions = np.flatnonzero(z_scores > 2)[:10]
+        timestamps = np.datetime_as_string(window['timestamp'][positions], unit='ms')
+        return [{
+            'timestamp': timestamp,
+            'cutting_time': float(cutting_times[position]),
+            'z_score': round(float(z_scores[position]), 2),
+            'type': 'high' if cutting_times[position] > mean_time else 'low'
+        } for timestamp, position in zip(timestamps.tolist(), positions)]
\ No newline at end of file
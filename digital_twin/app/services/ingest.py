@@ -0,0 +1,230 @@
+import json
+import logging
+import threading
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Write-behind settings for batch ingestion
+DEFAULT_INGEST = {
+    'batch_size': 1000,          # readings per submitted batch (and per NDJSON parse step)
+    'max_write_size': 10_000,    # readings per insert_many; small batches of concurrent requests are combined
+    'max_pending': 100_000,      # readings buffered but not yet written; producers wait beyond this
+    'submit_timeout': 5.0,       # seconds a producer waits for room before it is told to back off
+    'result_limit': 1000         # results of recent batches kept for GET /api/data/batch/<id>
+}
+
+NUMERIC_FIELDS = ['cutting_time', 'spindle_speed', 'feed_rate']
+
+class BufferFull(Exception):
+    """The write-behind buffer stayed full for longer than the submit timeout"""
+
+def parse_timestamp(value, received_at: datetime) -> datetime:
+    """Device timestamp of a reading: ISO 8601 or epoch seconds/milliseconds; server time if absent"""
+    if value is None:
+        return received_at
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # Values too large to be seconds are milliseconds
+        try:
+            return datetime.fromtimestamp(value / 1000 if value > 1e11 else value)
+        except (OverflowError, OSError, ValueError):
+            # Beyond the platform's time range, infinite (e.g. NDJSON 1e400) or NaN
+            raise ValueError(f"Timestamp out of range: {value!r}")
+    if isinstance(value, str):
+        try:
+            timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f"Unrecognized timestamp: {value!r}")
+        # Stored like datetime.now(): naive server-local time
+        try:
+            return timestamp.astimezone().replace(tzinfo=None) if timestamp.tzinfo else timestamp
+        except (OverflowError, OSError):
+            raise ValueError(f"Timestamp out of range: {value!r}")
+    raise ValueError(f"Unrecognized timestamp: {value!r}")
+
+def parse_reading(item, received_at: datetime) -> Dict:
+    """Validated reading document from a JSON object (or one NDJSON line)"""
+    if isinstance(item, (bytes, str)):
+        try:
+            item = json.loads(item)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e.msg}")
+    if not isinstance(item, dict):
+        raise ValueError("A reading must be a JSON object")
+    if item.get('machine_id') in (None, ''):
+        raise ValueError("machine_id is required")
+    
+    reading = dict(item)
+    reading['machine_id'] = str(item['machine_id'])
+    reading['timestamp'] = parse_timestamp(item.get('timestamp'), received_at)
+    reading['received_at'] = received_at
+    for field in NUMERIC_FIELDS:
+        value = reading.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise ValueError(f"{field} must be a number")
+    return reading
+
+def iter_ndjson(stream: Iterable[bytes]) -> Iterator[Tuple[int, bytes]]:
+    """(line number, line) of the non-blank lines of an NDJSON stream, read as it arrives"""
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            yield number, line
+
+class IngestBatch:
+    """Readings of one request on their way to MongoDB"""
+    
+    def __init__(self, documents: List[Dict], items: List[int]):
+        self.id = uuid.uuid4().hex[:12]
+        self.documents = documents  # released once written
+        self.items = items  # position of each reading in the request (line or 1-based index)
+        self.readings = len(documents)
+        self.inserted = 0
+        self.errors = []
+        self.done = threading.Event()
+    
+    def result(self) -> Dict:
+        return {
+            'id': self.id,
+            'readings': self.readings,
+            'status': 'written' if self.done.is_set() else 'pending',
+            'inserted': self.inserted,
+            'errors': self.errors
+        }
+
+class WriteBehindBuffer:
+    """Bounded buffer of readings written by one background thread with unordered insert_many.
+    
+    Requests return as soon as their readings are buffered (or, if they wait,
+    once their batches are written). Batches waiting at the same time are
+    combined into one insert_many. When `max_pending` readings are waiting,
+    producers block for up to `submit_timeout` seconds and then get BufferFull,
+    which the API turns into 503 + Retry-After. Write errors are reported per
+    batch, against each reading's position in its request.
+    """
+    
+    def __init__(self, write: Callable[[List[Dict]], object], options: Optional[Dict] = None,
+                 on_written: Optional[Callable[[List[Dict]], None]] = None):
+        self.write = write
+        self.options = {**DEFAULT_INGEST, **(options or {})}
+        self.on_written = on_written
+        self._queue = deque()
+        self._pending = 0
+        self._condition = threading.Condition()
+        self._results = OrderedDict()
+        self._thread = None
+    
+    @property
+    def pending(self) -> int:
+        return self._pending
+    
+    def submit(self, documents: List[Dict], items: List[int]) -> IngestBatch:
+        """Buffer one batch, waiting for room up to `submit_timeout`"""
+        batch = IngestBatch(documents, items)
+        with self._condition:
+            # A batch larger than the whole buffer is let in once the buffer is empty
+            room = lambda: self._pending == 0 or self._pending + len(documents) <= self.options['max_pending']
+            if not self._condition.wait_for(room, timeout=self.options['submit_timeout']):
+                raise BufferFull(f"{self._pending:,} readings are waiting to be written")
+            self._queue.append(batch)
+            self._pending += len(documents)
+            self._results[batch.id] = batch
+            while len(self._results) > self.options['result_limit']:
+                self._results.popitem(last=False)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='ingest-writer', daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+        return batch
+    
+    def ingest(self, items: Iterable[Tuple[int, object]], received_at: datetime) -> Tuple[Dict, List[IngestBatch]]:
+        """Parse, validate and buffer (position, item) pairs in batches of `batch_size`.
+        
+        Invalid readings are rejected individually. On BufferFull the report
+        says from which position the client should resend.
+        """
+        report = {'received': 0, 'accepted': 0, 'rejected': []}
+        batches = []
+        documents, positions = [], []
+        try:
+            for position, item in items:
+                report['received'] += 1
+                try:
+                    documents.append(parse_reading(item, received_at))
+                    positions.append(position)
+                except ValueError as e:
+                    report['rejected'].append({'item': position, 'error': str(e)})
+                    continue
+                if len(documents) >= self.options['batch_size']:
+                    batches.append(self.submit(documents, positions))
+                    report['accepted'] += len(documents)
+                    documents, positions = [], []
+            if documents:
+                batches.append(self.submit(documents, positions))
+                report['accepted'] += len(documents)
+        except BufferFull as e:
+            report['backpressure'] = str(e)
+            report['resume_from'] = positions[0]
+        return report, batches
+    
+    def get(self, batch_id: str) -> Optional[IngestBatch]:
+        with self._condition:
+            return self._results.get(batch_id)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything buffered so far has been written"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending == 0, timeout=timeout)
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue)
+                batches = [self._queue.popleft()]
+                size = batches[0].readings
+                while self._queue and size + self._queue[0].readings <= self.options['max_write_size']:
+                    batch = self._queue.popleft()
+                    batches.append(batch)
+                    size += batch.readings
+            try:
+                self._write(batches)
+            finally:
+                for batch in batches:
+                    batch.documents = batch.items = None
+                    batch.done.set()
+                with self._condition:
+                    self._pending -= size
+                    self._condition.notify_all()
+    
+    def _write(self, batches: List[IngestBatch]):
+        documents = [document for batch in batches for document in batch.documents]
+        try:
+            self.write(documents)
+            failed = {}
+        except BulkWriteError as e:
+            failed = {error['index']: error for error in e.details.get('writeErrors', [])}
+        except Exception as e:
+            # Unknown how much of an unordered write got through; report all of it as failed
+            logger.exception("Ingest write of %d readings failed", len(documents))
+            failed = {index: {'code': None, 'errmsg': str(e)} for index in range(len(documents))}
+        
+        written = []
+        offset = 0
+        for batch in batches:
+            for position, (item, document) in enumerate(zip(batch.items, batch.documents)):
+                error = failed.get(offset + position)
+                if error is None:
+                    written.append(document)
+                else:
+                    batch.errors.append({'item': item, 'code': error.get('code'), 'error': error.get('errmsg')})
+            batch.inserted = batch.readings - len(batch.errors)
+            offset += batch.readings
+        
+        if written and self.on_written is not None:
+            try:
+                self.on_written(written)
+            except Exception:
+                logger.exception("Ingest callback failed")
\ No newline at end of file
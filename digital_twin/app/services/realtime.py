@@ -0,0 +1,92 @@
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+from app.models.cnc_data import TWIN_FIELDS
+
+logger = logging.getLogger(__name__)
+
+def machine_room(machine_id: str) -> str:
+    """SocketIO room of a machine's dashboards"""
+    return f"machine:{machine_id}"
+
+class RealtimePublisher:
+    """Pushes newly ingested readings to the dashboards subscribed to a machine.
+    
+    A message carries only the new readings plus the machine's status and
+    refreshed 24h metrics, and is only built when a client connected to this
+    process is subscribed to the machine. Messages are built and sent by a
+    background task, so writers only queue readings; readings of a machine
+    queued while a previous message is being sent go out in one message.
+    """
+    
+    def __init__(self, socketio, cnc_model):
+        self.socketio = socketio
+        self.cnc_model = cnc_model
+        self._subscribers = defaultdict(set)  # room -> SocketIO session ids
+        self._lock = threading.Lock()
+        self._pending = {}  # machine_id -> readings waiting to be sent
+        self._condition = threading.Condition()
+        self._sender = None
+    
+    def subscribe(self, sid: str, machine_id: str) -> str:
+        room = machine_room(machine_id)
+        with self._lock:
+            self._subscribers[room].add(sid)
+        return room
+    
+    def unsubscribe(self, sid: str, machine_id: Optional[str] = None):
+        """Remove a session from one machine's room, or from all of them (on disconnect)"""
+        rooms = [machine_room(machine_id)] if machine_id else None
+        with self._lock:
+            for room in rooms or list(self._subscribers):
+                sessions = self._subscribers.get(room)
+                if sessions is not None:
+                    sessions.discard(sid)
+                    if not sessions:
+                        del self._subscribers[room]
+    
+    def has_subscribers(self, machine_id: str) -> bool:
+        with self._lock:
+            return bool(self._subscribers.get(machine_room(machine_id)))
+    
+    def publish(self, machine_id: str, readings: List[Dict]) -> bool:
+        """Queue new readings of a machine for its room; returns False if nobody is watching"""
+        if not readings or not self.has_subscribers(machine_id):
+            return False
+        
+        with self._condition:
+            self._pending.setdefault(machine_id, []).extend(readings)
+            if self._sender is None:
+                self._sender = self.socketio.start_background_task(self._run)
+            self._condition.notify()
+        return True
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                pending, self._pending = self._pending, {}
+            for machine_id, readings in pending.items():
+                try:
+                    self._send(machine_id, readings)
+                except Exception:
+                    logger.exception("Publishing %d readings of %s failed", len(readings), machine_id)
+    
+    def _send(self, machine_id: str, readings: List[Dict]):
+        # Status from the machine's newest stored reading: a backfill of old readings leaves it as it was
+        status = self.cnc_model.get_machine_status(machine_id)
+        if status['last_seen'] is not None:
+            status['last_seen'] = status['last_seen'].isoformat()
+        self.socketio.emit('readings', {
+            'machine_id': machine_id,
+            'readings': [self._serialize(reading) for reading in readings],
+            'status': status,
+            'metrics': self.cnc_model.get_performance_metrics(machine_id)
+        }, to=machine_room(machine_id))
+    
+    @staticmethod
+    def _serialize(reading: Dict) -> Dict:
+        message = {field: reading.get(field, 0) for field in TWIN_FIELDS if field != 'timestamp'}
+        message['timestamp'] = reading['timestamp'].isoformat()
+        return message
\ No newline at end of file
@@ -0,0 +1 @@
+# Energy Analytics Benchmarks
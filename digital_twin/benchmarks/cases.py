@@ -0,0 +1,93 @@
+import numpy as np
+from modules.analytics import EnergyAnalytics
+from modules.forecasting import EnergyForecasting
+from modules.reports import ReportGenerator
+from modules.calculator import EnergyCalculator
+from modules.tariffs import TariffEngine
+from modules.peak_demand import PeakDemandEngine
+from modules.anomalies import AnomalyDetector
+from modules.running_stats import PartitionedStats
+from modules.sketches import LoadSketches
+from modules.site_comparison import SiteComparison
+from modules.simulator import WhatIfSimulator, RECOMMENDED_SCENARIOS
+
+# Each case times one computational path on a dataset. `view` cases run the
+# Streamlit page code headless (widgets return their defaults, nothing is sent
+# to a browser), so they include the aggregations and the figure construction
+# of a rerun. `max_rows` skips sizes a case is not meant for.
+
+TOU_TARIFF = TariffEngine.from_rates(0.12, 0.18, 0.08, demand_charge_per_kw=10.0)
+
+def _date_range(data):
+    return data['timestamp'].min().date(), data['timestamp'].max().date()
+
+def _sweep(data):
+    calculator = EnergyCalculator(data)
+    sweep = calculator.sweep_scenarios(np.linspace(0.01, 3.0, 15), np.linspace(0.08, 0.3, 12),
+                                       np.arange(1, 25), np.arange(1, 11), [7, 30, 90, 365])
+    return calculator.sweep_sensitivity(sweep)
+
+CASES = [
+    # Analytics pages
+    {'name': 'analytics.consumption_patterns', 'view': True,
+     'run': lambda data: EnergyAnalytics(data).show_consumption_patterns()},
+    {'name': 'analytics.cost_analysis', 'view': True,
+     'run': lambda data: EnergyAnalytics(data).show_cost_analysis()},
+    {'name': 'analytics.efficiency_metrics', 'view': True,
+     'run': lambda data: EnergyAnalytics(data).show_efficiency_metrics()},
+    {'name': 'analytics.peak_usage', 'view': True, 'max_rows': 1_000_000,
+     'run': lambda data: EnergyAnalytics(data).show_peak_usage_analysis()},
+    {'name': 'analytics.anomaly_detection', 'view': True, 'max_rows': 1_000_000,
+     'run': lambda data: EnergyAnalytics(data).show_anomaly_detection()},
+    {'name': 'analytics.load_duration', 'view': True,
+     'run': lambda data: EnergyAnalytics(data).show_load_duration()},
+    {'name': 'analytics.site_comparison', 'view': True,
+     'run': lambda data: EnergyAnalytics(data).show_site_comparison()},
+    
+    # Analytics engines on their own
+    {'name': 'engine.top_peaks',
+     'run': lambda data: PeakDemandEngine(data).top_peaks(15, 3, 'M')},
+    {'name': 'engine.anomaly_fit',
+     'run': lambda data: AnomalyDetector(data).anomalies('either', 3.5)},
+    {'name': 'engine.partition_states',
+     'run': lambda data: PartitionedStats(data).daily()},
+    {'name': 'engine.load_sketches',
+     'run': lambda data: LoadSketches(data).percentiles()},
+    {'name': 'engine.site_profiles',
+     'run': lambda data: SiteComparison(data).compute('serial')},
+    {'name': 'engine.tariff_bill',
+     'run': lambda data: TOU_TARIFF.monthly_bill(data, by='location')},
+    
+    # Forecasting
+    {'name': 'forecasting.linear',
+     'run': lambda data: EnergyForecasting(data).generate_forecast(30, "Linear Regression")},
+    {'name': 'forecasting.polynomial',
+     'run': lambda data: EnergyForecasting(data).generate_forecast(30, "Polynomial Regression")},
+    {'name': 'forecasting.moving_average',
+     'run': lambda data: EnergyForecasting(data).generate_forecast(30, "Moving Average")},
+    
+    # Reports
+    {'name': 'reports.summary', 'view': True,
+     'run': lambda data: ReportGenerator(data).create_summary_report(data, *_date_range(data))},
+    {'name': 'reports.detailed', 'view': True,
+     'run': lambda data: [getattr(ReportGenerator(data), section)() for section in
+                          ['show_hourly_patterns', 'show_weekly_trends', 'show_monthly_comparison',
+                           'show_device_analysis', 'show_location_analysis', 'show_cost_breakdown']]},
+    {'name': 'reports.custom', 'view': True,
+     'run': lambda data: ReportGenerator(data).create_custom_report(
+         data, ["Total Consumption", "Total Cost", "Average Daily Consumption", "Peak Usage",
+                "Efficiency Score", "Cost per kWh"],
+         ["Daily Trend", "Category Breakdown", "Hourly Pattern", "Weekly Heatmap",
+          "Device Analysis", "Location Analysis"])},
+    
+    # Calculator
+    {'name': 'calculator.monthly_profile',
+     'run': lambda data: TOU_TARIFF.monthly_bill(
+         EnergyCalculator(data).build_monthly_profile(900.0), interval_hours=1.0)},
+    {'name': 'calculator.scenario_sweep', 'max_rows': 1_000,
+     'run': _sweep},
+    {'name': 'calculator.what_if',
+     'run': lambda data: WhatIfSimulator(data).run_many(RECOMMENDED_SCENARIOS, max_workers=1)},
+    {'name': 'calculator.what_if_page', 'view': True, 'max_rows': 1_000_000,
+     'run': lambda data: EnergyCalculator(data).what_if_simulator()}
+]
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""Ingest throughput (readings per second): one POST /api/data per reading against batched, write-behind ingestion.
+
+Needs a MongoDB server. Readings are written to a scratch database, which is dropped afterwards:
+    
+    python -m benchmarks.ingest --mongo-uri mongodb://localhost:27017
+    python -m benchmarks.ingest --readings 200000 --producers 8 --request-size 500
+
+"single" is the original path: every reading is its own insert_one (CNCDataModel.insert_cutting_data).
+"batch" sends the same readings as NDJSON requests of --request-size readings through
+WriteBehindBuffer.ingest, each producer waiting for its readings to be written, as POST /api/data/batch does.
+HTTP itself is left out of both.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from pymongo import MongoClient, monitoring
+
+from app.models.cnc_data import CNCDataModel
+from app.services.ingest import WriteBehindBuffer, iter_ndjson
+from benchmarks.twin_state import CommandCounter
+
+def readings(machines, count, seed=42):
+    """`count` device readings over the last hour, as NDJSON lines"""
+    rng = np.random.default_rng(seed)
+    start = datetime.now() - timedelta(hours=1)
+    offsets = np.sort(rng.uniform(0, 3600, count))
+    return [json.dumps({
+        'machine_id': f"CNC-{int(machine):03d}",
+        'timestamp': (start + timedelta(seconds=float(offset))).isoformat(),
+        'cutting_time': float(cutting_time),
+        'spindle_speed': float(rng.normal(8000, 500)),
+        'feed_rate': float(rng.normal(1200, 100))
+    }).encode() + b'\n' for machine, offset, cutting_time in zip(
+        rng.integers(0, machines, count), offsets, rng.gamma(4.0, 15.0, count))]
+
+def measure(label, send, requests, producers, counter):
+    """Readings per second and round trips while `producers` threads send the requests"""
+    commands = counter.count
+    started = time.perf_counter()
+    with ThreadPoolExecutor(producers) as pool:
+        sent = sum(pool.map(send, requests))
+    seconds = time.perf_counter() - started
+    return {
+        'plan': label,
+        'readings': sent,
+        'seconds': seconds,
+        'readings_per_s': sent / seconds,
+        'round_trips': counter.count - commands
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest throughput, one insert per reading against batched write-behind")
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017'))
+    parser.add_argument('--database', default='cnc_benchmark', help="Scratch database (dropped afterwards)")
+    parser.add_argument('--machines', type=int, default=10)
+    parser.add_argument('--readings', type=int, default=50_000, help="Readings sent by each plan")
+    parser.add_argument('--request-size', type=int, default=1000, help="Readings per batch request")
+    parser.add_argument('--producers', type=int, default=4, help="Concurrent clients")
+    parser.add_argument('--keep', action='store_true', help="Keep the scratch database")
+    args = parser.parse_args(argv)
+    
+    # Listeners apply to clients created after registration
+    counter = CommandCounter()
+    monitoring.register(counter)
+    model = CNCDataModel(MongoClient(args.mongo_uri), args.database)
+    buffer = WriteBehindBuffer(model.insert_readings)
+    
+    def send_single(lines):
+        for line in lines:
+            model.insert_cutting_data(json.loads(line))
+        return len(lines)
+    
+    def send_batch(lines):
+        report, batches = buffer.ingest(iter_ndjson(lines), datetime.now())
+        for batch in batches:
+            batch.done.wait()
+        if 'backpressure' in report or any(batch.errors for batch in batches):
+            raise RuntimeError(f"Batch request failed: {report.get('backpressure')}")
+        return sum(batch.inserted for batch in batches)
+    
+    try:
+        model.collection.drop()
+        model.ensure_indexes()
+        lines = readings(args.machines, args.readings)
+        requests = [lines[start:start + args.request_size] for start in range(0, len(lines), args.request_size)]
+        print(f"{args.readings:,} readings from {args.machines} machines, {len(requests)} requests "
+              f"of up to {args.request_size:,}, {args.producers} producers\n")
+        
+        results = []
+        for label, send in [('single', send_single), ('batch', send_batch)]:
+            model.collection.delete_many({})
+            results.append(measure(label, send, requests, args.producers, counter))
+            stored = model.collection.count_documents({})
+            if stored != args.readings:
+                raise RuntimeError(f"{label}: {stored:,} of {args.readings:,} readings stored")
+        
+        results = pd.DataFrame(results)
+        print(results.to_string(index=False, float_format=lambda value: f"{value:,.2f}"))
+        print(f"\nSpeed-up (readings/s): {results['readings_per_s'].iloc[1] / results['readings_per_s'].iloc[0]:.1f}x")
+    finally:
+        if not args.keep:
+            model.client.drop_database(args.database)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
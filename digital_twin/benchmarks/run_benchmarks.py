@@ -0,0 +1,204 @@
+"""Scaling benchmarks for the analytics, forecasting, report and calculator code.
+
+Run from the project directory:
+    
+    python -m benchmarks.run_benchmarks                       # 10^3 .. 10^6 rows, compare with baseline.json
+    python -m benchmarks.run_benchmarks --sizes 1e3 1e7 --cases "engine.*"
+    python -m benchmarks.run_benchmarks --save-baseline       # record a new baseline
+
+Exits with status 1 when a case is slower (or uses more memory) than the
+baseline by more than the tolerance, so it can gate a deploy.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import streamlit.logger
+
+from modules.data_generator import generate_synthetic_data
+from benchmarks.cases import CASES
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+DEFAULT_THRESHOLDS = {
+    'tolerance': 0.25,        # allowed relative slowdown / memory growth
+    'min_delta_ms': 5.0,      # ignore timing changes smaller than this
+    'min_delta_mb': 1.0       # ignore memory changes smaller than this
+}
+
+def environment():
+    return {
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__
+    }
+
+def measure(case, data, repeat=3, memory=True):
+    """Best and median wall time over `repeat` runs, plus peak traced memory of one run.
+    
+    Each run gets a shallow copy of the data, so per-dataset caches start cold.
+    """
+    # Warm-up run, so lazy imports and first-call set-up are not measured
+    case['run'](data.copy(deep=False))
+    
+    peak_mb = np.nan
+    if memory:
+        tracemalloc.start()
+        try:
+            case['run'](data.copy(deep=False))
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    
+    timings = []
+    for _ in range(repeat):
+        run_data = data.copy(deep=False)
+        started = time.perf_counter()
+        case['run'](run_data)
+        timings.append(time.perf_counter() - started)
+    return min(timings), float(np.median(timings)), peak_mb
+
+def run(sizes, patterns=None, repeat=3, memory=True, log=print):
+    """Results of every selected case at every size"""
+    cases = [case for case in CASES
+             if not patterns or any(fnmatch.fnmatch(case['name'], pattern) for pattern in patterns)]
+    results = []
+    for rows in sizes:
+        started = time.perf_counter()
+        data = generate_synthetic_data(rows)
+        log(f"{rows:>12,} rows generated in {time.perf_counter() - started:.2f}s")
+        
+        for case in cases:
+            if rows > case.get('max_rows', np.inf):
+                continue
+            result = {'case': case['name'], 'rows': rows}
+            try:
+                seconds, median, peak_mb = measure(case, data, repeat, memory)
+                result.update({
+                    'status': 'ok',
+                    'seconds': seconds,
+                    'median_seconds': median,
+                    'rows_per_second': rows / seconds if seconds > 0 else np.inf,
+                    'peak_memory_mb': peak_mb
+                })
+                log(f"{'':>12} {case['name']:<34} {seconds * 1000:>10.1f} ms {peak_mb:>9.1f} MB")
+            except Exception as e:
+                result.update({'status': 'error', 'error': f"{type(e).__name__}: {e}"})
+                log(f"{'':>12} {case['name']:<34} failed: {result['error']}")
+            results.append(result)
+        del data
+    return results
+
+def compare(results, baseline, thresholds=DEFAULT_THRESHOLDS):
+    """Results joined with the baseline, with a verdict per case and size"""
+    current = pd.DataFrame(results).reindex(columns=['case', 'rows', 'status', 'error', 'seconds', 'median_seconds',
+                                                     'rows_per_second', 'peak_memory_mb'])
+    if current.empty:
+        return current
+    reference = pd.DataFrame(baseline.get('results', []))
+    if reference.empty:
+        reference = pd.DataFrame(columns=['case', 'rows', 'status', 'seconds', 'peak_memory_mb'])
+    reference = reference[['case', 'rows', 'status', 'seconds', 'peak_memory_mb']]
+    table = current.merge(reference, on=['case', 'rows'], how='left', suffixes=('', '_baseline'))
+    
+    tolerance = thresholds['tolerance']
+    time_ratio = table['seconds'] / table['seconds_baseline']
+    time_delta_ms = (table['seconds'] - table['seconds_baseline']) * 1000
+    memory_ratio = table['peak_memory_mb'] / table['peak_memory_mb_baseline']
+    memory_delta = table['peak_memory_mb'] - table['peak_memory_mb_baseline']
+    
+    slower = (time_ratio > 1 + tolerance) & (time_delta_ms > thresholds['min_delta_ms'])
+    faster = (time_ratio < 1 / (1 + tolerance)) & (-time_delta_ms > thresholds['min_delta_ms'])
+    heavier = (memory_ratio > 1 + tolerance) & (memory_delta > thresholds['min_delta_mb'])
+    
+    table['time_ratio'] = time_ratio
+    table['memory_ratio'] = memory_ratio
+    # A case that already failed in the baseline is reported but does not fail the run
+    failed = table['status'] != 'ok'
+    table['verdict'] = np.select(
+        [failed & (table['status_baseline'] == 'error'), failed, table['seconds_baseline'].isna(),
+         slower | heavier, faster],
+        ['known error', 'error', 'new', 'regression', 'improvement'], 'ok')
+    return table
+
+def format_report(table):
+    columns = ['case', 'rows', 'seconds', 'seconds_baseline', 'time_ratio', 'rows_per_second',
+               'peak_memory_mb', 'peak_memory_mb_baseline', 'memory_ratio', 'verdict']
+    report = table[columns].copy()
+    report['seconds'] *= 1000
+    report['seconds_baseline'] *= 1000
+    report = report.rename(columns={'seconds': 'ms', 'seconds_baseline': 'baseline_ms',
+                                    'peak_memory_mb': 'peak_mb', 'peak_memory_mb_baseline': 'baseline_mb'})
+    return report.to_string(index=False, float_format=lambda value: f"{value:,.2f}")
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for the energy analytics modules")
+    parser.add_argument('--sizes', nargs='+', type=float, default=DEFAULT_SIZES,
+                        help="Dataset sizes in rows, e.g. 1e3 1e5 1e7")
+    parser.add_argument('--cases', nargs='+', help="Glob patterns of case names, e.g. 'analytics.*'")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case (best is reported)")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced run for peak memory")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Write these results as the baseline")
+    parser.add_argument('--output', help="Write results and comparison to this JSON file")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_THRESHOLDS['tolerance'],
+                        help="Allowed relative slowdown before a case counts as a regression")
+    parser.add_argument('--list', action='store_true', help="List the cases and exit")
+    args = parser.parse_args(argv)
+    
+    if args.list:
+        for case in CASES:
+            print(case['name'] + (' (page)' if case.get('view') else ''))
+        return 0
+    
+    # Page code runs without a Streamlit server; its bare-mode warnings are noise here
+    streamlit.logger.set_log_level('error')
+    
+    sizes = sorted({int(size) for size in args.sizes})
+    results = run(sizes, args.cases, args.repeat, not args.no_memory)
+    document = {'environment': environment(), 'sizes': sizes, 'results': results}
+    
+    baseline = load_baseline(args.baseline)
+    thresholds = dict(DEFAULT_THRESHOLDS, tolerance=args.tolerance)
+    table = compare(results, baseline, thresholds)
+    if baseline:
+        print(f"\nCompared with baseline from {baseline['environment']['recorded_at']} "
+              f"({baseline['environment']['platform']}, {baseline['environment']['cpu_count']} CPUs)")
+    print()
+    print(format_report(table))
+    
+    if args.output:
+        document['comparison'] = json.loads(table.to_json(orient='records'))
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    
+    regressions = table[table['verdict'].isin(['regression', 'error'])]
+    if len(regressions):
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
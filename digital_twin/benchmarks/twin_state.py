@@ -0,0 +1,154 @@
+"""Latency of the twin state request (GET /api/twin/<machine_id>) before and after the single-fetch plan.
+
+Needs a MongoDB server. Readings are written to a scratch database, which is dropped afterwards:
+    
+    python -m benchmarks.twin_state --mongo-uri mongodb://localhost:27017
+    python -m benchmarks.twin_state --machines 5 --readings 50000 --repeat 20
+
+"before" is the original plan: find_one for the status, a 24 hour find for the metrics and two
+more finds for the chart data and the maintenance prediction, each decoding full documents.
+"after" is DigitalTwinService.get_twin_state with its cache disabled (TTL 0), so every request computes;
+"cached" is the default service, where repeated requests within the TTL share one computation.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from pymongo import MongoClient, monitoring
+
+from app.models.cnc_data import CNCDataModel
+from app.services.digital_twin_service import DigitalTwinService
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts the commands (round trips) sent to the server"""
+    
+    def __init__(self):
+        self.count = 0
+    
+    def started(self, event):
+        self.count += 1
+    
+    def succeeded(self, event):
+        pass
+    
+    def failed(self, event):
+        pass
+
+def seed(collection, machines, readings, days=10, seed=42):
+    """`readings` per machine spread over the last `days`, with the extra fields real documents carry"""
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    for machine in range(machines):
+        offsets = np.sort(rng.uniform(0, days * 86400, readings))
+        cutting_times = rng.gamma(4.0, 15.0, readings)
+        documents = [{
+            'machine_id': f"CNC-{machine:03d}",
+            'timestamp': now - timedelta(seconds=float(offset)),
+            'cutting_time': float(cutting_time),
+            'spindle_speed': float(rng.normal(8000, 500)),
+            'feed_rate': float(rng.normal(1200, 100)),
+            'program': f"O{rng.integers(1000, 9999)}",
+            'tool_id': int(rng.integers(1, 40)),
+            'operator': 'benchmark',
+            'notes': 'Synthetic reading written by benchmarks.twin_state'
+        } for offset, cutting_time in zip(offsets, cutting_times)]
+        for start in range(0, len(documents), 10_000):
+            collection.insert_many(documents[start:start + 10_000])
+
+def legacy_twin_state(model, machine_id):
+    """The request as it was: four queries, three of them over the same readings"""
+    collection = model.collection
+    now = datetime.now()
+    
+    latest = collection.find_one({'machine_id': machine_id}, sort=[('timestamp', -1)])
+    
+    # get_performance_metrics: 24 hours into a DataFrame
+    day = list(collection.find({'machine_id': machine_id,
+                                'timestamp': {'$gte': now - timedelta(hours=24), '$lte': now}}).sort('timestamp', -1))
+    df = pd.DataFrame(day)
+    metrics = {
+        'total_cutting_time': df['cutting_time'].sum(),
+        'average_cutting_time': df['cutting_time'].mean(),
+        'std': df['cutting_time'].std(),
+        'total_operations': len(df)
+    } if len(df) else {}
+    
+    # Chart data and maintenance window: only a start date was passed, so the whole history came back, twice
+    recent = list(collection.find({'machine_id': machine_id}).sort('timestamp', -1))
+    series = {
+        'timestamps': [item['timestamp'].isoformat() for item in recent],
+        'cutting_times': [item.get('cutting_time', 0) for item in recent],
+        'spindle_speeds': [item.get('spindle_speed', 0) for item in recent],
+        'feed_rates': [item.get('feed_rate', 0) for item in recent]
+    }
+    week = list(collection.find({'machine_id': machine_id}).sort('timestamp', -1))
+    cutting_times = [item.get('cutting_time', 0) for item in week]
+    trend = (np.mean(cutting_times[-10:]), np.mean(cutting_times)) if len(cutting_times) >= 10 else None
+    
+    mean_time, std_time = np.mean(series['cutting_times']), np.std(series['cutting_times'])
+    anomalies = [item for item in recent
+                 if std_time > 0 and abs((item.get('cutting_time', 0) - mean_time) / std_time) > 2]
+    return latest, metrics, series, trend, anomalies[-10:]
+
+def measure(label, request, machine_ids, repeat, counter):
+    """Per-request latencies and round trips over `repeat` passes over the machines"""
+    request(machine_ids[0])   # warm-up: connection pool, server caches
+    latencies = []
+    commands = counter.count
+    for _ in range(repeat):
+        for machine_id in machine_ids:
+            started = time.perf_counter()
+            request(machine_id)
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies = np.array(latencies)
+    return {
+        'plan': label,
+        'requests': len(latencies),
+        'mean_ms': latencies.mean(),
+        'p50_ms': np.percentile(latencies, 50),
+        'p95_ms': np.percentile(latencies, 95),
+        'round_trips': (counter.count - commands) / len(latencies)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Twin state request latency, before and after the single-fetch plan")
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017'))
+    parser.add_argument('--database', default='cnc_benchmark', help="Scratch database (dropped afterwards)")
+    parser.add_argument('--machines', type=int, default=3)
+    parser.add_argument('--readings', type=int, default=20_000, help="Readings per machine over 10 days")
+    parser.add_argument('--repeat', type=int, default=10, help="Passes over the machines per plan")
+    parser.add_argument('--keep', action='store_true', help="Keep the scratch database")
+    args = parser.parse_args(argv)
+    
+    # Listeners apply to clients created after registration
+    counter = CommandCounter()
+    monitoring.register(counter)
+    model = CNCDataModel(MongoClient(args.mongo_uri), args.database)
+    service = DigitalTwinService(model, twin_state_ttl=0)
+    cached_service = DigitalTwinService(model)
+    
+    try:
+        model.collection.drop()
+        started = time.perf_counter()
+        seed(model.collection, args.machines, args.readings)
+        model.ensure_indexes()
+        print(f"{args.machines} machines x {args.readings:,} readings seeded in {time.perf_counter() - started:.1f}s\n")
+        
+        machine_ids = [f"CNC-{machine:03d}" for machine in range(args.machines)]
+        results = pd.DataFrame([
+            measure('before', lambda machine_id: legacy_twin_state(model, machine_id), machine_ids, args.repeat, counter),
+            measure('after', service.get_twin_state, machine_ids, args.repeat, counter),
+            measure('cached', cached_service.get_twin_state, machine_ids, args.repeat, counter)
+        ])
+        print(results.to_string(index=False, float_format=lambda value: f"{value:,.2f}"))
+        print(f"\nSpeed-up (mean): {results['mean_ms'].iloc[0] / results['mean_ms'].iloc[1]:.1f}x")
+    finally:
+        if not args.keep:
+            model.client.drop_database(args.database)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
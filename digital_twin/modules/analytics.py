@@ -1,137 +1,427 @@
-import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-
-class EnergyAnalytics:
-    def __init__(self, data):
-        self.data = data
-    
-    def show_consumption_patterns(self):
-        st.subheader("Consumption Patterns Analysis")
-        
-        # Time period selection
-        col1, col2 = st.columns(2)
-        with col1:
-            start_date = st.date_input("Start Date", self.data['timestamp'].min().date())
-        with col2:
-            end_date = st.date_input("End Date", self.data['timestamp'].max().date())
-        
-        # Filter data
-        mask = (self.data['timestamp'].dt.date >= start_date) & (self.data['timestamp'].dt.date <= end_date)
-        filtered_df = self.data.loc[mask]
-        
-        # Weekly pattern
-        st.subheader("Weekly Consumption Pattern")
-        weekly_pattern = filtered_df.groupby(filtered_df['timestamp'].dt.day_name())['consumption_kwh'].mean().reindex([
-            'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'
-        ])
-        
-        fig = px.bar(x=weekly_pattern.index, y=weekly_pattern.values,
-                    title="Average Consumption by Day of Week",
-                    labels={'x': 'Day', 'y': 'Avg Consumption (kWh)'})
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Monthly trend
-        st.subheader("Monthly Trend")
-        monthly_trend = filtered_df.groupby(filtered_df['timestamp'].dt.to_period('M'))['consumption_kwh'].sum()
-        
-        fig = px.line(x=monthly_trend.index.astype(str), y=monthly_trend.values,
-                     title="Monthly Consumption Trend",
-                     labels={'x': 'Month', 'y': 'Total Consumption (kWh)'})
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Heatmap
-        st.subheader("Consumption Heatmap")
-        pivot_data = filtered_df.pivot_table(
-            values='consumption_kwh',
-            index=filtered_df['timestamp'].dt.hour,
-            columns=filtered_df['timestamp'].dt.day_name(),
-            aggfunc='mean'
-        )
-        
-        fig = px.imshow(pivot_data, 
-                       title="Hourly Consumption Heatmap by Day of Week",
-                       labels={'x': 'Day of Week', 'y': 'Hour of Day', 'color': 'Avg Consumption (kWh)'})
-        st.plotly_chart(fig, use_container_width=True)
-    
-    def show_cost_analysis(self):
-        st.subheader("Cost Analysis")
-        
-        # Cost breakdown
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.metric("Total Cost", f"${self.data['cost'].sum():,.2f}")
-            st.metric("Average Daily Cost", f"${self.data.groupby(self.data['timestamp'].dt.date)['cost'].sum().mean():.2f}")
-        
-        with col2:
-            st.metric("Highest Daily Cost", f"${self.data.groupby(self.data['timestamp'].dt.date)['cost'].sum().max():.2f}")
-            st.metric("Cost per kWh (Avg)", f"${self.data['rate_per_kwh'].mean():.4f}")
-        
-        # Cost trend
-        daily_cost = self.data.groupby(self.data['timestamp'].dt.date)['cost'].sum().reset_index()
-        daily_cost.columns = ['date', 'cost']
-        
-        fig = px.line(daily_cost, x='date', y='cost',
-                     title="Daily Cost Trend",
-                     labels={'cost': 'Cost ($)', 'date': 'Date'})
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Cost by category
-        category_cost = self.data.groupby('category')['cost'].sum().reset_index()
-        fig = px.pie(category_cost, values='cost', names='category',
-                    title="Cost Distribution by Category")
-        st.plotly_chart(fig, use_container_width=True)
-    
-    def show_efficiency_metrics(self):
-        st.subheader("Efficiency Metrics")
-        
-        # Calculate efficiency metrics
-        daily_stats = self.data.groupby(self.data['timestamp'].dt.date).agg({
-            'consumption_kwh': ['sum', 'mean', 'std'],
-            'cost': 'sum'
-        }).round(2)
-        
-        daily_stats.columns = ['Total_Consumption', 'Avg_Consumption', 'Std_Consumption', 'Total_Cost']
-        daily_stats['Efficiency_Score'] = (daily_stats['Avg_Consumption'] / daily_stats['Std_Consumption']).fillna(0)
-        
-        st.dataframe(daily_stats)
-        
-        # Efficiency trend
-        fig = px.line(x=daily_stats.index, y=daily_stats['Efficiency_Score'],
-                     title="Daily Efficiency Score Trend",
-                     labels={'x': 'Date', 'y': 'Efficiency Score'})
-        st.plotly_chart(fig, use_container_width=True)
-    
-    def show_peak_usage_analysis(self):
-        st.subheader("Peak Usage Analysis")
-        
-        # Find peak hours
-        hourly_avg = self.data.groupby(self.data['timestamp'].dt.hour)['consumption_kwh'].mean()
-        peak_hour = hourly_avg.idxmax()
-        peak_consumption = hourly_avg.max()
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("Peak Hour", f"{peak_hour}:00")
-        with col2:
-            st.metric("Peak Consumption", f"{peak_consumption:.2f} kWh")
-        
-        # Peak usage by day
-        daily_peak = self.data.groupby(self.data['timestamp'].dt.date)['consumption_kwh'].max().reset_index()
-        daily_peak.columns = ['date', 'peak_consumption']
-        
-        fig = px.bar(daily_peak, x='date', y='peak_consumption',
-                    title="Daily Peak Consumption",
-                    labels={'peak_consumption': 'Peak Consumption (kWh)', 'date': 'Date'})
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Peak usage by category
-        category_peak = self.data.groupby('category')['consumption_kwh'].max().reset_index()
-        fig = px.bar(category_peak, x='category', y='consumption_kwh',
-                    title="Peak Consumption by Category",
-                    labels={'consumption_kwh': 'Peak Consumption (kWh)'})
-        st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+import time
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from modules.tariffs import show_tariff_inputs
+from modules.peak_demand import PeakDemandEngine
+from modules.anomalies import get_detector
+from modules.running_stats import get_partitioned_stats
+from modules.sketches import get_load_sketches
+from modules.site_comparison import get_site_comparison, METRICS
+from modules.profiling import timed
+from modules.datasets import set_dataset
+
+class EnergyAnalytics:
+    def __init__(self, data):
+        self.data = data
+    
+    def show_consumption_patterns(self):
+        st.subheader("Consumption Patterns Analysis")
+        
+        # Time period selection
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("Start Date", self.data['timestamp'].min().date())
+        with col2:
+            end_date = st.date_input("End Date", self.data['timestamp'].max().date())
+        
+        # Filter data
+        with timed("Date filter"):
+            mask = (self.data['timestamp'].dt.date >= start_date) & (self.data['timestamp'].dt.date <= end_date)
+            filtered_df = self.data.loc[mask]
+        
+        # Weekly pattern
+        st.subheader("Weekly Consumption Pattern")
+        with timed("Weekly pattern"):
+            weekly_pattern = filtered_df.groupby(filtered_df['timestamp'].dt.day_name())['consumption_kwh'].mean().reindex([
+                'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'
+            ])
+        
+        fig = px.bar(x=weekly_pattern.index, y=weekly_pattern.values,
+                    title="Average Consumption by Day of Week",
+                    labels={'x': 'Day', 'y': 'Avg Consumption (kWh)'})
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Monthly trend
+        st.subheader("Monthly Trend")
+        with timed("Monthly trend"):
+            monthly_trend = filtered_df.groupby(filtered_df['timestamp'].dt.to_period('M'))['consumption_kwh'].sum()
+        
+        fig = px.line(x=monthly_trend.index.astype(str), y=monthly_trend.values,
+                     title="Monthly Consumption Trend",
+                     labels={'x': 'Month', 'y': 'Total Consumption (kWh)'})
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Heatmap
+        st.subheader("Consumption Heatmap")
+        with timed("Hour x weekday pivot"):
+            pivot_data = filtered_df.pivot_table(
+                values='consumption_kwh',
+                index=filtered_df['timestamp'].dt.hour,
+                columns=filtered_df['timestamp'].dt.day_name(),
+                aggfunc='mean'
+            )
+        
+        fig = px.imshow(pivot_data, 
+                       title="Hourly Consumption Heatmap by Day of Week",
+                       labels={'x': 'Day of Week', 'y': 'Hour of Day', 'color': 'Avg Consumption (kWh)'})
+        st.plotly_chart(fig, use_container_width=True)
+    
+    def show_cost_analysis(self):
+        st.subheader("Cost Analysis")
+        
+        # Cost breakdown
+        with timed("Daily cost"):
+            daily_cost = self.data.groupby(self.data['timestamp'].dt.date)['cost'].sum()
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.metric("Total Cost", f"${self.data['cost'].sum():,.2f}")
+            st.metric("Average Daily Cost", f"${daily_cost.mean():.2f}")
+        
+        with col2:
+            st.metric("Highest Daily Cost", f"${daily_cost.max():.2f}")
+            st.metric("Cost per kWh (Avg)", f"${self.data['rate_per_kwh'].mean():.4f}")
+        
+        # Cost trend
+        daily_cost = daily_cost.reset_index()
+        daily_cost.columns = ['date', 'cost']
+        
+        fig = px.line(daily_cost, x='date', y='cost',
+                     title="Daily Cost Trend",
+                     labels={'cost': 'Cost ($)', 'date': 'Date'})
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Cost by category
+        with timed("Cost by category"):
+            category_cost = self.data.groupby('category')['cost'].sum().reset_index()
+        fig = px.pie(category_cost, values='cost', names='category',
+                    title="Cost Distribution by Category")
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Re-cost the history with a TOU/tiered tariff
+        st.subheader("Tariff Re-costing")
+        tariff = show_tariff_inputs("recost")
+        per_location = st.checkbox("Bill each location separately", value=False)
+        by = 'location' if per_location and 'location' in self.data.columns else None
+        
+        with timed("Tariff monthly bill"):
+            bill = tariff.monthly_bill(self.data, by=by)
+        with timed("Recorded monthly cost"):
+            recorded_cost = self.data.groupby(self.data['timestamp'].dt.to_period('M'))['cost'].sum()
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Recorded Cost", f"${recorded_cost.sum():,.2f}")
+        with col2:
+            st.metric("Tariff Energy Cost", f"${bill['energy_cost'].sum():,.2f}")
+        with col3:
+            st.metric("Tariff Total (incl. demand)", f"${bill['total_cost'].sum():,.2f}",
+                      delta=f"{bill['total_cost'].sum() - recorded_cost.sum():+,.2f}", delta_color="inverse")
+        
+        bill_display = bill.copy()
+        bill_display['month'] = bill_display['month'].astype(str)
+        st.dataframe(bill_display.round(2))
+        
+        if st.button("Apply Tariff to Dataset"):
+            set_dataset(tariff.recost(self.data, by=by))
+            st.success("Dataset costs recalculated with the selected tariff!")
+    
+    def show_efficiency_metrics(self):
+        st.subheader("Efficiency Metrics")
+        
+        # Per-day, per-location states are computed once; any selection is a merge of them
+        with timed("Partition states"):
+            stats = get_partitioned_stats(self.data)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            date_range = st.date_input("Date Range", (stats.days.min().date(), stats.days.max().date()),
+                                       key="efficiency_range")
+        with col2:
+            partitions = st.multiselect("Locations", list(stats.partitions), default=list(stats.partitions),
+                                        key="efficiency_locations")
+        start, end = (date_range[0], date_range[-1]) if date_range else (None, None)
+        
+        with timed("Merge selected states"):
+            consumption, cost = stats.daily(start, end, partitions)
+        present = consumption.count > 0
+        
+        # Calculate efficiency metrics
+        daily_stats = pd.DataFrame({
+            'Total_Consumption': consumption.sum,
+            'Avg_Consumption': consumption.mean,
+            'Std_Consumption': consumption.std(),
+            'Total_Cost': cost.sum
+        }, index=pd.Index(stats.days.date, name='timestamp'))[present].round(2)
+        daily_stats['Efficiency_Score'] = (daily_stats['Avg_Consumption'] / daily_stats['Std_Consumption']).fillna(0)
+        
+        overall = consumption.total()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Readings", f"{overall.count[0]:,}")
+        with col2:
+            st.metric("Avg Consumption", f"{overall.mean[0]:.2f} kWh" if overall.count[0] else "-")
+        with col3:
+            score = overall.mean[0] / overall.std()[0] if overall.count[0] > 1 and overall.std()[0] > 0 else 0
+            st.metric("Efficiency Score (Selection)", f"{score:.2f}")
+        
+        st.dataframe(daily_stats)
+        
+        # Efficiency trend
+        fig = px.line(x=daily_stats.index, y=daily_stats['Efficiency_Score'],
+                     title="Daily Efficiency Score Trend",
+                     labels={'x': 'Date', 'y': 'Efficiency Score'})
+        st.plotly_chart(fig, use_container_width=True)
+    
+    def show_peak_usage_analysis(self):
+        st.subheader("Peak Usage Analysis")
+        
+        # Find peak hours
+        with timed("Hourly average"):
+            hourly_avg = self.data.groupby(self.data['timestamp'].dt.hour)['consumption_kwh'].mean()
+        peak_hour = hourly_avg.idxmax()
+        peak_consumption = hourly_avg.max()
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Peak Hour", f"{peak_hour}:00")
+        with col2:
+            st.metric("Peak Consumption", f"{peak_consumption:.2f} kWh")
+        
+        # Peak usage by day
+        with timed("Daily peak"):
+            daily_peak = self.data.groupby(self.data['timestamp'].dt.date)['consumption_kwh'].max().reset_index()
+        daily_peak.columns = ['date', 'peak_consumption']
+        
+        fig = px.bar(daily_peak, x='date', y='peak_consumption',
+                    title="Daily Peak Consumption",
+                    labels={'peak_consumption': 'Peak Consumption (kWh)', 'date': 'Date'})
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Peak usage by category
+        with timed("Peak by category"):
+            category_peak = self.data.groupby('category')['consumption_kwh'].max().reset_index()
+        fig = px.bar(category_peak, x='category', y='consumption_kwh',
+                    title="Peak Consumption by Category",
+                    labels={'consumption_kwh': 'Peak Consumption (kWh)'})
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Rolling-window demand peaks, as used for demand charges
+        st.subheader("Rolling Demand Peaks")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            window = st.selectbox("Demand Window (minutes)", [15, 30, 60], key="peak_window")
+        with col2:
+            top_k = st.number_input("Peaks per Period", min_value=1, max_value=10, value=3, key="peak_k")
+        with col3:
+            period = st.selectbox("Billing Period", ["Month", "Week", "Day"], key="peak_period")
+        
+        with timed("Rolling demand peaks"):
+            engine = PeakDemandEngine(self.data)
+            peaks = engine.top_peaks(window, int(top_k), {'Month': 'M', 'Week': 'W', 'Day': 'D'}[period])
+        if engine.effective_window(window) > window * 60:
+            st.info(f"Readings are {engine.interval_seconds // 60} minutes apart; "
+                    f"a {window}-minute window covers a single reading.")
+        
+        st.dataframe(peaks.round(2), use_container_width=True)
+        
+        fig = px.bar(peaks[peaks['rank'] == 1], x='period', y='demand_kw', color='site', barmode='group',
+                    title=f"Highest {window}-Minute Demand by {period}",
+                    labels={'demand_kw': 'Peak Demand (kW)', 'period': period})
+        st.plotly_chart(fig, use_container_width=True)
+        
+        site = st.selectbox("Site", list(engine.sites), key="peak_site")
+        with timed("Rolling demand"):
+            demand = engine.rolling_demand(window)
+        site_demand = demand[demand['site'] == site]
+        site_peaks = peaks[peaks['site'] == site]
+        
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=site_demand['window_end'], y=site_demand['demand_kw'],
+                                 mode='lines', name=f'{window}-min Demand'))
+        fig.add_trace(go.Scatter(x=site_peaks['window_end'], y=site_peaks['demand_kw'],
+                                 mode='markers', name='Top Peaks', marker=dict(size=10, color='red')))
+        fig.update_layout(title=f"Rolling {window}-Minute Demand - {site}",
+                          xaxis_title="Time", yaxis_title="Demand (kW)")
+        st.plotly_chart(fig, use_container_width=True)
+    
+    def show_anomaly_detection(self):
+        st.subheader("Anomaly Detection")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            method = st.selectbox("Baseline", ["Either", "Both", "Rolling", "Seasonal"],
+                                  help="Rolling: median/MAD of the previous readings of the same device and location. "
+                                       "Seasonal: median/MAD for the same hour of week.")
+        with col2:
+            window = st.selectbox("Rolling Window (readings)", [12, 24, 48, 168], index=1)
+        with col3:
+            threshold = st.slider("Score Threshold", min_value=2.0, max_value=10.0, value=3.5, step=0.5)
+        
+        # Fitted once per dataset and window; changing method or threshold only re-filters
+        with st.spinner("Fitting baselines..."), timed("Anomaly baselines", 'fit'):
+            detector = get_detector(self.data, window)
+        with timed("Anomaly scoring"):
+            anomalies = detector.anomalies(method.lower(), threshold)
+            series_counts = detector.counts(method.lower(), threshold)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Anomalies", f"{len(anomalies):,}")
+        with col2:
+            st.metric("Share of Readings", f"{len(anomalies) / max(len(detector.kwh), 1) * 100:.2f}%")
+        with col3:
+            st.metric("Series Affected", f"{(series_counts > 0).sum()} of {len(series_counts)}")
+        
+        if anomalies.empty:
+            st.info("No readings exceed the selected threshold.")
+            return
+        
+        if 'location' in anomalies.columns:
+            by_location = anomalies.groupby('location').size().reset_index(name='anomalies')
+            fig = px.bar(by_location, x='location', y='anomalies',
+                        title="Anomalies by Location",
+                        labels={'anomalies': 'Anomalous Readings', 'location': 'Location'})
+            st.plotly_chart(fig, use_container_width=True)
+        
+        st.dataframe(anomalies.head(500).round(3), use_container_width=True)
+        
+        # Drill into one series, defaulting to the one with the most anomalies
+        labels = [' / '.join(map(str, label)) if isinstance(label, tuple) else str(label) for label in detector.series]
+        label_counts = dict(zip(labels, series_counts))
+        label = st.selectbox("Series", labels, index=int(series_counts.argmax()),
+                             format_func=lambda label: f"{label} ({label_counts[label]} anomalies)")
+        code = labels.index(label)
+        
+        series = detector.series_frame(code, method.lower(), threshold)
+        flagged = series[series['anomaly']]
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=series['timestamp'], y=series['consumption_kwh'], mode='lines', name='Consumption'))
+        fig.add_trace(go.Scatter(x=series['timestamp'], y=series['rolling_expected'], mode='lines',
+                                 name='Rolling Median', line=dict(dash='dash')))
+        fig.add_trace(go.Scatter(x=series['timestamp'], y=series['seasonal_expected'], mode='lines',
+                                 name='Seasonal Median', line=dict(dash='dot')))
+        fig.add_trace(go.Scatter(x=flagged['timestamp'], y=flagged['consumption_kwh'], mode='markers',
+                                 name='Anomalies', marker=dict(size=9, color='red')))
+        fig.update_layout(title=f"Consumption vs Baselines - {labels[code]}",
+                          xaxis_title="Time", yaxis_title="Consumption (kWh)")
+        st.plotly_chart(fig, use_container_width=True)
+    
+    def show_load_duration(self):
+        st.subheader("Load Duration & Percentiles")
+        
+        with st.spinner("Building demand sketches..."), timed("Demand sketches"):
+            sketches = get_load_sketches(self.data)
+        
+        months = [str(month) for month in sketches.months.sort_values()]
+        col1, col2 = st.columns(2)
+        with col1:
+            sites = st.multiselect("Sites", list(sketches.sites), default=list(sketches.sites[:10]),
+                                   key="duration_sites")
+            category = st.selectbox("Load", ["Whole Site"] + list(sketches.categories), key="duration_category")
+        with col2:
+            if len(months) > 1:
+                month_range = st.select_slider("Months", options=months, value=(months[0], months[-1]),
+                                               key="duration_months")
+                selected_months = months[months.index(month_range[0]):months.index(month_range[1]) + 1]
+            else:
+                selected_months = months
+            percentiles = st.multiselect("Percentiles", [50, 75, 90, 95, 99, 99.9], default=[50, 95, 99],
+                                         key="duration_percentiles")
+        
+        categories = None if category == "Whole Site" else [category]
+        months_index = pd.PeriodIndex(selected_months, freq='M')
+        
+        # Both answers come from merging the sketches, not from the readings
+        started = time.perf_counter()
+        with timed("Sketch percentiles"):
+            table = sketches.percentiles(sorted(percentiles) or [50], sites, categories, months_index)
+            curves = sketches.load_duration(sites, categories, months_index)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        if table.empty:
+            st.info("No readings for the selected sites, load and months.")
+            return
+        
+        fig = px.line(curves, x='percent_of_time', y='demand_kw', color='site',
+                     title="Load-Duration Curve",
+                     labels={'percent_of_time': 'Time Load Is Exceeded (%)', 'demand_kw': 'Demand (kW)'})
+        st.plotly_chart(fig, use_container_width=True)
+        
+        st.dataframe(table.round(2), use_container_width=True)
+        st.caption(f"Answered from quantile sketches in {elapsed_ms:.1f} ms "
+                   f"(values within {sketches.relative_accuracy:.0%} of exact percentiles).")
+    
+    def show_site_comparison(self):
+        st.subheader("Site Comparison")
+        
+        with timed("Site arrays"):
+            comparison = get_site_comparison(self.data)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            mode = st.selectbox("Execution", ["Auto", "Serial", "Threads", "Processes"], key="comparison_mode")
+        with col2:
+            st.write("")
+            recompute = st.button("Recompute Profiles")
+        if recompute or comparison.last_run is None:
+            with st.spinner(f"Profiling {len(comparison.sites):,} sites..."), timed("Site profiles"):
+                comparison.compute({'Threads': 'thread', 'Processes': 'process'}.get(mode, mode.lower()))
+        st.caption(f"Profiled {len(comparison.sites):,} sites in {comparison.last_run[1]:.2f}s "
+                   f"({comparison.last_run[0]} execution)")
+        
+        # Ranking
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            label = st.selectbox("Rank By", list(METRICS.values()), key="comparison_metric")
+            metric = {name: metric_label for metric_label, name in METRICS.items()}[label]
+        with col2:
+            ascending = st.checkbox("Lowest First", value=metric == 'cost_per_kwh', key="comparison_ascending")
+        with col3:
+            top_n = st.number_input("Sites Shown", min_value=5, max_value=100, value=20, key="comparison_top_n")
+        
+        with timed("Site ranking"):
+            ranked = comparison.rank(metric, ascending)
+        fig = px.bar(ranked.head(int(top_n)).reset_index(), x='site', y=metric,
+                    title=f"Sites Ranked by {METRICS[metric]}",
+                    labels={metric: METRICS[metric], 'site': 'Site'})
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(ranked.round(3), use_container_width=True)
+        
+        # Clustering by daily load shape
+        st.subheader("Site Clusters by Load Profile")
+        n_clusters = st.slider("Number of Clusters", min_value=2, max_value=10, value=4, key="comparison_clusters")
+        with timed("Site clustering", 'fit'):
+            labels, centroids = comparison.cluster(n_clusters)
+        if centroids.empty:
+            st.warning("No site has any consumption to build a load profile from, so sites cannot be clustered.")
+            return
+        metrics = comparison.profiles[0].join(labels)
+        metrics['cluster'] = metrics['cluster'].astype(str)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            profile_data = centroids.reset_index().melt(id_vars='index', var_name='hour', value_name='share')
+            profile_data['cluster'] = profile_data['index'].astype(str)
+            fig = px.line(profile_data, x='hour', y='share', color='cluster',
+                         title="Cluster Daily Load Shapes",
+                         labels={'share': 'Share of Daily Consumption', 'hour': 'Hour of Day'})
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            fig = px.scatter(metrics.reset_index(), x='cost_per_kwh', y='peak_ratio', color='cluster',
+                            size='total_kwh', hover_name='site',
+                            title="Cost per kWh vs Peak Ratio",
+                            labels={'cost_per_kwh': 'Cost per kWh ($)', 'peak_ratio': 'Peak-to-Average Ratio'})
+            st.plotly_chart(fig, use_container_width=True)
+        
+        st.dataframe(metrics.groupby('cluster').agg(
+            sites=('total_kwh', 'size'),
+            total_kwh=('total_kwh', 'sum'),
+            cost_per_kwh=('cost_per_kwh', 'mean'),
+            peak_ratio=('peak_ratio', 'mean')
+        ).round(3))
\ No newline at end of file
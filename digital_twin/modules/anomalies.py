@@ -0,0 +1,268 @@
+import copy
+import pandas as pd
+import numpy as np
+from modules.frame_cache import frame_cache
+
+SLOTS_PER_WEEK = 7 * 24
+MAD_TO_SIGMA = 0.6745
+MIN_MAD_FRACTION = 0.05
+
+# Fitted detectors per dataset and window
+_DETECTORS = frame_cache('anomaly_detectors')
+
+def _group_median(keys, values, n_keys):
+    """Median of values per integer key (NaN for keys without values)"""
+    median = np.full(n_keys, np.nan)
+    grouped = pd.Series(values).groupby(keys, sort=False).median()
+    median[grouped.index.to_numpy()] = grouped.to_numpy()
+    return median
+
+def _trailing_median(values, run_ids, window, min_periods):
+    """Median of the previous `window` values within each run, excluding the current one.
+    
+    Rows must be grouped by run. Every run is preceded by `window` NaNs in one padded
+    array, so a single rolling pass never mixes readings from two runs.
+    """
+    positions = np.arange(len(values)) + run_ids * window
+    padded = np.full(len(values) + (run_ids[-1] + 1) * window if len(values) else 0, np.nan)
+    padded[positions] = values
+    rolled = pd.Series(padded).rolling(window, min_periods=min_periods).median().to_numpy()
+    return rolled[positions - 1]
+
+def _robust_score(values, expected, mad):
+    """Robust z-score; MAD is floored so flat series don't flag every small wobble"""
+    scale = np.maximum(mad, MIN_MAD_FRACTION * np.abs(expected)) + 1e-9
+    return MAD_TO_SIGMA * (values - expected) / scale
+
+class AnomalyDetector:
+    """Robust consumption anomaly scores for every device/location series.
+    
+    Two baselines are kept per series: a trailing median/MAD over the previous
+    `window` readings and a seasonal median/MAD per hour-of-week slot. Both are
+    fitted vectorized over the full history; `update` scores new rows and folds
+    them into the baselines without rescanning the history.
+    """
+    
+    def __init__(self, data, window=24, group_columns=('device', 'location'), seasonal_rate=0.05):
+        self.window = window
+        self.min_periods = max(3, window // 2)
+        self.seasonal_rate = seasonal_rate
+        self.group_columns = [column for column in group_columns if column in data.columns]
+        self.series = pd.MultiIndex.from_arrays([[] for _ in self.group_columns] or [[]],
+                                                names=self.group_columns or ['series'])
+        
+        codes = self._series_codes(data)
+        timestamps = pd.DatetimeIndex(data['timestamp']).asi8
+        kwh = data['consumption_kwh'].to_numpy(dtype=float)
+        # Histories usually arrive in time order, where a stable sort by series is enough
+        if (np.diff(timestamps) >= 0).all():
+            order = np.argsort(codes, kind='stable')
+        else:
+            order = np.lexsort((timestamps, codes))
+        codes, timestamps, kwh = codes[order], timestamps[order], kwh[order]
+        slots = self._slots(timestamps)
+        
+        # Seasonal baseline: median and MAD per (series, hour of week)
+        keys = codes * SLOTS_PER_WEEK + slots
+        n_keys = len(self.series) * SLOTS_PER_WEEK
+        self.seasonal_median = _group_median(keys, kwh, n_keys)
+        self.seasonal_mad = _group_median(keys, np.abs(kwh - self.seasonal_median[keys]), n_keys)
+        
+        rolling_expected, rolling_mad, deviation = self._rolling(codes, kwh, np.full(len(kwh), np.nan))
+        self._keep_tail(codes, timestamps, kwh, deviation)
+        
+        self.codes = codes
+        self.timestamps = timestamps
+        self.kwh = kwh
+        self.rolling_expected = rolling_expected
+        self.rolling_score = _robust_score(kwh, rolling_expected, rolling_mad)
+        self.seasonal_expected = self.seasonal_median[keys]
+        self.seasonal_score = _robust_score(kwh, self.seasonal_expected, self.seasonal_mad[keys])
+    
+    def _series_codes(self, frame):
+        """Integer series code per row, registering series not seen before"""
+        if not self.group_columns:
+            labels = pd.MultiIndex.from_arrays([[0]], names=['series'])
+            row_labels = np.zeros(len(frame), dtype=np.int64)
+        else:
+            # Factorize column by column, then look up only the distinct combinations
+            row_labels = np.zeros(len(frame), dtype=np.int64)
+            uniques = []
+            for column in self.group_columns:
+                column_codes, column_uniques = pd.factorize(frame[column].astype(object).fillna('Unknown'))
+                row_labels = row_labels * len(column_uniques) + column_codes
+                uniques.append(column_uniques)
+            row_labels, combinations = pd.factorize(row_labels)
+            levels = []
+            for column_uniques in reversed(uniques):
+                levels.append(column_uniques[combinations % len(column_uniques)])
+                combinations = combinations // len(column_uniques)
+            labels = pd.MultiIndex.from_arrays(levels[::-1], names=self.group_columns)
+        
+        codes = self.series.get_indexer(labels)
+        unseen = codes < 0
+        if unseen.any():
+            self.series = self.series.append(labels[unseen])
+            codes[unseen] = self.series.get_indexer(labels[unseen])
+        return codes[row_labels]
+    
+    @staticmethod
+    def _slots(timestamps):
+        """Hour-of-week slot (Monday 00:00 = 0) from int64 nanosecond timestamps"""
+        hours = timestamps // (3600 * 10**9)
+        # 1970-01-01 was a Thursday, three days after the start of a Monday-based week
+        return ((hours + 3 * 24) % SLOTS_PER_WEEK).astype(np.int64)
+    
+    def _rolling(self, codes, kwh, known_deviation):
+        """Trailing median/MAD per row; rows must be sorted by series then time.
+        
+        `known_deviation` carries the deviations of rows already scored (carried-over
+        tail rows); NaN entries are computed from their trailing median.
+        """
+        run_ids = np.cumsum(np.r_[True, codes[1:] != codes[:-1]]) - 1 if len(codes) else codes
+        expected = _trailing_median(kwh, run_ids, self.window, self.min_periods)
+        deviation = np.where(np.isnan(known_deviation), np.abs(kwh - expected), known_deviation)
+        mad = _trailing_median(deviation, run_ids, self.window, self.min_periods)
+        return expected, mad, deviation
+    
+    def _keep_tail(self, codes, timestamps, kwh, deviation):
+        """Remember the last `window` readings of each series for the next update"""
+        run_end = np.r_[codes[1:] != codes[:-1], True] if len(codes) else np.zeros(0, dtype=bool)
+        ends = np.flatnonzero(run_end)
+        # Position counted back from the end of each series' run
+        from_end = np.repeat(ends, np.diff(np.r_[-1, ends])) - np.arange(len(codes))
+        keep = from_end < self.window
+        self._tail = {
+            'codes': codes[keep],
+            'timestamps': timestamps[keep],
+            'kwh': kwh[keep],
+            'deviation': deviation[keep]
+        }
+    
+    def update(self, new_rows):
+        """Score newly arrived rows and fold them into both baselines.
+        
+        Rolling baselines continue from the stored tail of each series, so results
+        match a full refit for rows that arrive in time order. Seasonal medians are
+        nudged toward new readings (a streaming median estimate) instead of refitted.
+        """
+        if new_rows.empty:
+            return
+        
+        codes = self._series_codes(new_rows)
+        timestamps = pd.DatetimeIndex(new_rows['timestamp']).asi8
+        kwh = new_rows['consumption_kwh'].to_numpy(dtype=float)
+        
+        # Rolling: run the new rows together with the carried-over tails of their series
+        tail = self._tail
+        carried = np.isin(tail['codes'], codes)
+        all_codes = np.r_[tail['codes'][carried], codes]
+        all_timestamps = np.r_[tail['timestamps'][carried], timestamps]
+        all_kwh = np.r_[tail['kwh'][carried], kwh]
+        known = np.r_[tail['deviation'][carried], np.full(len(kwh), np.nan)]
+        is_new = np.r_[np.zeros(carried.sum(), dtype=bool), np.ones(len(kwh), dtype=bool)]
+        
+        order = np.lexsort((~is_new, all_timestamps, all_codes))
+        all_codes, all_timestamps, all_kwh = all_codes[order], all_timestamps[order], all_kwh[order]
+        known, is_new = known[order], is_new[order]
+        expected, mad, deviation = self._rolling(all_codes, all_kwh, known)
+        
+        # Series without new rows keep their tails unchanged
+        kept = ~carried
+        order = np.lexsort((np.r_[tail['timestamps'][kept], all_timestamps], np.r_[tail['codes'][kept], all_codes]))
+        self._keep_tail(np.r_[tail['codes'][kept], all_codes][order],
+                        np.r_[tail['timestamps'][kept], all_timestamps][order],
+                        np.r_[tail['kwh'][kept], all_kwh][order],
+                        np.r_[tail['deviation'][kept], deviation][order])
+        
+        codes, timestamps, kwh = all_codes[is_new], all_timestamps[is_new], all_kwh[is_new]
+        rolling_expected, rolling_mad = expected[is_new], mad[is_new]
+        
+        # Seasonal: new series/slots start from the median of their first readings
+        n_keys = len(self.series) * SLOTS_PER_WEEK
+        grow = n_keys - len(self.seasonal_median)
+        self.seasonal_median = np.r_[self.seasonal_median, np.full(grow, np.nan)]
+        self.seasonal_mad = np.r_[self.seasonal_mad, np.full(grow, np.nan)]
+        keys = codes * SLOTS_PER_WEEK + self._slots(timestamps)
+        unseeded = np.isnan(self.seasonal_median)
+        seed = _group_median(keys, kwh, n_keys)
+        self.seasonal_median[unseeded] = seed[unseeded]
+        seed_mad = _group_median(keys, np.abs(kwh - self.seasonal_median[keys]), n_keys)
+        self.seasonal_mad[unseeded] = seed_mad[unseeded]
+        
+        seasonal_expected = self.seasonal_median[keys]
+        seasonal_score = _robust_score(kwh, seasonal_expected, self.seasonal_mad[keys])
+        
+        # Streaming median/MAD: step each slot toward its new readings by a fraction of its spread
+        spread = np.maximum(self.seasonal_mad[keys], MIN_MAD_FRACTION * np.abs(seasonal_expected))
+        deviation = np.abs(kwh - seasonal_expected)
+        np.add.at(self.seasonal_median, keys, self.seasonal_rate * spread * np.sign(kwh - seasonal_expected))
+        np.add.at(self.seasonal_mad, keys, self.seasonal_rate * spread * np.sign(deviation - self.seasonal_mad[keys]))
+        
+        self.codes = np.r_[self.codes, codes]
+        self.timestamps = np.r_[self.timestamps, timestamps]
+        self.kwh = np.r_[self.kwh, kwh]
+        self.rolling_expected = np.r_[self.rolling_expected, rolling_expected]
+        self.rolling_score = np.r_[self.rolling_score, _robust_score(kwh, rolling_expected, rolling_mad)]
+        self.seasonal_expected = np.r_[self.seasonal_expected, seasonal_expected]
+        self.seasonal_score = np.r_[self.seasonal_score, seasonal_score]
+    
+    def flags(self, method='either', threshold=3.5):
+        """Boolean anomaly mask over all scored rows"""
+        rolling = np.abs(self.rolling_score) > threshold
+        seasonal = np.abs(self.seasonal_score) > threshold
+        if method == 'rolling':
+            return rolling
+        if method == 'seasonal':
+            return seasonal
+        if method == 'both':
+            return rolling & seasonal
+        return rolling | seasonal
+    
+    def anomalies(self, method='either', threshold=3.5, limit=None):
+        """Flagged readings with their expected value and score, strongest first"""
+        rows = np.flatnonzero(self.flags(method, threshold))
+        score = np.where(np.abs(self.rolling_score[rows]) >= np.abs(self.seasonal_score[rows]),
+                         self.rolling_score[rows], self.seasonal_score[rows])
+        if method in ('rolling', 'seasonal'):
+            score = getattr(self, f'{method}_score')[rows]
+        
+        order = np.argsort(-np.abs(score), kind='stable')[:limit]
+        rows, score = rows[order], score[order]
+        return self._frame(rows).assign(score=score)
+    
+    def counts(self, method='either', threshold=3.5):
+        """Number of flagged readings per series code"""
+        return np.bincount(self.codes[self.flags(method, threshold)], minlength=len(self.series))
+    
+    def series_frame(self, code, method='either', threshold=3.5):
+        """Scored readings of one series in time order, for charting"""
+        rows = np.flatnonzero(self.codes == code)
+        frame = self._frame(rows)
+        frame['anomaly'] = self.flags(method, threshold)[rows]
+        return frame.sort_values('timestamp')
+    
+    def _frame(self, rows):
+        labels = self.series[self.codes[rows]]
+        frame = pd.DataFrame({'timestamp': pd.to_datetime(self.timestamps[rows])})
+        if self.group_columns:
+            for level, column in enumerate(self.group_columns):
+                frame[column] = labels.get_level_values(level)
+        frame['consumption_kwh'] = self.kwh[rows]
+        frame['rolling_expected'] = self.rolling_expected[rows]
+        frame['rolling_score'] = self.rolling_score[rows]
+        frame['seasonal_expected'] = self.seasonal_expected[rows]
+        frame['seasonal_score'] = self.seasonal_score[rows]
+        return frame
+
+def get_detector(data, window=24):
+    """Detector fitted on a dataset, reused for as long as that dataset object lives"""
+    return _DETECTORS.get(data, lambda: AnomalyDetector(data, window=window), window)
+
+def carry_forward(old_data, new_data, new_rows):
+    """Reuse detectors fitted on `old_data` for `new_data` = old_data + new_rows"""
+    def extend(detector):
+        detector = copy.deepcopy(detector)
+        detector.update(new_rows)
+        return detector
+    _DETECTORS.carry_forward(old_data, new_data, extend)
\ No newline at end of file
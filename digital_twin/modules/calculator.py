@@ -1,338 +1,611 @@
-import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-
-class EnergyCalculator:
-    def __init__(self):
-        self.appliances_db = {
-            'LED Light Bulb (10W)': 0.01,
-            'CFL Light Bulb (15W)': 0.015,
-            'Incandescent Bulb (60W)': 0.06,
-            'Desktop Computer': 0.3,
-            'Laptop': 0.05,
-            'Refrigerator': 0.15,
-            'Air Conditioner (1 Ton)': 1.5,
-            'Washing Machine': 0.5,
-            'Microwave': 1.2,
-            'Television (LED 32")': 0.08,
-            'Water Heater': 3.0,
-            'Dishwasher': 1.8,
-            'Hair Dryer': 1.5,
-            'Vacuum Cleaner': 1.4,
-            'Electric Kettle': 2.0
-        }
-    
-    def show_calculator_interface(self):
-        st.subheader("Energy Cost Calculator")
-        
-        tab1, tab2, tab3 = st.tabs(["Single Appliance", "Multiple Appliances", "Bill Estimator"])
-        
-        with tab1:
-            self.single_appliance_calculator()
-        
-        with tab2:
-            self.multiple_appliances_calculator()
-        
-        with tab3:
-            self.bill_estimator()
-    
-    def single_appliance_calculator(self):
-        st.subheader("Single Appliance Calculator")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            appliance = st.selectbox("Select Appliance", list(self.appliances_db.keys()))
-            power_kw = st.number_input("Power (kW)", value=self.appliances_db[appliance], step=0.01)
-            hours_per_day = st.number_input("Hours per day", min_value=0.0, max_value=24.0, value=8.0, step=0.5)
-            days = st.number_input("Number of days", min_value=1, value=30)
-        
-        with col2:
-            rate_per_kwh = st.number_input("Rate per kWh ($)", min_value=0.0, value=0.12, step=0.01)
-            
-            # Calculate consumption and cost
-            daily_consumption = power_kw * hours_per_day
-            total_consumption = daily_consumption * days
-            daily_cost = daily_consumption * rate_per_kwh
-            total_cost = total_consumption * rate_per_kwh
-            
-            # Display results
-            st.metric("Daily Consumption", f"{daily_consumption:.2f} kWh")
-            st.metric("Total Consumption", f"{total_consumption:.2f} kWh")
-            st.metric("Daily Cost", f"${daily_cost:.2f}")
-            st.metric("Total Cost", f"${total_cost:.2f}")
-        
-        # Cost breakdown chart
-        if st.button("Show Cost Breakdown"):
-            self.show_cost_breakdown(appliance, daily_cost, days)
-    
-    def multiple_appliances_calculator(self):
-        st.subheader("Multiple Appliances Calculator")
-        
-        # Initialize session state for appliances list
-        if 'appliances_list' not in st.session_state:
-            st.session_state.appliances_list = []
-        
-        # Add appliance form
-        with st.form("add_appliance"):
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                appliance = st.selectbox("Appliance", list(self.appliances_db.keys()))
-            with col2:
-                power = st.number_input("Power (kW)", value=self.appliances_db[appliance], step=0.01)
-            with col3:
-                hours = st.number_input("Hours/day", min_value=0.0, max_value=24.0, value=8.0, step=0.5)
-            with col4:
-                quantity = st.number_input("Quantity", min_value=1, value=1)
-            
-            submitted = st.form_submit_button("Add Appliance")
-            
-            if submitted:
-                appliance_data = {
-                    'appliance': appliance,
-                    'power_kw': power,
-                    'hours_per_day': hours,
-                    'quantity': quantity,
-                    'daily_consumption': power * hours * quantity,
-                    'daily_cost': power * hours * quantity * 0.12  # Default rate
-                }
-                st.session_state.appliances_list.append(appliance_data)
-                st.success(f"Added {appliance}")
-        
-        # Display appliances list
-        if st.session_state.appliances_list:
-            df = pd.DataFrame(st.session_state.appliances_list)
-            
-            # Rate input
-            rate = st.number_input("Rate per kWh ($)", min_value=0.0, value=0.12, step=0.01, key="multi_rate")
-            days = st.number_input("Number of days", min_value=1, value=30, key="multi_days")
-            
-            # Recalculate costs with current rate
-            df['daily_cost'] = df['daily_consumption'] * rate
-            df['total_consumption'] = df['daily_consumption'] * days
-            df['total_cost'] = df['daily_cost'] * days
-            
-            # Display results
-            st.subheader("Appliances Summary")
-            st.dataframe(df)
-            
-            # Total calculations
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Total Daily Consumption", f"{df['daily_consumption'].sum():.2f} kWh")
-            with col2:
-                st.metric("Total Daily Cost", f"${df['daily_cost'].sum():.2f}")
-            with col3:
-                st.metric(f"Total Cost ({days} days)", f"${df['total_cost'].sum():.2f}")
-            
-            # Consumption breakdown chart
-            fig = px.pie(df, values='daily_consumption', names='appliance',
-                        title="Daily Consumption Breakdown")
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Cost breakdown chart
-            fig = px.bar(df, x='appliance', y='daily_cost',
-                        title="Daily Cost by Appliance")
-            fig.update_xaxis(tickangle=45)
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Clear list button
-            if st.button("Clear All Appliances"):
-                st.session_state.appliances_list = []
-                st.experimental_rerun()
-    
-    def bill_estimator(self):
-        st.subheader("Monthly Bill Estimator")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.write("**Household Information**")
-            household_size = st.selectbox("Household Size", [1, 2, 3, 4, 5, "6+"])
-            home_type = st.selectbox("Home Type", ["Apartment", "House", "Condo"])
-            climate_zone = st.selectbox("Climate Zone", ["Hot", "Moderate", "Cold"])
-            
-        with col2:
-            st.write("**Usage Patterns**")
-            ac_usage = st.slider("AC Usage (hours/day)", 0, 24, 8)
-            heating_usage = st.slider("Heating Usage (hours/day)", 0, 24, 6)
-            lighting_hours = st.slider("Lighting Usage (hours/day)", 0, 24, 6)
-        
-        # Estimate consumption based on inputs
-        base_consumption = self.estimate_base_consumption(household_size, home_type)
-        climate_adjustment = self.get_climate_adjustment(climate_zone)
-        
-        # Calculate estimated consumption
-        estimated_daily = base_consumption * climate_adjustment
-        estimated_monthly = estimated_daily * 30
-        
-        # Rate structure
-        st.subheader("Rate Structure")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            base_rate = st.number_input("Base Rate ($/kWh)", value=0.12, step=0.01)
-        with col2:
-            peak_rate = st.number_input("Peak Rate ($/kWh)", value=0.18, step=0.01)
-        with col3:
-            off_peak_rate = st.number_input("Off-Peak Rate ($/kWh)", value=0.08, step=0.01)
-        
-        # Calculate estimated bill
-        peak_hours_consumption = estimated_monthly * 0.3  # 30% during peak hours
-        off_peak_consumption = estimated_monthly * 0.2    # 20% during off-peak
-        base_consumption_calc = estimated_monthly * 0.5   # 50% during base hours
-        
-        estimated_bill = (peak_hours_consumption * peak_rate + 
-                         off_peak_consumption * off_peak_rate + 
-                         base_consumption_calc * base_rate)
-        
-        # Display results
-        st.subheader("Estimated Monthly Bill")
-        
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Estimated Consumption", f"{estimated_monthly:.0f} kWh")
-        with col2:
-            st.metric("Estimated Bill", f"${estimated_bill:.2f}")
-        with col3:
-            st.metric("Average Rate", f"${estimated_bill/estimated_monthly:.4f}/kWh")
-        
-        # Bill breakdown
-        st.subheader("Bill Breakdown")
-        breakdown_data = {
-            'Rate Type': ['Peak Hours', 'Off-Peak Hours', 'Base Hours'],
-            'Consumption (kWh)': [peak_hours_consumption, off_peak_consumption, base_consumption_calc],
-            'Rate ($/kWh)': [peak_rate, off_peak_rate, base_rate],
-            'Cost ($)': [peak_hours_consumption * peak_rate, 
-                        off_peak_consumption * off_peak_rate, 
-                        base_consumption_calc * base_rate]
-        }
-        
-        breakdown_df = pd.DataFrame(breakdown_data)
-        st.dataframe(breakdown_df)
-        
-        # Visualization
-        fig = px.bar(breakdown_df, x='Rate Type', y='Cost ($)',
-                    title="Cost Breakdown by Rate Type")
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Savings recommendations
-        self.show_savings_recommendations(estimated_monthly, estimated_bill)
-    
-    def estimate_base_consumption(self, household_size, home_type):
-        """Estimate base daily consumption based on household characteristics"""
-        base_consumption = {
-            1: 15,
-            2: 25,
-            3: 35,
-            4: 45,
-            5: 55,
-            "6+": 65
-        }
-        
-        home_multiplier = {
-            "Apartment": 0.8,
-            "Condo": 0.9,
-            "House": 1.2
-        }
-        
-        return base_consumption[household_size] * home_multiplier[home_type]
-    
-    def get_climate_adjustment(self, climate_zone):
-        """Get climate adjustment factor"""
-        adjustments = {
-            "Hot": 1.3,
-            "Moderate": 1.0,
-            "Cold": 1.2
-        }
-        return adjustments[climate_zone]
-    
-    def show_cost_breakdown(self, appliance, daily_cost, days):
-        """Show cost breakdown visualization"""
-        # Create daily cost projection
-        dates = pd.date_range(start='2024-01-01', periods=days, freq='D')
-        costs = [daily_cost] * days
-        cumulative_costs = np.cumsum(costs)
-        
-        df = pd.DataFrame({
-            'Date': dates,
-            'Daily Cost': costs,
-            'Cumulative Cost': cumulative_costs
-        })
-        
-        # Create subplot
-        fig = go.Figure()
-        
-        fig.add_trace(go.Scatter(
-            x=df['Date'],
-            y=df['Daily Cost'],
-            mode='lines',
-            name='Daily Cost',
-            yaxis='y'
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=df['Date'],
-            y=df['Cumulative Cost'],
-            mode='lines',
-            name='Cumulative Cost',
-            yaxis='y2'
-        ))
-        
-        fig.update_layout(
-            title=f"Cost Projection for {appliance}",
-            xaxis_title="Date",
-            yaxis=dict(title="Daily Cost ($)", side="left"),
-            yaxis2=dict(title="Cumulative Cost ($)", side="right", overlaying="y"),
-            hovermode='x unified'
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
-    
-    def show_savings_recommendations(self, monthly_consumption, monthly_bill):
-        """Show energy savings recommendations"""
-        st.subheader("💡 Energy Savings Recommendations")
-        
-        recommendations = [
-            {
-                "tip": "Switch to LED bulbs",
-                "savings": "Up to 75% lighting cost reduction",
-                "potential_monthly_savings": monthly_bill * 0.15
-            },
-            {
-                "tip": "Use programmable thermostat",
-                "savings": "10-15% heating/cooling cost reduction",
-                "potential_monthly_savings": monthly_bill * 0.12
-            },
-            {
-                "tip": "Unplug devices when not in use",
-                "savings": "5-10% total bill reduction",
-                "potential_monthly_savings": monthly_bill * 0.075
-            },
-            {
-                "tip": "Use energy-efficient appliances",
-                "savings": "20-30% appliance cost reduction",
-                "potential_monthly_savings": monthly_bill * 0.25
-            },
-            {
-                "tip": "Optimize peak hour usage",
-                "savings": "15-20% bill reduction",
-                "potential_monthly_savings": monthly_bill * 0.175
-            }
-        ]
-        
-        for i, rec in enumerate(recommendations, 1):
-            with st.expander(f"Tip {i}: {rec['tip']}"):
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.write(f"**Potential Savings:** {rec['savings']}")
-                with col2:
-                    st.write(f"**Monthly Savings:** ${rec['potential_monthly_savings']:.2f}")
-        
-        # Total potential savings
-        total_potential_savings = sum(rec['potential_monthly_savings'] for rec in recommendations)
-        st.success(f"**Total Potential Monthly Savings: ${total_potential_savings:.2f}**")
-        st.info(f"**Potential Annual Savings: ${total_potential_savings * 12:.2f}**")
\ No newline at end of file
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+from modules.tariffs import show_tariff_inputs
+from modules.catalog import load_catalog
+from modules.simulator import WhatIfSimulator, RECOMMENDED_SCENARIOS, recommended_savings
+
+# Largest scenario sweep evaluated (appliances x rates x hours x quantities x days).
+# The float64 cost cube is rebuilt on every rerun showing a sweep (nothing is
+# cached), so this caps each such rerun's allocation at about 80 MB
+MAX_SWEEP_CELLS = 10_000_000
+
+class EnergyCalculator:
+    def __init__(self, data=None):
+        self.data = data
+        self.appliances_db = {
+            'LED Light Bulb (10W)': 0.01,
+            'CFL Light Bulb (15W)': 0.015,
+            'Incandescent Bulb (60W)': 0.06,
+            'Desktop Computer': 0.3,
+            'Laptop': 0.05,
+            'Refrigerator': 0.15,
+            'Air Conditioner (1 Ton)': 1.5,
+            'Washing Machine': 0.5,
+            'Microwave': 1.2,
+            'Television (LED 32")': 0.08,
+            'Water Heater': 3.0,
+            'Dishwasher': 1.8,
+            'Hair Dryer': 1.5,
+            'Vacuum Cleaner': 1.4,
+            'Electric Kettle': 2.0
+        }
+        self._catalog = None
+    
+    @property
+    def catalog(self):
+        """Appliance catalog, loaded on first use and shared across sessions"""
+        if self._catalog is None:
+            self._catalog = load_catalog(self.appliances_db)
+        return self._catalog
+    
+    def appliance_picker(self, label, key):
+        """Search box plus a short list of matching appliances; returns (name, power_kw)"""
+        query = st.text_input(f"Search {label.lower()}", key=f"{key}_search",
+                              placeholder="Type to filter, e.g. 'led 10w'")
+        matches = self.catalog.options(self.catalog.search(query, limit=50))
+        
+        if not matches:
+            st.warning("No appliances match your search.")
+            matches = self.appliances_db
+        
+        appliance = st.selectbox(label, list(matches.keys()), key=key)
+        return appliance, matches[appliance]
+    
+    def show_calculator_interface(self):
+        st.subheader("Energy Cost Calculator")
+        
+        tab1, tab2, tab3, tab4, tab5 = st.tabs(["Single Appliance", "Multiple Appliances", "Bill Estimator",
+                                                "Scenario Sweep", "What-If Simulator"])
+        
+        with tab1:
+            self.single_appliance_calculator()
+        
+        with tab2:
+            self.multiple_appliances_calculator()
+        
+        with tab3:
+            self.bill_estimator()
+        
+        with tab4:
+            self.scenario_sweep_calculator()
+        
+        with tab5:
+            self.what_if_simulator()
+    
+    def single_appliance_calculator(self):
+        st.subheader("Single Appliance Calculator")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            appliance, rated_power = self.appliance_picker("Select Appliance", "single_appliance")
+            power_kw = st.number_input("Power (kW)", value=rated_power, step=0.01)
+            hours_per_day = st.number_input("Hours per day", min_value=0.0, max_value=24.0, value=8.0, step=0.5)
+            days = st.number_input("Number of days", min_value=1, value=30)
+        
+        with col2:
+            rate_per_kwh = st.number_input("Rate per kWh ($)", min_value=0.0, value=0.12, step=0.01)
+            
+            # Calculate consumption and cost
+            daily_consumption = power_kw * hours_per_day
+            total_consumption = daily_consumption * days
+            daily_cost = daily_consumption * rate_per_kwh
+            total_cost = total_consumption * rate_per_kwh
+            
+            # Display results
+            st.metric("Daily Consumption", f"{daily_consumption:.2f} kWh")
+            st.metric("Total Consumption", f"{total_consumption:.2f} kWh")
+            st.metric("Daily Cost", f"${daily_cost:.2f}")
+            st.metric("Total Cost", f"${total_cost:.2f}")
+        
+        # Cost breakdown chart
+        if st.button("Show Cost Breakdown"):
+            self.show_cost_breakdown(appliance, daily_cost, days)
+    
+    def multiple_appliances_calculator(self):
+        st.subheader("Multiple Appliances Calculator")
+        
+        # Initialize session state for appliances table
+        if 'appliances_df' not in st.session_state:
+            st.session_state.appliances_df = pd.DataFrame({
+                'appliance': pd.Series(dtype=object),
+                'power_kw': pd.Series(dtype=float),
+                'hours_per_day': pd.Series(dtype=float),
+                'quantity': pd.Series(dtype=int),
+                'daily_consumption': pd.Series(dtype=float)
+            })
+        
+        # Appliance search lives outside the form so results update while typing
+        appliance, rated_power = self.appliance_picker("Appliance", "multi_appliance")
+        
+        # Add appliance form
+        with st.form("add_appliance"):
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.text_input("Selected", value=appliance, disabled=True)
+            with col2:
+                power = st.number_input("Power (kW)", value=rated_power, step=0.01)
+            with col3:
+                hours = st.number_input("Hours/day", min_value=0.0, max_value=24.0, value=8.0, step=0.5)
+            with col4:
+                quantity = st.number_input("Quantity", min_value=1, value=1)
+            
+            submitted = st.form_submit_button("Add Appliance")
+            
+            if submitted:
+                appliance_data = {
+                    'appliance': appliance,
+                    'power_kw': power,
+                    'hours_per_day': hours,
+                    'quantity': quantity,
+                    'daily_consumption': power * hours * quantity
+                }
+                # Append to the stored table instead of rebuilding it on every rerun
+                appliances_df = st.session_state.appliances_df
+                appliances_df.loc[len(appliances_df)] = appliance_data
+                st.success(f"Added {appliance}")
+        
+        # Display appliances list
+        if not st.session_state.appliances_df.empty:
+            # Rate input
+            rate = st.number_input("Rate per kWh ($)", min_value=0.0, value=0.12, step=0.01, key="multi_rate")
+            days = st.number_input("Number of days", min_value=1, value=30, key="multi_days")
+            
+            # Recalculate costs with current rate
+            df = st.session_state.appliances_df.assign(
+                daily_cost=lambda d: d['daily_consumption'] * rate,
+                total_consumption=lambda d: d['daily_consumption'] * days,
+                total_cost=lambda d: d['daily_consumption'] * rate * days
+            )
+            
+            # Display results
+            st.subheader("Appliances Summary")
+            st.dataframe(df)
+            
+            # Total calculations
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total Daily Consumption", f"{df['daily_consumption'].sum():.2f} kWh")
+            with col2:
+                st.metric("Total Daily Cost", f"${df['daily_cost'].sum():.2f}")
+            with col3:
+                st.metric(f"Total Cost ({days} days)", f"${df['total_cost'].sum():.2f}")
+            
+            # Consumption breakdown chart
+            fig = px.pie(df, values='daily_consumption', names='appliance',
+                        title="Daily Consumption Breakdown")
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Cost breakdown chart
+            fig = px.bar(df, x='appliance', y='daily_cost',
+                        title="Daily Cost by Appliance")
+            fig.update_xaxes(tickangle=45)
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Clear list button
+            if st.button("Clear All Appliances"):
+                del st.session_state.appliances_df
+                st.experimental_rerun()
+    
+    def scenario_sweep_calculator(self):
+        st.subheader("Scenario Sweep")
+        st.write("Evaluate every combination of rate, usage hours, quantity and billing period at once.")
+        
+        # Built-in appliances plus anything added from the catalog in the Multiple Appliances tab
+        available = dict(self.appliances_db)
+        added = st.session_state.get('appliances_df')
+        if added is not None and not added.empty:
+            available.update(zip(added['appliance'], added['power_kw']))
+            default_appliances = list(dict.fromkeys(added['appliance']))
+        else:
+            default_appliances = list(self.appliances_db.keys())[:5]
+        
+        appliances = st.multiselect("Appliances", list(available.keys()), default=default_appliances)
+        if not appliances:
+            st.info("Select at least one appliance to sweep.")
+            return
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            rate_range = st.slider("Rate range ($/kWh)", 0.0, 1.0, (0.08, 0.30), step=0.01)
+            rate_steps = st.number_input("Rate steps", min_value=1, max_value=500, value=50)
+        with col2:
+            hours_range = st.slider("Hours/day range", 0.0, 24.0, (1.0, 12.0), step=0.5)
+            hours_steps = st.number_input("Hours steps", min_value=1, max_value=500, value=48)
+        with col3:
+            max_quantity = st.number_input("Max quantity", min_value=1, max_value=1000, value=20)
+        with col4:
+            days_range = st.slider("Days range", 1, 365, (30, 365))
+            days_steps = st.number_input("Days steps", min_value=1, max_value=365, value=12)
+        
+        rates = np.linspace(rate_range[0], rate_range[1], int(rate_steps))
+        hours = np.linspace(hours_range[0], hours_range[1], int(hours_steps))
+        quantities = np.arange(1, int(max_quantity) + 1)
+        days = np.unique(np.linspace(days_range[0], days_range[1], int(days_steps)).round().astype(int))
+        
+        power_kw = np.array([available[name] for name in appliances])
+        cells = self.sweep_size(power_kw, rates, hours, quantities, days)
+        if cells > MAX_SWEEP_CELLS:
+            st.warning(f"This grid has {cells:,} scenarios; the limit is {MAX_SWEEP_CELLS:,}. "
+                       "Use fewer steps, a lower maximum quantity or fewer appliances.")
+            return
+        sweep = self.sweep_scenarios(power_kw, rates, hours, quantities, days)
+        cube = sweep['cost']
+        
+        # Summaries are computed from the cube; only aggregates are sent to the browser
+        total_cost = cube.sum(axis=0)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Scenarios Evaluated", f"{cube.size:,}")
+        with col2:
+            st.metric("Lowest Total Cost", f"${total_cost.min():,.2f}")
+        with col3:
+            st.metric("Highest Total Cost", f"${total_cost.max():,.2f}")
+        
+        st.subheader("Cost Sensitivity")
+        sensitivity = self.sweep_sensitivity(sweep)
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            y=sensitivity['parameter'],
+            x=sensitivity['high_cost'] - sensitivity['low_cost'],
+            base=sensitivity['low_cost'],
+            orientation='h',
+            name='Cost range'
+        ))
+        fig.update_layout(
+            title="Total Cost Range per Parameter (others at mid-grid values)",
+            xaxis_title="Total Cost ($)",
+            yaxis_title="Parameter"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Rate x hours surface at the selected quantity and period
+        col1, col2 = st.columns(2)
+        with col1:
+            quantity = st.select_slider("Quantity for surface", options=list(quantities), value=quantities[len(quantities) // 2])
+        with col2:
+            period = st.select_slider("Days for surface", options=list(days), value=days[len(days) // 2])
+        
+        surface = total_cost[:, :, quantity - 1, list(days).index(period)]
+        fig = px.imshow(surface, x=np.round(hours, 2), y=np.round(rates, 3), aspect='auto',
+                       origin='lower',
+                       title=f"Total Cost by Rate and Usage ({quantity} units, {period} days)",
+                       labels={'x': 'Hours per day', 'y': 'Rate ($/kWh)', 'color': 'Total Cost ($)'})
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Per-appliance share of the cost across all scenarios
+        share = pd.DataFrame({
+            'appliance': appliances,
+            'mean_cost': cube.reshape(len(appliances), -1).mean(axis=1),
+            'max_cost': cube.reshape(len(appliances), -1).max(axis=1)
+        })
+        st.dataframe(share.round(2))
+    
+    @staticmethod
+    def sweep_size(*axes):
+        """Number of cells in the cost cube of a sweep over these axes"""
+        return int(np.prod([np.size(axis) for axis in axes], dtype=object))
+    
+    def sweep_scenarios(self, power_kw, rates, hours, quantities, days):
+        """Evaluate every parameter combination for every appliance by broadcasting.
+        
+        Returns the cost cube with axes (appliance, rate, hours, quantity, days)
+        together with the axis values. Raises ValueError above MAX_SWEEP_CELLS.
+        """
+        cells = self.sweep_size(power_kw, rates, hours, quantities, days)
+        if cells > MAX_SWEEP_CELLS:
+            raise ValueError(f"Sweep of {cells:,} scenarios exceeds the limit of {MAX_SWEEP_CELLS:,}")
+        power_kw = np.asarray(power_kw, dtype=float)
+        rates = np.asarray(rates, dtype=float)
+        hours = np.asarray(hours, dtype=float)
+        quantities = np.asarray(quantities, dtype=float)
+        days = np.asarray(days, dtype=float)
+        
+        # Combine the small factors first so only the final product allocates the full cube
+        power_rate = np.multiply.outer(power_kw, rates)
+        usage = np.multiply.outer(np.multiply.outer(hours, quantities), days)
+        cost = np.multiply.outer(power_rate, usage)
+        
+        return {
+            'cost': cost,
+            'axes': {
+                'appliance': power_kw,
+                'rate': rates,
+                'hours': hours,
+                'quantity': quantities,
+                'days': days
+            }
+        }
+    
+    def sweep_sensitivity(self, sweep):
+        """Total cost range along each swept parameter with the others held at mid-grid"""
+        total_cost = sweep['cost'].sum(axis=0)
+        axes = ['rate', 'hours', 'quantity', 'days']
+        mid = [len(sweep['axes'][name]) // 2 for name in axes]
+        
+        rows = []
+        for i, name in enumerate(axes):
+            index = list(mid)
+            index[i] = slice(None)
+            line = total_cost[tuple(index)]
+            rows.append({'parameter': name, 'low_cost': line.min(), 'high_cost': line.max()})
+        
+        return pd.DataFrame(rows)
+    
+    def bill_estimator(self):
+        st.subheader("Monthly Bill Estimator")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.write("**Household Information**")
+            household_size = st.selectbox("Household Size", [1, 2, 3, 4, 5, "6+"])
+            home_type = st.selectbox("Home Type", ["Apartment", "House", "Condo"])
+            climate_zone = st.selectbox("Climate Zone", ["Hot", "Moderate", "Cold"])
+            
+        with col2:
+            st.write("**Usage Patterns**")
+            ac_usage = st.slider("AC Usage (hours/day)", 0, 24, 8)
+            heating_usage = st.slider("Heating Usage (hours/day)", 0, 24, 6)
+            lighting_hours = st.slider("Lighting Usage (hours/day)", 0, 24, 6)
+        
+        # Estimate consumption based on inputs
+        base_consumption = self.estimate_base_consumption(household_size, home_type)
+        climate_adjustment = self.get_climate_adjustment(climate_zone)
+        
+        # Calculate estimated consumption for the current calendar month
+        estimated_daily = base_consumption * climate_adjustment
+        month_start = pd.Timestamp.now().normalize().replace(day=1)
+        estimated_monthly = estimated_daily * month_start.days_in_month
+        
+        # Rate structure
+        st.subheader("Rate Structure")
+        tariff = show_tariff_inputs("bill")
+        
+        # Price an hourly profile of the estimated month with the tariff; the profile
+        # spans exactly one billing month, so the bill has one row and the breakdown
+        # below prices the same intervals
+        profile = self.build_monthly_profile(estimated_monthly, start=month_start)
+        bill = tariff.monthly_bill(profile, interval_hours=1.0).iloc[0]
+        estimated_bill = bill['total_cost']
+        
+        # Display results
+        st.subheader("Estimated Monthly Bill")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Estimated Consumption", f"{estimated_monthly:.0f} kWh")
+        with col2:
+            st.metric("Estimated Bill", f"${estimated_bill:.2f}")
+        with col3:
+            st.metric("Average Rate", f"${estimated_bill/estimated_monthly:.4f}/kWh")
+        
+        # Bill breakdown
+        st.subheader("Bill Breakdown")
+        priced = tariff.cost_intervals(profile)
+        breakdown_df = pd.DataFrame({
+            'Rate Type': priced['period'],
+            'Consumption (kWh)': profile['consumption_kwh'],
+            'Cost ($)': priced['energy_cost']
+        }).groupby('Rate Type', observed=True).sum().reset_index()
+        breakdown_df['Rate ($/kWh)'] = breakdown_df['Cost ($)'] / breakdown_df['Consumption (kWh)']
+        
+        charges = [('Demand Charge', bill['demand_cost']), ('Fixed Charge', bill['fixed_cost'])]
+        for rate_type, cost in charges:
+            if cost > 0:
+                breakdown_df.loc[len(breakdown_df)] = [rate_type, 0.0, cost, np.nan]
+        
+        breakdown_df = breakdown_df[['Rate Type', 'Consumption (kWh)', 'Rate ($/kWh)', 'Cost ($)']]
+        st.dataframe(breakdown_df)
+        
+        # Visualization
+        fig = px.bar(breakdown_df, x='Rate Type', y='Cost ($)',
+                    title="Cost Breakdown by Rate Type")
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Savings recommendations
+        self.show_savings_recommendations(estimated_monthly, estimated_bill)
+    
+    def estimate_base_consumption(self, household_size, home_type):
+        """Estimate base daily consumption based on household characteristics"""
+        base_consumption = {
+            1: 15,
+            2: 25,
+            3: 35,
+            4: 45,
+            5: 55,
+            "6+": 65
+        }
+        
+        home_multiplier = {
+            "Apartment": 0.8,
+            "Condo": 0.9,
+            "House": 1.2
+        }
+        
+        return base_consumption[household_size] * home_multiplier[home_type]
+    
+    def get_climate_adjustment(self, climate_zone):
+        """Get climate adjustment factor"""
+        adjustments = {
+            "Hot": 1.3,
+            "Moderate": 1.0,
+            "Cold": 1.2
+        }
+        return adjustments[climate_zone]
+    
+    def build_monthly_profile(self, monthly_consumption, start=None):
+        """Spread a monthly estimate over the hours of one calendar month (the current one by default)
+        using the loaded data's hour-of-week shape"""
+        if start is None:
+            start = pd.Timestamp.now().normalize().replace(day=1)
+        timestamps = pd.date_range(start=start, periods=start.days_in_month * 24, freq='H')
+        slots = timestamps.weekday * 24 + timestamps.hour
+        
+        if self.data is not None and not self.data.empty:
+            ts = self.data['timestamp'].dt
+            shape = self.data.groupby(ts.weekday * 24 + ts.hour)['consumption_kwh'].mean()
+            shape = shape.reindex(range(168)).fillna(shape.mean()).to_numpy()
+        else:
+            # Flat overnight, higher daytime and evening load
+            hourly = np.array([0.5] * 6 + [1.0] * 10 + [1.4] * 5 + [0.8] * 3)
+            shape = np.tile(hourly, 7)
+        
+        weights = shape[slots]
+        consumption = monthly_consumption * weights / weights.sum()
+        
+        return pd.DataFrame({'timestamp': timestamps, 'consumption_kwh': consumption})
+    
+    def show_cost_breakdown(self, appliance, daily_cost, days):
+        """Show cost breakdown visualization"""
+        # Create daily cost projection
+        dates = pd.date_range(start='2024-01-01', periods=days, freq='D')
+        costs = [daily_cost] * days
+        cumulative_costs = np.cumsum(costs)
+        
+        df = pd.DataFrame({
+            'Date': dates,
+            'Daily Cost': costs,
+            'Cumulative Cost': cumulative_costs
+        })
+        
+        # Create subplot
+        fig = go.Figure()
+        
+        fig.add_trace(go.Scatter(
+            x=df['Date'],
+            y=df['Daily Cost'],
+            mode='lines',
+            name='Daily Cost',
+            yaxis='y'
+        ))
+        
+        fig.add_trace(go.Scatter(
+            x=df['Date'],
+            y=df['Cumulative Cost'],
+            mode='lines',
+            name='Cumulative Cost',
+            yaxis='y2'
+        ))
+        
+        fig.update_layout(
+            title=f"Cost Projection for {appliance}",
+            xaxis_title="Date",
+            yaxis=dict(title="Daily Cost ($)", side="left"),
+            yaxis2=dict(title="Cumulative Cost ($)", side="right", overlaying="y"),
+            hovermode='x unified'
+        )
+        
+        st.plotly_chart(fig, use_container_width=True)
+    
+    def show_savings_recommendations(self, monthly_consumption, monthly_bill):
+        """Show energy savings recommendations"""
+        st.subheader("💡 Energy Savings Recommendations")
+        
+        if not self.has_interval_data():
+            st.info("Load energy data to compute savings from your consumption history.")
+            return
+        
+        # Replay each candidate change over the full history and measure the real savings;
+        # simulated once per dataset, when first asked for
+        results = recommended_savings(self.data)
+        if results is None:
+            if not st.button("Simulate Savings on Your History"):
+                st.caption(f"Replays {len(RECOMMENDED_SCENARIOS)} recommendations over "
+                           f"{len(self.data):,} readings of your history.")
+                return
+            with st.spinner("Simulating recommendations..."):
+                results = recommended_savings(self.data, simulate=True)
+        
+        for i, (scenario, result) in enumerate(zip(RECOMMENDED_SCENARIOS, results.to_dict('records')), 1):
+            with st.expander(f"Tip {i}: {scenario['name']}"):
+                st.write(scenario['tip'])
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.write(f"**Savings on your history:** ${result['savings']:.2f} ({result['savings_pct']:.1f}%)")
+                with col2:
+                    st.write(f"**Energy Saved:** {result['baseline_kwh'] - result['scenario_kwh']:.1f} kWh")
+                with col3:
+                    st.write(f"**Monthly Savings:** ${monthly_bill * result['savings_pct'] / 100:.2f}")
+        
+        # Combined savings are simulated together rather than summed, since changes overlap
+        total = results.iloc[-1]
+        total_potential_savings = monthly_bill * total['savings_pct'] / 100
+        st.success(f"**Total Potential Monthly Savings: ${total_potential_savings:.2f}** "
+                   f"({total['savings_pct']:.1f}% of cost in your history)")
+        st.info(f"**Potential Annual Savings: ${total_potential_savings * 12:.2f}**")
+    
+    def has_interval_data(self):
+        """Whether interval data with the columns the simulator needs is loaded"""
+        required = {'timestamp', 'consumption_kwh', 'rate_per_kwh'}
+        return self.data is not None and not self.data.empty and required.issubset(self.data.columns)
+    
+    def what_if_simulator(self):
+        st.subheader("Historical What-If Simulator")
+        
+        if not self.has_interval_data():
+            st.warning("Please upload or enter energy data first.")
+            return
+        
+        changes = []
+        categories = sorted(self.data['category'].dropna().unique()) if 'category' in self.data.columns else []
+        devices = sorted(self.data['device'].dropna().unique()) if 'device' in self.data.columns else []
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("**Load Shifting**")
+            shift_category = st.selectbox("Category to shift", categories,
+                                          index=categories.index('HVAC') if 'HVAC' in categories else 0)
+            shift_fraction = st.slider("Share of load to move (%)", 0, 100, 20) / 100
+            peak_window = st.slider("Move out of hours", 0, 24, (16, 21))
+            target_window = st.slider("Move into hours", 0, 24, (12, 16))
+            if shift_fraction > 0 and categories:
+                changes.append({'type': 'shift', 'category': shift_category, 'fraction': shift_fraction,
+                                'window': peak_window, 'target': target_window})
+        
+        with col2:
+            st.write("**Device Replacement**")
+            device = st.selectbox("Device class to replace", ["None"] + devices)
+            reduction = st.slider("Consumption reduction of the replacement (%)", 0, 90, 30) / 100
+            if device != "None" and reduction > 0:
+                changes.append({'type': 'reduce', 'device': device, 'fraction': reduction})
+            
+            st.write("**Tariff**")
+            switch_tariff = st.checkbox("Price with a different tariff")
+        
+        if switch_tariff:
+            changes.append({'type': 'tariff', 'tariff': show_tariff_inputs("whatif")})
+        
+        simulator = WhatIfSimulator(self.data)
+        result = simulator.run({'name': 'Selected changes', 'changes': changes})
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Historical Cost", f"${result['baseline_cost']:,.2f}")
+        with col2:
+            st.metric("Simulated Cost", f"${result['scenario_cost']:,.2f}")
+        with col3:
+            st.metric("Savings", f"${result['savings']:,.2f}", delta=f"{result['savings_pct']:.1f}%")
+        
+        # Savings curve over the share of load shifted, evaluated as a batch of scenarios
+        if categories and st.button("Sweep Shift Share"):
+            fixed = [change for change in changes if change['type'] != 'shift']
+            fractions = np.linspace(0, 1, 21)
+            scenarios = [
+                {'name': f"{fraction:.0%}", 'changes': fixed + [{
+                    'type': 'shift', 'category': shift_category, 'fraction': fraction,
+                    'window': peak_window, 'target': target_window
+                }]}
+                for fraction in fractions
+            ]
+            sweep = simulator.run_many(scenarios)
+            sweep['shift_pct'] = fractions * 100
+            
+            fig = px.line(sweep, x='shift_pct', y='savings', markers=True,
+                         title=f"Savings vs Share of {shift_category} Load Shifted",
+                         labels={'shift_pct': 'Load shifted (%)', 'savings': 'Savings ($)'})
+            st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
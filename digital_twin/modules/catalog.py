@@ -0,0 +1,133 @@
+import os
+import re
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+CATALOG_PATH = os.environ.get(
+    'APPLIANCE_CATALOG_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'appliance_catalog.csv')
+)
+
+TOKEN_PATTERN = r'[a-z0-9]+'
+
+class ApplianceCatalog:
+    """Array-backed appliance catalog with a token prefix index for search-as-you-type"""
+    
+    def __init__(self, names, power_kw, categories=None):
+        names = self._unique_names(names)
+        order = np.argsort(names.astype(str), kind='stable')
+        self.names = names[order]
+        self.power_kw = np.asarray(power_kw, dtype=np.float32)[order]
+        self.categories = None if categories is None else np.asarray(categories, dtype=object)[order]
+        self._build_index()
+    
+    @staticmethod
+    def _unique_names(names):
+        """Names with repeats numbered in file order ('Fan', 'Fan (2)', ...), so each picker entry is distinct"""
+        names = pd.Series(np.asarray(names, dtype=object), dtype=object)
+        # Repeated until a numbered name does not clash with one already in the file
+        while names.duplicated().any():
+            repeat = names.groupby(names).cumcount().to_numpy()
+            suffix = np.where(repeat > 0, ' (' + (repeat + 1).astype(str).astype(object) + ')', '')
+            names = names + suffix
+        return names.to_numpy(dtype=object)
+    
+    @classmethod
+    def from_dict(cls, appliances):
+        """Build a catalog from a {name: power_kw} mapping"""
+        return cls(list(appliances.keys()), list(appliances.values()))
+    
+    @classmethod
+    def from_file(cls, path):
+        """Load a vendor catalog (CSV, Excel or Parquet).
+        
+        Requires a ``name`` column and either ``power_kw`` or ``power_w``; ``brand``
+        and ``model`` are folded into the display name and ``category`` is kept.
+        """
+        if path.endswith('.parquet'):
+            df = pd.read_parquet(path)
+        elif path.endswith(('.xlsx', '.xls')):
+            df = pd.read_excel(path)
+        else:
+            df = pd.read_csv(path)
+        
+        df.columns = [c.strip().lower() for c in df.columns]
+        if 'power_kw' in df.columns:
+            power_kw = df['power_kw'].astype(float)
+        elif 'power_w' in df.columns:
+            power_kw = df['power_w'].astype(float) / 1000
+        else:
+            raise ValueError("Appliance catalog needs a 'power_kw' or 'power_w' column")
+        
+        names = df['name'].astype(str)
+        for column in ['model', 'brand']:
+            if column in df.columns:
+                names = df[column].fillna('').astype(str).str.strip() + ' ' + names
+        names = names.str.strip()
+        
+        categories = df['category'].astype(str).to_numpy() if 'category' in df.columns else None
+        valid = power_kw.notna().to_numpy()
+        return cls(names.to_numpy()[valid], power_kw.to_numpy()[valid],
+                   None if categories is None else categories[valid])
+    
+    def _build_index(self):
+        """Build a sorted token vocabulary with CSR posting lists of row ids"""
+        text = pd.Series(self.names, dtype=object)
+        if self.categories is not None:
+            text = text + ' ' + pd.Series(self.categories, dtype=object)
+        
+        tokens = text.str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+        token_codes, vocab = pd.factorize(tokens, sort=True)
+        rows = tokens.index.to_numpy(dtype=np.int32)
+        
+        # Postings sorted by token then row, with duplicates removed
+        order = np.lexsort((rows, token_codes))
+        token_codes, rows = token_codes[order], rows[order]
+        keep = np.r_[True, (token_codes[1:] != token_codes[:-1]) | (rows[1:] != rows[:-1])]
+        token_codes, rows = token_codes[keep], rows[keep]
+        
+        self.vocab = np.asarray(vocab, dtype=str)
+        self.postings = rows
+        self.offsets = np.searchsorted(token_codes, np.arange(len(self.vocab) + 1))
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def _prefix_rows(self, prefix):
+        """Rows containing any token that starts with the prefix"""
+        lo = np.searchsorted(self.vocab, prefix, side='left')
+        hi = np.searchsorted(self.vocab, prefix + '\uffff', side='left')
+        if hi - lo == 1:
+            return self.postings[self.offsets[lo]:self.offsets[hi]]
+        return np.unique(self.postings[self.offsets[lo]:self.offsets[hi]])
+    
+    def search(self, query, limit=50):
+        """Row indices matching every query token as a prefix, in catalog order"""
+        terms = re.findall(TOKEN_PATTERN, query.lower())
+        if not terms:
+            return np.arange(min(limit, len(self.names)))
+        
+        # Intersect the most selective terms first
+        candidates = sorted((self._prefix_rows(term) for term in terms), key=len)
+        matches = candidates[0]
+        for rows in candidates[1:]:
+            if not len(matches):
+                break
+            matches = np.intersect1d(matches, rows, assume_unique=True)
+        return matches[:limit]
+    
+    def options(self, indices):
+        """{name: power_kw} for the given rows (names are unique, so no row is dropped)"""
+        return dict(zip(self.names[indices], self.power_kw[indices].astype(float).round(4)))
+
+@st.cache_resource(show_spinner="Loading appliance catalog...")
+def _load_catalog_file(path, modified_time):
+    """Load and index a catalog file once per process; reloaded when the file changes"""
+    return ApplianceCatalog.from_file(path)
+
+def load_catalog(fallback, path=CATALOG_PATH):
+    """Shared catalog from the vendor file if present, else from the built-in appliances"""
+    if path and os.path.exists(path):
+        return _load_catalog_file(path, os.path.getmtime(path))
+    return ApplianceCatalog.from_dict(fallback)
\ No newline at end of file
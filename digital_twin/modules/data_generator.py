@@ -1,57 +1,111 @@
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-
-def generate_sample_data():
-    """Generate sample energy consumption data"""
-    np.random.seed(42)
-    
-    # Generate 30 days of hourly data
-    start_date = datetime.now() - timedelta(days=30)
-    dates = pd.date_range(start=start_date, periods=30*24, freq='H')
-    
-    data = []
-    categories = ['Lighting', 'HVAC', 'Equipment', 'Other']
-    devices = ['LED Lights', 'Air Conditioner', 'Computer', 'Refrigerator', 'Heater']
-    locations = ['Office', 'Production Floor', 'Warehouse', 'Break Room']
-    
-    for i, timestamp in enumerate(dates):
-        # Create realistic consumption patterns
-        hour = timestamp.hour
-        day_of_week = timestamp.weekday()
-        
-        # Base consumption with patterns
-        if 6 <= hour <= 18:  # Daytime
-            base_consumption = np.random.normal(5, 1.5)
-        elif 18 <= hour <= 22:  # Evening
-            base_consumption = np.random.normal(3, 1)
-        else:  # Night
-            base_consumption = np.random.normal(1, 0.5)
-        
-        # Weekend adjustment
-        if day_of_week >= 5:  # Weekend
-            base_consumption *= 0.7
-        
-        # Ensure positive values
-        consumption = max(0.1, base_consumption)
-        
-        # Variable rate (peak hours cost more)
-        if 16 <= hour <= 20:  # Peak hours
-            rate = np.random.normal(0.18, 0.02)
-        else:
-            rate = np.random.normal(0.12, 0.01)
-        
-        rate = max(0.08, rate)  # Minimum rate
-        
-        data.append({
-            'timestamp': timestamp,
-            'consumption_kwh': round(consumption, 2),
-            'rate_per_kwh': round(rate, 4),
-            'cost': round(consumption * rate, 2),
-            'category': np.random.choice(categories),
-            'device': np.random.choice(devices),
-            'location': np.random.choice(locations),
-            'notes': f'Auto-generated data for {timestamp.strftime("%Y-%m-%d %H:%M")}'
-        })
-    
-    return pd.DataFrame(data)
\ No newline at end of file
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+
+def generate_sample_data():
+    """Generate sample energy consumption data"""
+    np.random.seed(42)
+    
+    # Generate 30 days of hourly data
+    start_date = datetime.now() - timedelta(days=30)
+    dates = pd.date_range(start=start_date, periods=30*24, freq='H')
+    
+    data = []
+    categories = ['Lighting', 'HVAC', 'Equipment', 'Other']
+    devices = ['LED Lights', 'Air Conditioner', 'Computer', 'Refrigerator', 'Heater']
+    locations = ['Office', 'Production Floor', 'Warehouse', 'Break Room']
+    
+    for i, timestamp in enumerate(dates):
+        # Create realistic consumption patterns
+        hour = timestamp.hour
+        day_of_week = timestamp.weekday()
+        
+        # Base consumption with patterns
+        if 6 <= hour <= 18:  # Daytime
+            base_consumption = np.random.normal(5, 1.5)
+        elif 18 <= hour <= 22:  # Evening
+            base_consumption = np.random.normal(3, 1)
+        else:  # Night
+            base_consumption = np.random.normal(1, 0.5)
+        
+        # Weekend adjustment
+        if day_of_week >= 5:  # Weekend
+            base_consumption *= 0.7
+        
+        # Ensure positive values
+        consumption = max(0.1, base_consumption)
+        
+        # Variable rate (peak hours cost more)
+        if 16 <= hour <= 20:  # Peak hours
+            rate = np.random.normal(0.18, 0.02)
+        else:
+            rate = np.random.normal(0.12, 0.01)
+        
+        rate = max(0.08, rate)  # Minimum rate
+        
+        data.append({
+            'timestamp': timestamp,
+            'consumption_kwh': round(consumption, 2),
+            'rate_per_kwh': round(rate, 4),
+            'cost': round(consumption * rate, 2),
+            'category': np.random.choice(categories),
+            'device': np.random.choice(devices),
+            'location': np.random.choice(locations),
+            'notes': f'Auto-generated data for {timestamp.strftime("%Y-%m-%d %H:%M")}'
+        })
+    
+    return pd.DataFrame(data)
+
+DEVICE_CATEGORIES = {
+    'LED Lights': 'Lighting',
+    'Air Conditioner': 'HVAC',
+    'Heater': 'HVAC',
+    'Computer': 'Equipment',
+    'Refrigerator': 'Other'
+}
+
+def generate_synthetic_data(n_rows, n_locations=None, freq='H', seed=42):
+    """Generate `n_rows` readings with the same columns and daily patterns, vectorized.
+    
+    Rows are hourly (or `freq`) readings of every device at every location, so
+    larger datasets get more sites as well as a longer history.
+    """
+    rng = np.random.default_rng(seed)
+    devices = np.array(list(DEVICE_CATEGORIES))
+    categories = np.array(list(DEVICE_CATEGORIES.values()))
+    n_locations = n_locations or max(4, int(np.sqrt(n_rows) / 10))
+    locations = np.array([f'Site {i + 1:04d}' for i in range(n_locations)])
+    n_series = len(devices) * n_locations
+    
+    # Row i is step i // n_series of series i % n_series
+    series = np.arange(n_rows) % n_series
+    steps = np.arange(n_rows) // n_series
+    n_steps = int(steps[-1]) + 1 if n_rows else 0
+    step_ns = pd.tseries.frequencies.to_offset(freq).nanos
+    start = pd.Timestamp.now().floor('D') - pd.Timedelta(n_steps * step_ns, unit='ns')
+    timestamps = pd.DatetimeIndex(start.value + steps * step_ns)
+    hour = timestamps.hour.to_numpy()
+    weekend = timestamps.weekday.to_numpy() >= 5
+    
+    # Daytime, evening and night levels as in generate_sample_data
+    daytime = (hour >= 6) & (hour <= 18)
+    evening = (hour > 18) & (hour <= 22)
+    mean = np.select([daytime, evening], [5.0, 3.0], 1.0)
+    std = np.select([daytime, evening], [1.5, 1.0], 0.5)
+    consumption = rng.normal(mean, std) * np.where(weekend, 0.7, 1.0)
+    consumption = np.maximum(0.1, consumption).round(2)
+    
+    peak = (hour >= 16) & (hour <= 20)
+    rate = np.maximum(0.08, rng.normal(np.where(peak, 0.18, 0.12), np.where(peak, 0.02, 0.01))).round(4)
+    
+    device_codes = series % len(devices)
+    return pd.DataFrame({
+        'timestamp': timestamps,
+        'consumption_kwh': consumption,
+        'rate_per_kwh': rate,
+        'cost': (consumption * rate).round(2),
+        'category': categories[device_codes],
+        'device': devices[device_codes],
+        'location': locations[series // len(devices)],
+        'notes': 'Synthetic data'
+    })
\ No newline at end of file
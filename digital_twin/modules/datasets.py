@@ -0,0 +1,221 @@
+import threading
+import time
+import uuid
+import hashlib
+import weakref
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+DEFAULT_REGISTRY = {
+    'max_bytes': 2 * 2**30,       # unreferenced datasets are evicted, oldest first, above this total
+    'idle_seconds': 15 * 60       # unreferenced datasets are evicted after this long without a session
+}
+
+def freeze(data):
+    """Copy of `data` whose column arrays are read-only.
+    
+    Registered datasets are shared between sessions, so an in-place write
+    (`df.loc[...] = ...`) raises instead of changing another session's data.
+    """
+    columns = {}
+    for name, column in data.items():
+        values = column.array if isinstance(column.dtype, pd.api.extensions.ExtensionDtype) else column.to_numpy(copy=True)
+        if isinstance(values, np.ndarray):
+            values.flags.writeable = False
+        columns[name] = values
+    return pd.DataFrame(columns, index=data.index, copy=False)
+
+def estimate_nbytes(data, sample_rows=1000):
+    """Approximate memory of a frame; object columns are sized from a sample"""
+    nbytes = data.memory_usage(index=True, deep=False).sum()
+    objects = data.select_dtypes(include='object')
+    if len(objects.columns) and len(data):
+        sample = objects.iloc[:sample_rows]
+        per_row = (sample.memory_usage(index=False, deep=True).sum() - sample.memory_usage(index=False).sum()) / len(sample)
+        nbytes += per_row * len(data)
+    return int(nbytes)
+
+def content_key(content, *parts):
+    """Registry key for file content (plus any options applied to it)"""
+    digest = hashlib.sha1(content)
+    for part in parts:
+        digest.update(repr(part).encode())
+    return f"file:{digest.hexdigest()}"
+
+def upload_key(uploaded_file, *parts):
+    """`content_key` of an uploaded file; the file is hashed once per upload, not on every rerun"""
+    cached = st.session_state.get('upload_digest')
+    if cached is None or cached[0] != uploaded_file.file_id:
+        cached = (uploaded_file.file_id, hashlib.sha1(uploaded_file.getvalue()).hexdigest())
+        st.session_state.upload_digest = cached
+    return content_key(cached[1].encode(), *parts)
+
+class DatasetHandle:
+    """A session's reference to a registered dataset.
+    
+    The reference is released when the handle is released or garbage collected,
+    e.g. when the session that held it in `st.session_state` ends.
+    """
+    
+    def __init__(self, registry, key, label=None):
+        self.key = key
+        self.label = label or key
+        self._finalizer = weakref.finalize(self, registry.release, key)
+    
+    def release(self):
+        self._finalizer()
+
+class DatasetRegistry:
+    """Process-wide store of read-only datasets shared by all sessions.
+    
+    Sessions hold handles (plus their own widget and filter state), never a
+    private copy. Changing data registers a new dataset and moves the session's
+    handle to it, so other sessions keep the version they were looking at.
+    Datasets no session references are evicted after `idle_seconds` or when
+    the registry grows beyond `max_bytes`.
+    """
+    
+    def __init__(self, options=None):
+        self.options = {**DEFAULT_REGISTRY, **(options or {})}
+        self._entries = {}
+        self._loading = {}
+        self.lock = threading.RLock()
+    
+    def register(self, data, key=None, label=None):
+        """Store `data` under `key` (a new private key by default); an existing key is reused as is"""
+        key = key or f"private:{uuid.uuid4().hex}"
+        with self.lock:
+            if key not in self._entries:
+                self._entries[key] = {
+                    'data': freeze(data),
+                    'label': label or key,
+                    'refs': 0,
+                    'nbytes': estimate_nbytes(data),
+                    'created': time.time(),
+                    'last_used': time.time()
+                }
+            self.evict(keep=key)
+        return key
+    
+    def get_or_create(self, key, loader, label=None):
+        """Key of a shared dataset, built with `loader()` only if no session has it loaded.
+        
+        The loader runs outside the registry lock. Sessions asking for a key that
+        is being loaded wait for that load instead of starting their own; if it
+        fails, one of them retries it.
+        """
+        while True:
+            with self.lock:
+                if key in self._entries:
+                    return key
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    break
+            loading.wait()
+        
+        try:
+            data = loader()
+            self.register(data, key, label)
+        finally:
+            with self.lock:
+                del self._loading[key]
+            loading.set()
+        return key
+    
+    def acquire(self, key):
+        with self.lock:
+            entry = self._entries[key]
+            entry['refs'] += 1
+            entry['last_used'] = time.time()
+            return DatasetHandle(self, key, entry['label'])
+    
+    def release(self, key):
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['refs'] = max(entry['refs'] - 1, 0)
+                entry['last_used'] = time.time()
+            self.evict()
+    
+    def get(self, key):
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry['last_used'] = time.time()
+            return entry['data']
+    
+    def evict(self, keep=None):
+        """Drop idle unreferenced datasets, then the least recently used ones while over budget"""
+        with self.lock:
+            now = time.time()
+            evictable = {key: entry for key, entry in self._entries.items() if entry['refs'] == 0 and key != keep}
+            for key, entry in evictable.items():
+                if now - entry['last_used'] > self.options['idle_seconds']:
+                    del self._entries[key]
+            
+            unreferenced = sorted((entry['last_used'], key) for key, entry in evictable.items() if key in self._entries)
+            total = sum(entry['nbytes'] for entry in self._entries.values())
+            for _, key in unreferenced:
+                if total <= self.options['max_bytes']:
+                    break
+                total -= self._entries.pop(key)['nbytes']
+    
+    def stats(self):
+        with self.lock:
+            now = time.time()
+            return pd.DataFrame([{
+                'dataset': entry['label'],
+                'rows': len(entry['data']),
+                'memory_mb': entry['nbytes'] / 2**20,
+                'sessions': entry['refs'],
+                'idle_seconds': 0 if entry['refs'] else now - entry['last_used'],
+                'key': key
+            } for key, entry in self._entries.items()])
+
+REGISTRY = DatasetRegistry()
+
+def dataset_label():
+    handle = st.session_state.get('dataset_handle')
+    return handle.label if handle is not None else None
+
+def get_dataset():
+    """This session's dataset, or None before one is loaded"""
+    handle = st.session_state.get('dataset_handle')
+    return REGISTRY.get(handle.key) if handle is not None else None
+
+def _point_session_to(key):
+    previous = st.session_state.get('dataset_handle')
+    if previous is not None and previous.key == key:
+        return
+    st.session_state.dataset_handle = REGISTRY.acquire(key)
+    if previous is not None:
+        previous.release()
+
+def set_dataset(data, key=None, label=None):
+    """Make `data` this session's dataset and return the registered (read-only) frame.
+    
+    Without a `key` the dataset is private to the session; pass a content key
+    (see `content_key`) so sessions loading the same file share one copy.
+    """
+    if label is None:
+        handle = st.session_state.get('dataset_handle')
+        label = f"{handle.label.removesuffix(' (edited)')} (edited)" if handle is not None else None
+    
+    # Registering and acquiring under one lock, so the new dataset cannot be evicted in between
+    with REGISTRY.lock:
+        key = REGISTRY.register(data, key, label)
+        _point_session_to(key)
+    return get_dataset()
+
+def use_shared_dataset(key, loader, label=None):
+    """Point this session at a shared dataset, loading it once for all sessions"""
+    while True:
+        REGISTRY.get_or_create(key, loader, label)
+        with REGISTRY.lock:
+            # Unreferenced datasets can be evicted between the load and here; load it again then
+            if REGISTRY.get(key) is not None:
+                _point_session_to(key)
+                return get_dataset()
\ No newline at end of file
@@ -0,0 +1,59 @@
+import threading
+import weakref
+
+class FrameCache:
+    """Values derived from a dataset frame, kept for as long as that frame object lives.
+    
+    Entries are keyed by the id of the frame plus an optional parameter (e.g. a
+    window). A finalizer drops them when the frame is garbage collected, so an
+    id reused by a later frame never finds a stale entry.
+    """
+    
+    def __init__(self, name):
+        self.name = name
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, data, build, param=None):
+        """Entry of `data` (and `param`), built with `build()` on first use"""
+        key = (id(data), param)
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+        value = build()
+        with self._lock:
+            # Another session may have built it meanwhile; keep the first
+            if key not in self._entries:
+                self._store(data, key, value)
+            return self._entries[key]
+    
+    def _store(self, data, key, value):
+        self._entries[key] = value
+        weakref.finalize(data, self._entries.pop, key, None)
+    
+    def carry_forward(self, old_data, new_data, extend):
+        """Entries for `new_data` = old_data + new rows, from `extend(value)` of each of old_data's.
+        
+        `extend` must not modify `value` in place: `old_data` may still be in
+        use by other sessions.
+        """
+        with self._lock:
+            entries = [(param, value) for (data_id, param), value in self._entries.items()
+                       if data_id == id(old_data)]
+        for param, value in entries:
+            extended = extend(value)
+            with self._lock:
+                self._store(new_data, (id(new_data), param), extended)
+    
+    def __len__(self):
+        return len(self._entries)
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+def frame_cache(name):
+    """The process-wide FrameCache called `name`, created on first use"""
+    with _CACHES_LOCK:
+        if name not in _CACHES:
+            _CACHES[name] = FrameCache(name)
+        return _CACHES[name]
\ No newline at end of file
@@ -0,0 +1,241 @@
+import io
+import os
+import glob
+import time
+import threading
+from collections import OrderedDict
+import pandas as pd
+import numpy as np
+
+DEFAULT_LIVE = {
+    'window': '2D',              # raw readings kept for the recent-readings view
+    'max_window_rows': 500_000,  # hard cap on raw readings in memory
+    'rollup': '1H',              # older readings are kept only as totals at this resolution
+    'max_rollup_rows': 200_000,  # hard cap on rolled-up totals; the oldest periods are dropped first
+    'patterns': ['*.csv', '*.parquet']
+}
+
+ROLLUP_KEYS = ['category', 'location']
+
+MAX_FEEDS = 8
+FEED_IDLE_SECONDS = 15 * 60
+
+# Feeds keyed by path, so every session watching a directory shares one tail and one window.
+# Least recently used first; feeds no session has asked for in FEED_IDLE_SECONDS are dropped.
+_FEEDS = OrderedDict()
+_FEEDS_LOCK = threading.Lock()
+
+class FileTail:
+    """New rows appended to CSV files and new Parquet files in a file or directory.
+    
+    CSV files are read from the byte offset reached at the previous poll, up to
+    the last complete line, so a reading is never parsed twice or half-written.
+    Parquet files are written whole, so each is read once, after it has been
+    completely written (a failed read is retried at the next poll).
+    """
+    
+    def __init__(self, path, patterns=DEFAULT_LIVE['patterns']):
+        self.path = path
+        self.patterns = patterns
+        self.offsets = {}   # CSV path -> bytes consumed
+        self.headers = {}   # CSV path -> header line
+        self.seen = set()   # Parquet paths already read
+        self.errors = {}
+    
+    def files(self):
+        if os.path.isfile(self.path):
+            return [self.path]
+        paths = set()
+        for pattern in self.patterns:
+            paths.update(glob.glob(os.path.join(self.path, pattern)))
+        return sorted(paths, key=lambda path: (os.path.getmtime(path), path))
+    
+    def poll(self):
+        """Frame of all rows that arrived since the previous poll"""
+        frames = []
+        for path in self.files():
+            try:
+                frame = self._read_parquet(path) if path.endswith('.parquet') else self._read_csv(path)
+                self.errors.pop(path, None)
+            except Exception as e:
+                self.errors[path] = str(e)
+                continue
+            if frame is not None and len(frame):
+                frames.append(frame)
+        return pd.concat(frames, ignore_index=True) if frames else None
+    
+    def _read_csv(self, path):
+        size = os.path.getsize(path)
+        offset = self.offsets.get(path, 0)
+        if size < offset:
+            # Truncated or replaced: start again from the header
+            offset = 0
+            self.headers.pop(path, None)
+        if size == offset:
+            return None
+        
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            content = f.read(size - offset)
+        complete = content.rfind(b'\n') + 1
+        if complete == 0:
+            return None
+        content = content[:complete]
+        
+        if path not in self.headers:
+            header_end = content.find(b'\n') + 1
+            self.headers[path] = content[:header_end]
+            content = content[header_end:]
+        self.offsets[path] = offset + complete
+        if not content.strip():
+            return None
+        return pd.read_csv(io.BytesIO(self.headers[path] + content))
+    
+    def _read_parquet(self, path):
+        if path in self.seen:
+            return None
+        import pyarrow.parquet as pq
+        frame = pq.read_table(path).to_pandas()
+        self.seen.add(path)
+        return frame
+
+class LiveFeed:
+    """Dashboard aggregates kept up to date from the rows a FileTail delivers.
+    
+    Each poll folds only the new rows into running totals (overall, per day,
+    per category, per hour of day). Raw readings are kept for a bounded recent
+    window; readings leaving it are rolled up to hourly totals per category and
+    location, so memory stays bounded however long the feed runs.
+    """
+    
+    def __init__(self, path, options=None):
+        self.options = {**DEFAULT_LIVE, **(options or {})}
+        self.tail = FileTail(path, self.options['patterns'])
+        self.window = pd.DataFrame()
+        self.rollup = pd.DataFrame()
+        self.totals = {'consumption_kwh': 0.0, 'cost': 0.0, 'rate_sum': 0.0, 'rate_count': 0, 'readings': 0}
+        self.daily = pd.Series(dtype=float)
+        self.by_category = pd.Series(dtype=float)
+        self.hourly_sum = np.zeros(24)
+        self.hourly_count = np.zeros(24)
+        self.last_poll_rows = 0
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+    
+    def poll(self):
+        """Ingest whatever arrived since the last poll; returns the number of new rows"""
+        with self.lock:
+            rows = self.tail.poll()
+            self.last_poll_rows = 0 if rows is None else len(rows)
+            if rows is not None:
+                self._ingest(self._prepare(rows))
+            return self.last_poll_rows
+    
+    @staticmethod
+    def _prepare(rows):
+        rows = rows.copy()
+        rows['timestamp'] = pd.to_datetime(rows['timestamp'])
+        rows['consumption_kwh'] = pd.to_numeric(rows['consumption_kwh'], errors='coerce')
+        if 'cost' not in rows.columns:
+            rows['cost'] = rows['consumption_kwh'] * rows['rate_per_kwh'] if 'rate_per_kwh' in rows.columns else np.nan
+        for column in ROLLUP_KEYS:
+            if column not in rows.columns:
+                rows[column] = 'Unknown'
+        return rows.dropna(subset=['timestamp', 'consumption_kwh'])
+    
+    def _ingest(self, rows):
+        kwh = rows['consumption_kwh']
+        self.totals['consumption_kwh'] += kwh.sum()
+        self.totals['cost'] += rows['cost'].sum()
+        self.totals['readings'] += len(rows)
+        if 'rate_per_kwh' in rows.columns:
+            rates = rows['rate_per_kwh'].dropna()
+            self.totals['rate_sum'] += rates.sum()
+            self.totals['rate_count'] += len(rates)
+        
+        timestamps = rows['timestamp'].dt
+        self.daily = self.daily.add(kwh.groupby(timestamps.date).sum(), fill_value=0)
+        self.by_category = self.by_category.add(kwh.groupby(rows['category'].fillna('Other')).sum(), fill_value=0)
+        hours = timestamps.hour.to_numpy()
+        self.hourly_sum += np.bincount(hours, weights=kwh.to_numpy(), minlength=24)
+        self.hourly_count += np.bincount(hours, minlength=24)
+        
+        self.window = pd.concat([self.window, rows], ignore_index=True) if len(self.window) else rows.reset_index(drop=True)
+        self._trim_window()
+    
+    def _trim_window(self):
+        """Roll readings older than the window (or beyond the row cap) up into hourly totals"""
+        latest = self.window['timestamp'].max()
+        expired = (self.window['timestamp'] <= latest - pd.Timedelta(self.options['window'])).to_numpy()
+        overflow = len(self.window) - expired.sum() - self.options['max_window_rows']
+        if overflow > 0:
+            # Drop the oldest readings still in the window as well
+            order = np.argsort(self.window['timestamp'].to_numpy(), kind='stable')
+            expired[order[~expired[order]][:overflow]] = True
+        if not expired.any():
+            return
+        
+        old = self.window[expired]
+        groups = old.groupby([old['timestamp'].dt.floor(self.options['rollup'])] + [old[key] for key in ROLLUP_KEYS],
+                             dropna=False)
+        rolled = groups[['consumption_kwh', 'cost']].sum()
+        rolled['readings'] = groups.size()
+        self.rollup = rolled if self.rollup.empty else self.rollup.add(rolled, fill_value=0)
+        self.window = self.window[~expired].reset_index(drop=True)
+        
+        # The running totals still cover dropped periods; only the hourly history loses them
+        excess = len(self.rollup) - self.options['max_rollup_rows']
+        if excess > 0:
+            self.rollup = self.rollup.sort_index(level=0).iloc[excess:]
+    
+    def metrics(self):
+        """Values of the dashboard metric cards"""
+        return {
+            'total_consumption': self.totals['consumption_kwh'],
+            'avg_daily': self.daily.mean() if len(self.daily) else 0.0,
+            'total_cost': self.totals['cost'],
+            'avg_rate': self.totals['rate_sum'] / self.totals['rate_count'] if self.totals['rate_count'] else np.nan,
+            'readings': self.totals['readings']
+        }
+    
+    def daily_consumption(self):
+        return self.daily.rename_axis('date').reset_index(name='consumption')
+    
+    def category_consumption(self):
+        return self.by_category.rename_axis('category').reset_index(name='consumption_kwh')
+    
+    def hourly_pattern(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({'hour': np.arange(24), 'avg_consumption': self.hourly_sum / self.hourly_count})
+    
+    def history(self, freq='1H'):
+        """Consumption per `freq` over the rolled-up history and the raw window"""
+        parts = []
+        if not self.rollup.empty:
+            parts.append(self.rollup['consumption_kwh'].groupby(level=0).sum())
+        if len(self.window):
+            parts.append(self.window.groupby(self.window['timestamp'].dt.floor(freq))['consumption_kwh'].sum())
+        if not parts:
+            return pd.DataFrame(columns=['timestamp', 'consumption_kwh'])
+        series = pd.concat(parts)
+        return series.groupby(series.index.floor(freq)).sum().rename_axis('timestamp').reset_index(name='consumption_kwh')
+
+def get_live_feed(path, options=None):
+    """Shared feed for a path, created on first use.
+    
+    At most MAX_FEEDS feeds are kept, and idle ones are dropped; a session
+    returning to a dropped path starts a new feed that re-reads its files.
+    """
+    key = (os.path.abspath(path), repr(sorted((options or {}).items())))
+    now = time.time()
+    with _FEEDS_LOCK:
+        for stale in [stale for stale, feed in _FEEDS.items() if now - feed.last_used > FEED_IDLE_SECONDS]:
+            del _FEEDS[stale]
+        if key not in _FEEDS:
+            _FEEDS[key] = LiveFeed(path, options)
+        _FEEDS.move_to_end(key)
+        while len(_FEEDS) > MAX_FEEDS:
+            _FEEDS.popitem(last=False)
+        feed = _FEEDS[key]
+        feed.last_used = now
+        return feed
\ No newline at end of file
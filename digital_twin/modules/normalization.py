@@ -0,0 +1,343 @@
+import pandas as pd
+import numpy as np
+
+SERIES_COLUMNS = ['location', 'device', 'category']
+GAP_FILL_POLICIES = ['interpolate', 'ffill', 'zero', 'none']
+CHUNK_ROWS = 1_000_000
+
+# Normalization settings used by the data input page. Intervals are pandas
+# offsets. Naive input timestamps are read in `source_timezone` (UTC if None)
+# and output is shown in `timezone` (defaults to the source; None stays naive).
+DEFAULT_NORMALIZATION = {
+    'interval': '1H',
+    'cumulative': False,
+    'source_timezone': None,
+    'timezone': None,
+    'gap_fill': 'none',
+    'max_gap': 6,
+    'duplicates': 'last',
+    'series_columns': SERIES_COLUMNS
+}
+
+def looks_cumulative(data, series_columns=SERIES_COLUMNS, min_readings=10):
+    """True when most series only ever go up, as register (meter total) readings do"""
+    columns = [column for column in series_columns if column in data.columns]
+    frame = data.sort_values(columns + ['timestamp'])
+    values = frame['consumption_kwh'].to_numpy(dtype=float)
+    if len(values) < min_readings:
+        return False
+    same_series = np.ones(len(values) - 1, dtype=bool)
+    for column in columns:
+        labels = frame[column].to_numpy()
+        same_series &= labels[1:] == labels[:-1]
+    steps = np.diff(values)[same_series]
+    return len(steps) >= min_readings and (steps >= 0).mean() > 0.95
+
+def read_chunks(source, chunksize=CHUNK_ROWS):
+    """Iterate a CSV or Parquet file (path or buffer) in frames of about `chunksize` rows"""
+    name = getattr(source, 'name', source)
+    if isinstance(name, str) and name.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+def frame_chunks(data, chunksize=CHUNK_ROWS):
+    """Iterate an in-memory frame in slices of `chunksize` rows, like `read_chunks`"""
+    for start in range(0, len(data), chunksize):
+        yield data.iloc[start:start + chunksize]
+
+class MeterNormalizer:
+    """Turns irregular meter exports into fixed-interval consumption.
+    
+    Readings are grouped into series (one per location/device/category), put on
+    a UTC timeline, de-duplicated, converted from register totals to deltas if
+    needed, and spread over fixed bins in proportion to the time they cover.
+    Empty bins are then filled per the gap policy. Every step works on whole
+    columns, and `normalize_chunks` carries the state needed between chunks.
+    """
+    
+    def __init__(self, options=None):
+        options = {**DEFAULT_NORMALIZATION, **(options or {})}
+        self.options = options
+        self.interval_ns = pd.Timedelta(pd.tseries.frequencies.to_offset(options['interval'])).value
+        self.cumulative = options['cumulative']
+        self.source_timezone = options['source_timezone']
+        self.timezone = options['timezone'] or options['source_timezone']
+        self.gap_fill = options['gap_fill']
+        self.max_gap = options['max_gap']
+        self.duplicates = options['duplicates']
+        self.series_columns = list(options['series_columns'])
+        
+        # Sub-daily bins are cut on the UTC timeline at local standard-time multiples of
+        # the interval; daily and longer bins follow the local calendar across DST changes
+        self.origin_ns = 0
+        self.local_bins = bool(self.timezone) and self.interval_ns >= pd.Timedelta(days=1).value
+        if self.timezone and not self.local_bins:
+            self.origin_ns = -int(pd.Timestamp('2000-01-01', tz=self.timezone).utcoffset().total_seconds() * 10**9)
+        
+        self.report = {
+            'rows_in': 0, 'invalid_rows': 0, 'duplicates': 0, 'resets': 0,
+            'intervals_out': 0, 'spread': 0, 'filled': 0, 'unfilled_gaps': 0
+        }
+        self._carry = None
+    
+    def _series(self, frame):
+        """Series code per row and the label columns of each series"""
+        columns = [column for column in self.series_columns if column in frame.columns]
+        if not columns:
+            return np.zeros(len(frame), dtype=np.int64), pd.DataFrame(index=[0])
+        codes = np.zeros(len(frame), dtype=np.int64)
+        uniques = []
+        for column in columns:
+            column_codes, column_uniques = pd.factorize(frame[column].astype(object).fillna('Unknown'))
+            codes = codes * len(column_uniques) + column_codes
+            uniques.append(column_uniques)
+        codes, combinations = pd.factorize(codes, sort=True)
+        
+        labels = {}
+        for column, column_uniques in reversed(list(zip(columns, uniques))):
+            labels[column] = column_uniques[combinations % len(column_uniques)]
+            combinations = combinations // len(column_uniques)
+        return codes, pd.DataFrame({column: labels[column] for column in columns})
+    
+    def _utc_ns(self, timestamps, codes):
+        """UTC nanoseconds; naive wall times are read in the source timezone"""
+        timestamps = pd.DatetimeIndex(timestamps)
+        if timestamps.tz is not None:
+            return timestamps.tz_convert('UTC').asi8
+        if not self.source_timezone:
+            return timestamps.asi8
+        
+        # A wall time repeated in the fall-back hour is first daylight, then standard time
+        occurrence = pd.Series(timestamps.asi8).groupby([codes, timestamps.asi8]).cumcount().to_numpy()
+        localized = timestamps.tz_localize(self.source_timezone, ambiguous=occurrence == 0,
+                                           nonexistent='shift_forward')
+        return localized.tz_convert('UTC').asi8
+    
+    def _as_input_time(self, ns, input_tz):
+        """UTC nanoseconds back in the representation the input used"""
+        timestamps = pd.to_datetime(ns)
+        if input_tz is not None:
+            return timestamps.tz_localize('UTC').tz_convert(input_tz)
+        if self.source_timezone:
+            return timestamps.tz_localize('UTC').tz_convert(self.source_timezone).tz_localize(None)
+        return timestamps
+    
+    def normalize(self, data):
+        """Normalized copy of one frame (or chunk); counts are added to `self.report`"""
+        if self._carry is not None:
+            data = pd.concat([self._carry, data], ignore_index=True)
+            self.report['rows_in'] -= len(self._carry)
+        self.report['rows_in'] += len(data)
+        
+        timestamps = pd.to_datetime(data['timestamp'], errors='coerce')
+        kwh = pd.to_numeric(data['consumption_kwh'], errors='coerce').to_numpy(dtype=float)
+        valid = timestamps.notna().to_numpy() & ~np.isnan(kwh)
+        self.report['invalid_rows'] += int((~valid).sum())
+        data, timestamps, kwh = data[valid], timestamps[valid], kwh[valid]
+        
+        codes, labels = self._series(data)
+        ns = self._utc_ns(timestamps, codes)
+        if 'cost' in data.columns:
+            cost = pd.to_numeric(data['cost'], errors='coerce').to_numpy(dtype=float)
+        elif 'rate_per_kwh' in data.columns:
+            cost = kwh * pd.to_numeric(data['rate_per_kwh'], errors='coerce').to_numpy(dtype=float)
+        else:
+            cost = None
+        
+        order = np.lexsort((ns, codes))
+        codes, ns, kwh = codes[order], ns[order], kwh[order]
+        cost = None if cost is None else cost[order]
+        
+        # Duplicate (series, timestamp) readings
+        starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (ns[1:] != ns[:-1])]) if len(ns) else np.zeros(0, dtype=int)
+        self.report['duplicates'] += len(ns) - len(starts)
+        if len(starts) < len(ns):
+            if self.duplicates == 'mean':
+                counts = np.diff(np.r_[starts, len(ns)])
+                kwh = np.add.reduceat(kwh, starts) / counts
+                cost = None if cost is None else np.add.reduceat(np.nan_to_num(cost), starts) / counts
+                codes, ns = codes[starts], ns[starts]
+            else:
+                keep = np.r_[starts[1:] - 1, len(ns) - 1]
+                codes, ns, kwh = codes[keep], ns[keep], kwh[keep]
+                cost = None if cost is None else cost[keep]
+        
+        if self.cumulative:
+            # The last register reading of each series seeds the deltas of the next chunk
+            last = np.r_[codes[1:] != codes[:-1], True] if len(codes) else np.zeros(0, dtype=bool)
+            carry = labels.iloc[codes[last]].reset_index(drop=True)
+            carry['timestamp'] = self._as_input_time(ns[last], timestamps.dt.tz)
+            carry['consumption_kwh'] = kwh[last]
+            self._carry = carry
+            span_start, span_end, energy, cost = self._register_deltas(codes, ns, kwh, cost)
+            codes = codes[1:][codes[1:] == codes[:-1]]
+        else:
+            span_start, span_end, energy = self._interval_spans(codes, ns, kwh)
+        
+        if self.local_bins:
+            # Spans inside the repeated fall-back hour collapse in wall time; keep them in their bin
+            span_start = self._wall_ns(span_start)
+            span_end = np.maximum(self._wall_ns(span_end), span_start + 1)
+        return self._resample(codes, labels, span_start, span_end, energy, cost)
+    
+    def _wall_ns(self, ns):
+        """Local wall-clock nanoseconds of UTC instants"""
+        return pd.to_datetime(ns).tz_localize('UTC').tz_convert(self.timezone).tz_localize(None).asi8
+    
+    def _register_deltas(self, codes, ns, kwh, cost):
+        """Consumption between consecutive register readings; a drop means the meter restarted at zero"""
+        same_series = codes[1:] == codes[:-1]
+        delta = np.diff(kwh)
+        resets = same_series & (delta < 0)
+        self.report['resets'] += int(resets.sum())
+        delta = np.where(resets, kwh[1:], delta)
+        
+        # Cost is priced at the rate of the reading that closes each span
+        if cost is not None:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                rate = np.where(kwh[1:] != 0, cost[1:] / kwh[1:], np.nan)
+            cost = (delta * rate)[same_series]
+        return ns[:-1][same_series], ns[1:][same_series], delta[same_series], cost
+    
+    def _interval_spans(self, codes, ns, kwh):
+        """Interval readings cover [t, t + reading interval), cut short by the next reading"""
+        # The meter's reading interval is the typical spacing of distinct timestamps
+        gaps = np.diff(np.unique(ns))
+        reading_interval = int(np.median(gaps)) if len(gaps) else self.interval_ns
+        same_series = codes[1:] == codes[:-1]
+        following = np.r_[np.where(same_series, ns[1:], np.iinfo(np.int64).max), np.iinfo(np.int64).max]
+        return ns, np.minimum(ns + reading_interval, np.maximum(following, ns + 1)), kwh
+    
+    def _resample(self, codes, labels, span_start, span_end, energy, cost):
+        """Spread each span's energy over the bins it overlaps, then fill empty bins"""
+        interval, origin = self.interval_ns, self.origin_ns
+        if not len(codes):
+            return self._frame(labels, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                               np.zeros(0), None, np.zeros(0, dtype=object))
+        
+        first_bin = (span_start - origin) // interval
+        last_bin = (np.maximum(span_end - 1, span_start) - origin) // interval
+        pieces = (last_bin - first_bin + 1).astype(np.int64)
+        
+        # One piece per (span, bin) it touches
+        span = np.repeat(np.arange(len(codes)), pieces)
+        bins = first_bin[span] + np.arange(pieces.sum()) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        overlap = (np.minimum(span_end[span], (bins + 1) * interval + origin) -
+                   np.maximum(span_start[span], bins * interval + origin))
+        duration = np.maximum(span_end - span_start, 1)
+        share = overlap / duration[span]
+        
+        # Dense grid of bins from each series' first to last bin
+        piece_codes = codes[span]
+        series = np.unique(piece_codes)
+        series_starts = np.searchsorted(piece_codes, series)
+        grid_first = np.minimum.reduceat(bins, series_starts)
+        grid_last = np.maximum.reduceat(bins, series_starts)
+        grid_offsets = np.r_[0, np.cumsum(grid_last - grid_first + 1)]
+        series_index = np.searchsorted(series, piece_codes)
+        position = grid_offsets[series_index] + bins - grid_first[series_index]
+        size = grid_offsets[-1]
+        
+        grid_energy = np.bincount(position, weights=energy[span] * share, minlength=size)
+        coverage = np.bincount(position, weights=overlap / interval, minlength=size)
+        long_span = (pieces > (self.max_gap or np.inf)) if self.cumulative else np.zeros(len(pieces), dtype=bool)
+        spread = np.bincount(position, weights=long_span[span], minlength=size) > 0
+        grid_cost = None
+        if cost is not None:
+            grid_cost = np.bincount(position, weights=np.nan_to_num(cost)[span] * share, minlength=size)
+        
+        grid_series = np.repeat(series, np.diff(grid_offsets))
+        grid_bins = np.arange(size) - np.repeat(grid_offsets[:-1], np.diff(grid_offsets)) + np.repeat(grid_first, np.diff(grid_offsets))
+        quality = np.where(spread, 'spread', 'measured').astype(object)
+        self.report['spread'] += int(spread.sum())
+        
+        missing = coverage <= 0
+        if missing.any():
+            grid_energy, filled, keep = self._fill(grid_energy, missing, grid_series)
+            quality[filled] = 'filled'
+            self.report['filled'] += int(filled.sum())
+            self.report['unfilled_gaps'] += int((~keep).sum())
+            if grid_cost is not None:
+                # Filled bins are priced at their series' average rate
+                totals = np.bincount(grid_series, weights=np.where(missing, 0.0, grid_cost))
+                kwh_totals = np.bincount(grid_series, weights=np.where(missing, 0.0, grid_energy))
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    series_rate = np.where(kwh_totals > 0, totals / kwh_totals, np.nan)
+                grid_cost = np.where(filled, grid_energy * series_rate[grid_series], grid_cost)
+                grid_cost = grid_cost[keep]
+            grid_series, grid_bins, grid_energy, quality = grid_series[keep], grid_bins[keep], grid_energy[keep], quality[keep]
+        
+        self.report['intervals_out'] += len(grid_bins)
+        return self._frame(labels, grid_series, grid_bins, grid_energy, grid_cost, quality)
+    
+    def _fill(self, energy, missing, series):
+        """Fill empty bins per the gap policy; returns values, filled mask and rows to keep"""
+        index = np.arange(len(energy))
+        # Nearest measured bin on each side (series always start and end with a measured bin)
+        previous = np.maximum.accumulate(np.where(missing, -1, index))
+        following = np.minimum.accumulate(np.where(missing, len(energy), index)[::-1])[::-1]
+        gap_length = following - previous - 1
+        within_series = (previous >= 0) & (following < len(energy))
+        within_series[within_series] &= series[previous[within_series]] == series[following[within_series]]
+        fillable = missing & within_series & (gap_length <= (self.max_gap if self.max_gap is not None else np.inf))
+        
+        values = energy.copy()
+        if self.gap_fill == 'zero':
+            values[fillable] = 0.0
+        elif self.gap_fill == 'ffill':
+            values[fillable] = energy[previous[fillable]]
+        elif self.gap_fill == 'interpolate':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                weight = (index - previous) / (following - previous)
+            values[fillable] = (energy[previous[fillable]] * (1 - weight[fillable]) +
+                                energy[following[fillable]] * weight[fillable])
+        else:
+            fillable[:] = False
+        
+        return values, fillable, ~missing | fillable
+    
+    def _frame(self, labels, series, bins, energy, cost, quality):
+        """Output rows in the dashboard's column layout"""
+        timestamps = pd.to_datetime(bins * self.interval_ns + self.origin_ns)
+        if self.local_bins:
+            timestamps = timestamps.tz_localize(self.timezone, ambiguous=True, nonexistent='shift_forward')
+        elif self.timezone:
+            timestamps = timestamps.tz_localize('UTC').tz_convert(self.timezone)
+        
+        frame = pd.DataFrame({'timestamp': timestamps, 'consumption_kwh': energy})
+        if cost is not None:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                frame['rate_per_kwh'] = np.where(energy > 0, cost / energy, np.nan)
+            frame['cost'] = cost
+        for column in labels.columns:
+            frame[column] = labels[column].to_numpy()[series]
+        frame['quality'] = quality
+        return frame
+    
+    def normalize_chunks(self, chunks):
+        """Normalize an iterable of frames (e.g. `read_chunks`) sorted by time.
+        
+        Register readings are carried across chunk boundaries. A bin split
+        between two chunks appears in both outputs and is summed here.
+        """
+        frames = [self.normalize(chunk) for chunk in chunks]
+        frames = [frame for frame in frames if len(frame)]
+        if not frames:
+            return self._frame(pd.DataFrame(), np.zeros(0, dtype=int), np.zeros(0, dtype=np.int64),
+                               np.zeros(0), None, np.zeros(0, dtype=object))
+        result = pd.concat(frames, ignore_index=True)
+        
+        keys = ['timestamp'] + [column for column in self.series_columns if column in result.columns]
+        split = result.duplicated(keys, keep=False)
+        if split.any():
+            sums = {column: 'sum' for column in ['consumption_kwh', 'cost'] if column in result.columns}
+            merged = result[split].groupby(keys, sort=False, dropna=False).agg(
+                {**sums, 'quality': 'first'}).reset_index()
+            if 'cost' in merged.columns:
+                merged['rate_per_kwh'] = merged['cost'] / merged['consumption_kwh'].where(merged['consumption_kwh'] > 0)
+            self.report['intervals_out'] -= int(split.sum()) - len(merged)
+            result = pd.concat([result[~split], merged[result.columns]], ignore_index=True)
+        return result.sort_values(keys).reset_index(drop=True)
\ No newline at end of file
@@ -0,0 +1,116 @@
+import pandas as pd
+import numpy as np
+
+class PeakDemandEngine:
+    """Rolling-window demand and top-K peaks for all sites in one pass.
+    
+    Rows are collapsed to one load value per (site, timestamp) and laid out
+    site-by-site in time order. Window energy then comes from prefix-sum
+    differences, so each window size costs O(n) regardless of its length.
+    """
+    
+    def __init__(self, data, site_column='location'):
+        if site_column and site_column in data.columns:
+            sites = data[site_column].fillna('Unknown').to_numpy()
+        else:
+            sites = np.full(len(data), 'All Sites', dtype=object)
+        
+        site_codes, self.sites = pd.factorize(sites, sort=True)
+        ts = pd.DatetimeIndex(data['timestamp']).asi8 // 10**9
+        kwh = data['consumption_kwh'].to_numpy(dtype=float)
+        
+        # One load value per (site, timestamp), sorted by site then time
+        order = np.lexsort((ts, site_codes))
+        site_codes, ts, kwh = site_codes[order], ts[order], kwh[order]
+        new_run = np.r_[True, (site_codes[1:] != site_codes[:-1]) | (ts[1:] != ts[:-1])]
+        starts = np.flatnonzero(new_run)
+        
+        self.site_codes = site_codes[starts]
+        self.seconds = ts[starts]
+        self.energy = np.add.reduceat(kwh, starts) if len(kwh) else kwh
+        self.interval_seconds = self._infer_interval()
+        
+        # Monotonic key across sites so window starts can be found with one search
+        origin = self.seconds.min() if len(self.seconds) else 0
+        span = (self.seconds.max() - origin + 1) if len(self.seconds) else 1
+        self._key = self.site_codes.astype(np.int64) * (2 * span + 1) + (self.seconds - origin)
+        self._prefix = np.r_[0.0, np.cumsum(self.energy)]
+        
+        # First row of each row's site: windows longer than the data's span would
+        # otherwise reach back into the previous site's rows
+        site_starts = np.flatnonzero(np.r_[True, self.site_codes[1:] != self.site_codes[:-1]])
+        self._site_first = np.repeat(site_starts, np.diff(np.r_[site_starts, len(self.site_codes)]))
+    
+    def _infer_interval(self):
+        """Typical meter reading spacing in seconds; sites without a reading had no load"""
+        gaps = np.diff(np.unique(self.seconds))
+        return int(np.median(gaps)) if len(gaps) else 3600
+    
+    def effective_window(self, window_minutes):
+        """Window in seconds; never shorter than one reading interval"""
+        return max(int(window_minutes * 60), self.interval_seconds)
+    
+    def rolling_demand(self, window_minutes=15):
+        """Average demand (kW) over the window ending at each reading, for every site"""
+        window = self.effective_window(window_minutes)
+        
+        # A window spans window / interval readings: timestamps in [t - window + interval, t]
+        window_start = np.searchsorted(self._key, self._key - window + self.interval_seconds, side='left')
+        window_start = np.maximum(window_start, self._site_first)
+        energy = self._prefix[np.arange(1, len(self.energy) + 1)] - self._prefix[window_start]
+        
+        return pd.DataFrame({
+            'site': self.sites[self.site_codes],
+            'window_end': pd.to_datetime(self.seconds, unit='s'),
+            'energy_kwh': energy,
+            'demand_kw': energy / (window / 3600)
+        })
+    
+    def top_peaks(self, window_minutes=15, k=3, period='M'):
+        """Top-K non-overlapping rolling-demand peaks per site and billing period"""
+        demand = self.rolling_demand(window_minutes)
+        window = self.effective_window(window_minutes)
+        if demand.empty:
+            return demand.assign(period=[], rank=[], window_start=[])
+        
+        demand['period'] = demand['window_end'].dt.to_period(period)
+        period_codes = pd.factorize(demand['period'])[0]
+        
+        # Rows are in (site, time) order, so each (site, period) group is a contiguous run
+        group_starts = np.flatnonzero(np.r_[True, (self.site_codes[1:] != self.site_codes[:-1]) |
+                                                  (period_codes[1:] != period_codes[:-1])])
+        group_ends = np.r_[group_starts[1:], len(demand)]
+        row_group = np.repeat(np.arange(len(group_starts)), group_ends - group_starts)
+        values = demand['demand_kw'].to_numpy()
+        
+        # Greedy selection, one rank per round for all groups: take each group's highest
+        # remaining window, then drop every window overlapping it
+        available = np.ones(len(demand), dtype=bool)
+        picked = []
+        ranks = []
+        for rank in range(1, k + 1):
+            masked = np.where(available, values, -np.inf)
+            best = np.maximum.reduceat(masked, group_starts)
+            candidates = np.flatnonzero(available & (masked == best[row_group]))
+            if not len(candidates):
+                break
+            first = candidates[np.r_[True, row_group[candidates][1:] != row_group[candidates][:-1]]]
+            picked.append(first)
+            ranks.append(np.full(len(first), rank))
+            
+            lo = np.searchsorted(self._key, self._key[first] - window + 1, side='left')
+            hi = np.searchsorted(self._key, self._key[first] + window - 1, side='right')
+            lo = np.maximum(lo, group_starts[row_group[first]])
+            hi = np.minimum(hi, group_ends[row_group[first]])
+            covered = np.zeros(len(demand) + 1, dtype=np.int64)
+            np.add.at(covered, lo, 1)
+            np.add.at(covered, hi, -1)
+            available &= np.cumsum(covered[:-1]) == 0
+        
+        picked = np.concatenate(picked) if picked else np.array([], dtype=int)
+        peaks = demand.iloc[picked].copy()
+        peaks['rank'] = np.concatenate(ranks) if ranks else []
+        peaks['window_start'] = peaks['window_end'] - pd.Timedelta(seconds=window - self.interval_seconds)
+        peaks['period'] = peaks['period'].astype(str)
+        return peaks[['site', 'period', 'rank', 'window_start', 'window_end', 'demand_kw', 'energy_kwh']] \
+            .sort_values(['site', 'period', 'rank']).reset_index(drop=True)
\ No newline at end of file
@@ -0,0 +1,284 @@
+import json
+import time
+import threading
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+from functools import wraps
+from datetime import datetime
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
+
+HISTORY_LIMIT = 20_000
+
+# Plotly Express builders and Streamlit calls that are timed automatically while profiling is on
+FIGURE_FUNCTIONS = ['line', 'bar', 'pie', 'scatter', 'imshow', 'histogram', 'area', 'box', 'density_heatmap']
+RENDER_FUNCTIONS = ['plotly_chart', 'dataframe', 'table']
+
+KINDS = {
+    'load': 'Data Loading',
+    'aggregation': 'Aggregation',
+    'fit': 'Model Fit',
+    'figure': 'Figure',
+    'render': 'Render',
+    'section': 'Report Section',
+    'page': 'Page Total'
+}
+
+# Allocation tracing is process-wide: it runs while at least one session tracks memory
+_TRACING = {'sessions': 0, 'started': False}
+_TRACING_LOCK = threading.Lock()
+
+class TracingHandle:
+    """A session's claim on allocation tracing.
+    
+    tracemalloc starts with the first claim and stops when the last one is
+    released or garbage collected, e.g. when the session that held it in
+    `st.session_state` ends.
+    """
+    
+    def __init__(self):
+        with _TRACING_LOCK:
+            _TRACING['sessions'] += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _TRACING['started'] = True
+        self._finalizer = weakref.finalize(self, _release_tracing)
+    
+    def release(self):
+        self._finalizer()
+
+def _release_tracing():
+    with _TRACING_LOCK:
+        _TRACING['sessions'] = max(_TRACING['sessions'] - 1, 0)
+        # Tracing started outside the dashboard (e.g. PYTHONTRACEMALLOC) is left running
+        if not _TRACING['sessions'] and _TRACING['started']:
+            tracemalloc.stop()
+            _TRACING['started'] = False
+
+def tracing_sessions():
+    """Number of sessions currently tracking memory"""
+    return _TRACING['sessions']
+
+def is_enabled():
+    return bool(st.session_state.get('perf_enabled', False))
+
+def _memory_enabled():
+    return is_enabled() and bool(st.session_state.get('perf_memory', False))
+
+def _reset_peak():
+    """Reset the traced peak, unless other sessions are tracing (the peak is theirs too)"""
+    with _TRACING_LOCK:
+        if _TRACING['sessions'] > 1:
+            return False
+        tracemalloc.reset_peak()
+        return True
+
+def _fold_peak(stack, peak):
+    for parent in stack:
+        if parent['peak'] is not None:
+            parent['peak'] = max(parent['peak'], peak)
+
+@contextmanager
+def timed(name, kind='aggregation'):
+    """Time a block (and its memory change when memory tracking is on) for the Performance panel.
+    
+    Costs one session-state lookup when profiling is off.
+    """
+    if not is_enabled():
+        yield
+        return
+    
+    stack = st.session_state.setdefault('perf_stack', [])
+    frame = {'peak': 0, 'memory': None}
+    if _memory_enabled() and 'perf_tracing' in st.session_state and tracemalloc.is_tracing():
+        # Peaks are per block, so fold the peak so far into the enclosing blocks before resetting it
+        current, peak = tracemalloc.get_traced_memory()
+        _fold_peak(stack, peak)
+        if not _reset_peak():
+            frame['peak'] = None
+        frame['memory'] = current
+    stack.append(frame)
+    
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stack.pop()
+        record = {
+            'page': st.session_state.get('perf_page', 'Unknown'),
+            'kind': kind,
+            'name': name,
+            'duration_ms': elapsed_ms,
+            'memory_delta_kb': np.nan,
+            'memory_peak_kb': np.nan
+        }
+        if frame['memory'] is not None and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            _fold_peak(stack, peak if frame['peak'] is None else max(frame['peak'], peak))
+            record['memory_delta_kb'] = (current - frame['memory']) / 1024
+            if frame['peak'] is not None:
+                record['memory_peak_kb'] = (max(frame['peak'], peak) - frame['memory']) / 1024
+        st.session_state.setdefault('perf_run', []).append(record)
+
+def profiled(name, kind='aggregation'):
+    """Decorator form of `timed`"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _figure_title(figure):
+    try:
+        return figure.layout.title.text or ''
+    except AttributeError:
+        return ''
+
+def install_hooks():
+    """Time every Plotly Express figure and chart/table render; a no-op wrapper while profiling is off.
+    
+    Patches `plotly.express` and `streamlit` for the whole process, so the app
+    calls it explicitly; installing twice is a no-op.
+    """
+    for name in FIGURE_FUNCTIONS:
+        func = getattr(px, name)
+        if getattr(func, '_profiled', False):
+            continue
+        
+        def figure(*args, _func=func, **kwargs):
+            if not is_enabled():
+                return _func(*args, **kwargs)
+            with timed(f"px.{_func.__name__}: {kwargs.get('title', '')}".rstrip(': '), 'figure'):
+                return _func(*args, **kwargs)
+        figure._profiled = True
+        setattr(px, name, wraps(func)(figure))
+    
+    for name in RENDER_FUNCTIONS:
+        func = getattr(st, name)
+        if getattr(func, '_profiled', False):
+            continue
+        
+        def render(*args, _func=func, **kwargs):
+            if not is_enabled():
+                return _func(*args, **kwargs)
+            data = args[0] if args else next(iter(kwargs.values()), None)
+            label = _figure_title(data) if _func.__name__ == 'plotly_chart' else f"{getattr(data, 'shape', '')}"
+            with timed(f"st.{_func.__name__}: {label}".rstrip(': '), 'render'):
+                return _func(*args, **kwargs)
+        render._profiled = True
+        setattr(st, name, wraps(func)(render))
+
+def begin_page(page):
+    """Start collecting the records of this rerun under `page`"""
+    st.session_state.perf_page = page
+    st.session_state.perf_run = []
+    st.session_state.perf_stack = []
+    st.session_state.perf_started = time.perf_counter()
+    
+    # Claim allocation tracing while this session tracks memory; other sessions may still hold it
+    tracing = st.session_state.get('perf_tracing')
+    if _memory_enabled() and tracing is None:
+        st.session_state.perf_tracing = TracingHandle()
+    elif not _memory_enabled() and tracing is not None:
+        tracing.release()
+        del st.session_state['perf_tracing']
+
+def set_page(page):
+    """Refine the page name, e.g. with the analysis chosen on the page"""
+    st.session_state.perf_page = page
+
+def end_page():
+    """Close the rerun: add its total and move its records to the session history"""
+    if not is_enabled() or 'perf_started' not in st.session_state:
+        return
+    st.session_state.perf_run.append({
+        'page': st.session_state.perf_page,
+        'kind': 'page',
+        'name': 'Total',
+        'duration_ms': (time.perf_counter() - st.session_state.perf_started) * 1000,
+        'memory_delta_kb': np.nan,
+        'memory_peak_kb': np.nan
+    })
+    
+    run_id = st.session_state.get('perf_run_id', 0) + 1
+    st.session_state.perf_run_id = run_id
+    recorded_at = datetime.now().isoformat(timespec='seconds')
+    history = st.session_state.setdefault('perf_history', [])
+    history.extend(dict(record, run=run_id, recorded_at=recorded_at) for record in st.session_state.perf_run)
+    del history[:-HISTORY_LIMIT]
+
+def summarize(records):
+    """Per page and step: calls, mean/p95/max duration and mean memory change"""
+    if not len(records):
+        return pd.DataFrame()
+    frame = pd.DataFrame(records)
+    summary = frame.groupby(['page', 'kind', 'name'], sort=False).agg(
+        calls=('duration_ms', 'size'),
+        mean_ms=('duration_ms', 'mean'),
+        p95_ms=('duration_ms', lambda values: values.quantile(0.95)),
+        max_ms=('duration_ms', 'max'),
+        total_ms=('duration_ms', 'sum'),
+        mean_memory_kb=('memory_delta_kb', 'mean')
+    ).reset_index()
+    return summary.sort_values(['page', 'total_ms'], ascending=[True, False], ignore_index=True)
+
+def _json_records(frame):
+    """Rows of a frame for the JSON export, NaN (memory not tracked) as null"""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+def show_performance_panel():
+    """Optional sidebar panel with the timings of the last rerun and per-page aggregates"""
+    with st.sidebar:
+        st.header("⏱️ Performance")
+        enabled = st.checkbox("Profile reruns", key="perf_enabled",
+                              help="Time data loading, aggregations, model fits, figures and rendering")
+        st.checkbox("Track memory", key="perf_memory", disabled=not enabled,
+                    help="Adds allocation tracing (tracemalloc), which slows reruns noticeably")
+        if not enabled:
+            return
+        if st.session_state.get('perf_memory') and tracing_sessions() > 1:
+            st.caption(f"{tracing_sessions()} sessions are tracking memory: changes include their "
+                       "allocations and peaks are not reported.")
+        
+        last_run = pd.DataFrame(st.session_state.get('perf_run', []))
+        if last_run.empty:
+            st.caption("Timings appear from the next rerun on.")
+        else:
+            total = last_run.loc[last_run['kind'] == 'page', 'duration_ms'].sum()
+            st.metric("Last Rerun", f"{total:,.0f} ms")
+            steps = last_run[last_run['kind'] != 'page'].copy()
+            steps['kind'] = steps['kind'].map(KINDS)
+            st.dataframe(steps[['kind', 'name', 'duration_ms', 'memory_delta_kb']].round(1)
+                         .sort_values('duration_ms', ascending=False),
+                         use_container_width=True, hide_index=True)
+        
+        history = st.session_state.get('perf_history', [])
+        if not history:
+            return
+        summary = summarize(history)
+        st.subheader("Per Page")
+        pages = summary['page'].unique().tolist()
+        page = st.selectbox("Page", pages, index=pages.index(st.session_state.perf_page)
+                            if st.session_state.perf_page in pages else 0, key="perf_summary_page")
+        page_summary = summary[summary['page'] == page].drop(columns='page')
+        page_summary['kind'] = page_summary['kind'].map(KINDS)
+        st.dataframe(page_summary.round(1),
+                     use_container_width=True, hide_index=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("JSON", json.dumps({'summary': _json_records(summary),
+                                                   'records': _json_records(pd.DataFrame(history))},
+                                                  default=str, indent=2, allow_nan=False),
+                               file_name="performance.json", mime="application/json")
+        with col2:
+            st.download_button("CSV", pd.DataFrame(history).to_csv(index=False),
+                               file_name="performance.csv", mime="text/csv")
+        if st.button("Clear History"):
+            st.session_state.perf_history = []
\ No newline at end of file
@@ -0,0 +1,218 @@
+import threading
+from collections import OrderedDict
+import streamlit as st
+import pandas as pd
+import numpy as np
+from modules.normalization import SERIES_COLUMNS
+
+# Data-quality settings used by the data input page. Set `max_kwh` to None for
+# register (cumulative) readings and `duplicates` to None to keep every reading.
+DEFAULT_QUALITY = {
+    'max_kwh': 10_000.0,            # a single reading above this is a meter or export error
+    'max_rate': 5.0,                # highest plausible rate in $/kWh
+    'cost_tolerance': 0.02,         # relative cost difference allowed on top of rounding to cents
+    'duplicates': 'last',           # reading kept for a repeated (series, timestamp)
+    'series_columns': SERIES_COLUMNS,
+    'max_quarantine_rows': 10_000   # quarantined rows kept for download; counts cover all of them
+}
+
+# Rule -> (description, action). Quarantined rows are set aside, repaired rows
+# stay with the offending value replaced.
+RULES = {
+    'invalid_timestamp': ("Timestamp missing or unparseable", 'quarantine'),
+    'invalid_consumption': ("Consumption missing or not numeric", 'quarantine'),
+    'negative_consumption': ("Consumption below zero", 'quarantine'),
+    'absurd_consumption': ("Consumption above the plausible maximum", 'quarantine'),
+    'duplicate_timestamp': ("Repeated reading for the same series and time", 'quarantine'),
+    'missing_rate': ("Rate missing; derived from cost, else the median rate", 'repair'),
+    'invalid_rate': ("Rate negative or implausibly high; replaced like a missing rate", 'repair'),
+    'missing_cost': ("Cost missing; set to consumption × rate", 'repair'),
+    'cost_mismatch': ("Cost inconsistent with consumption × rate; recomputed", 'repair')
+}
+
+REPORT_CACHE_SIZE = 32
+
+# Reports keyed like the registry's datasets (file hash plus options), most recent last
+_REPORTS = OrderedDict()
+_REPORTS_LOCK = threading.Lock()
+
+class DataQualityChecker:
+    """Rule checks, repairs and quarantine for uploaded readings.
+    
+    Every rule is a vectorized mask over a chunk, so large files are checked a
+    chunk at a time. Rows breaking a quarantine rule are set aside with the
+    rules they broke; rates and costs of the remaining rows are repaired. The
+    checks that need the whole file (duplicates, the median rate) run once all
+    chunks are in.
+    """
+    
+    def __init__(self, options=None):
+        self.options = {**DEFAULT_QUALITY, **(options or {})}
+        self.counts = dict.fromkeys(RULES, 0)
+        self.rows_in = 0
+        self.rows_out = 0
+        self.repaired = 0
+        self.quarantined = 0
+        self._quarantine = []
+        self._kept = 0
+    
+    def _set_aside(self, rows, masks):
+        """Record quarantined rows, keeping up to `max_quarantine_rows` with the rules they broke"""
+        self.quarantined += len(rows)
+        room = self.options['max_quarantine_rows'] - self._kept
+        if room <= 0 or not len(rows):
+            return
+        rows = rows.iloc[:room].copy()
+        broken = pd.DataFrame({rule: mask[:room] for rule, mask in masks.items()}, index=rows.index)
+        rows['violations'] = broken.dot(broken.columns + ', ').str.rstrip(', ')
+        self._quarantine.append(rows)
+        self._kept += len(rows)
+    
+    def check(self, chunk):
+        """Clean rows of one chunk; quarantined rows and rule counts are recorded"""
+        missing = [column for column in ['timestamp', 'consumption_kwh'] if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+        self.rows_in += len(chunk)
+        
+        timestamps = pd.to_datetime(chunk['timestamp'], errors='coerce')
+        kwh = pd.to_numeric(chunk['consumption_kwh'], errors='coerce')
+        masks = {
+            'invalid_timestamp': timestamps.isna().to_numpy(),
+            'invalid_consumption': kwh.isna().to_numpy(),
+            'negative_consumption': (kwh < 0).to_numpy()
+        }
+        if self.options['max_kwh'] is not None:
+            masks['absurd_consumption'] = (kwh > self.options['max_kwh']).to_numpy()
+        for rule, mask in masks.items():
+            self.counts[rule] += int(mask.sum())
+        
+        bad = np.logical_or.reduce(list(masks.values()))
+        if bad.any():
+            self._set_aside(chunk[bad], {rule: mask[bad] for rule, mask in masks.items()})
+        data = chunk[~bad].copy()
+        data['timestamp'] = timestamps[~bad]
+        data['consumption_kwh'] = kwh[~bad]
+        return self._repair(data)
+    
+    def _repair(self, data):
+        """Replace implausible rates and inconsistent costs; rates without a source are left for the median"""
+        if 'rate_per_kwh' not in data.columns:
+            return data
+        kwh = data['consumption_kwh'].to_numpy(dtype=float)
+        rate = pd.to_numeric(data['rate_per_kwh'], errors='coerce').to_numpy(dtype=float)
+        max_rate = self.options['max_rate']
+        
+        missing_rate = np.isnan(rate)
+        invalid_rate = ~missing_rate & ((rate < 0) | (rate > max_rate))
+        replace = missing_rate | invalid_rate
+        repaired = replace.copy()
+        
+        if 'cost' in data.columns:
+            cost = pd.to_numeric(data['cost'], errors='coerce').to_numpy(dtype=float)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                derived = np.where(kwh > 0, cost / kwh, np.nan)
+            derived[(derived < 0) | (derived > max_rate)] = np.nan
+            rate = np.where(replace, derived, rate)
+            
+            missing_cost = np.isnan(cost)
+            expected = kwh * rate
+            # Costs rounded to cents are consistent
+            mismatch = ~replace & ~missing_cost & (np.abs(cost - expected) > 0.01 + self.options['cost_tolerance'] * np.abs(expected))
+            cost = np.where(mismatch, expected, cost)
+            repaired |= missing_cost | mismatch
+            self.counts['missing_cost'] += int(missing_cost.sum())
+            self.counts['cost_mismatch'] += int(mismatch.sum())
+        else:
+            rate = np.where(replace, np.nan, rate)
+            cost = np.full(len(data), np.nan)
+        
+        self.counts['missing_rate'] += int(missing_rate.sum())
+        self.counts['invalid_rate'] += int(invalid_rate.sum())
+        self.repaired += int(repaired.sum())
+        data['rate_per_kwh'] = rate
+        data['cost'] = cost
+        return data
+    
+    def check_chunks(self, chunks):
+        """Check an iterable of frames (e.g. `read_chunks`) and return the cleaned data"""
+        frames = [self.check(chunk) for chunk in chunks]
+        data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['timestamp', 'consumption_kwh'])
+        
+        if self.options['duplicates'] and len(data):
+            keys = ['timestamp'] + [column for column in self.options['series_columns'] if column in data.columns]
+            duplicated = data.duplicated(keys, keep=self.options['duplicates']).to_numpy()
+            if duplicated.any():
+                self.counts['duplicate_timestamp'] += int(duplicated.sum())
+                self._set_aside(data[duplicated], {'duplicate_timestamp': np.ones(duplicated.sum(), dtype=bool)})
+                data = data[~duplicated].reset_index(drop=True)
+        
+        if 'rate_per_kwh' in data.columns:
+            data['rate_per_kwh'] = data['rate_per_kwh'].fillna(data['rate_per_kwh'].median())
+            data['cost'] = data['cost'].fillna(data['consumption_kwh'] * data['rate_per_kwh'])
+        self.rows_out = len(data)
+        return data
+    
+    def summary(self):
+        """One row per rule that found something: rows affected, share of the input and the action taken"""
+        rows = [{
+            'rule': rule,
+            'description': description,
+            'action': action,
+            'rows': self.counts[rule],
+            'share_pct': 100 * self.counts[rule] / self.rows_in if self.rows_in else 0.0
+        } for rule, (description, action) in RULES.items() if self.counts[rule]]
+        return pd.DataFrame(rows, columns=['rule', 'description', 'action', 'rows', 'share_pct'])
+    
+    def quarantine(self):
+        return pd.concat(self._quarantine, ignore_index=True) if self._quarantine else pd.DataFrame()
+    
+    def report(self):
+        return {
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'repaired': self.repaired,
+            'quarantined': self.quarantined,
+            'summary': self.summary(),
+            'quarantine': self.quarantine()
+        }
+
+def save_report(key, report):
+    with _REPORTS_LOCK:
+        _REPORTS[key] = report
+        _REPORTS.move_to_end(key)
+        while len(_REPORTS) > REPORT_CACHE_SIZE:
+            _REPORTS.popitem(last=False)
+
+def get_report(key):
+    """Report of an earlier check of the same file and settings, or None"""
+    with _REPORTS_LOCK:
+        report = _REPORTS.get(key)
+        if report is not None:
+            _REPORTS.move_to_end(key)
+        return report
+
+def show_quality_report(report):
+    """Counts, per-rule summary and quarantined rows of a check"""
+    st.subheader("Data Quality")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Rows Read", f"{report['rows_in']:,}")
+    with col2:
+        st.metric("Rows Kept", f"{report['rows_out']:,}")
+    with col3:
+        st.metric("Repaired", f"{report['repaired']:,}")
+    with col4:
+        st.metric("Quarantined", f"{report['quarantined']:,}")
+    
+    if report['summary'].empty:
+        st.success("No rule violations found.")
+        return
+    st.dataframe(report['summary'].round(2), use_container_width=True, hide_index=True)
+    
+    quarantine = report['quarantine']
+    if len(quarantine):
+        if len(quarantine) < report['quarantined']:
+            st.caption(f"The first {len(quarantine):,} of {report['quarantined']:,} quarantined rows are kept for download.")
+        st.download_button("Download Quarantined Rows", quarantine.to_csv(index=False),
+                           file_name="quarantine.csv", mime="text/csv")
\ No newline at end of file
@@ -0,0 +1,193 @@
+import pandas as pd
+import numpy as np
+from modules.frame_cache import frame_cache
+
+CHUNK_SIZE = 1_000_000
+
+# Partition states per dataset and partition column
+_PARTITIONS = frame_cache('partitioned_stats')
+
+class RunningStats:
+    """Mergeable count/sum/M2/min/max states for many groups at once.
+    
+    Element i of each array is the state of group i. States combine exactly with
+    Chan's parallel update, so statistics over any union of partitions (days,
+    locations, appended batches, worker results) come from merging their states
+    rather than rescanning the readings.
+    """
+    
+    def __init__(self, count, total, m2, minimum, maximum):
+        self.count = np.asarray(count, dtype=np.int64)
+        self.sum = np.asarray(total, dtype=float)
+        self.m2 = np.asarray(m2, dtype=float)
+        self.min = np.asarray(minimum, dtype=float)
+        self.max = np.asarray(maximum, dtype=float)
+    
+    @classmethod
+    def empty(cls, n_groups):
+        return cls(np.zeros(n_groups), np.zeros(n_groups), np.zeros(n_groups),
+                   np.full(n_groups, np.inf), np.full(n_groups, -np.inf))
+    
+    @classmethod
+    def from_values(cls, keys, values, n_groups, chunk_size=CHUNK_SIZE):
+        """States per integer key in a single pass over the values.
+        
+        Each chunk is reduced while it is in memory (mean first, then squared
+        deviations from it) and merged into the running result.
+        """
+        keys = np.asarray(keys)
+        values = np.asarray(values, dtype=float)
+        valid = ~np.isnan(values)
+        if not valid.all():
+            keys, values = keys[valid], values[valid]
+        
+        stats = cls.empty(n_groups)
+        for start in range(0, len(values), chunk_size):
+            chunk_keys = keys[start:start + chunk_size]
+            chunk = values[start:start + chunk_size]
+            
+            count = np.bincount(chunk_keys, minlength=n_groups)
+            total = np.bincount(chunk_keys, weights=chunk, minlength=n_groups)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = np.where(count > 0, total / count, 0.0)
+            m2 = np.bincount(chunk_keys, weights=(chunk - mean[chunk_keys]) ** 2, minlength=n_groups)
+            
+            extremes = pd.Series(chunk).groupby(chunk_keys).agg(['min', 'max'])
+            minimum = np.full(n_groups, np.inf)
+            maximum = np.full(n_groups, -np.inf)
+            minimum[extremes.index] = extremes['min'].to_numpy()
+            maximum[extremes.index] = extremes['max'].to_numpy()
+            
+            stats = stats.merge(cls(count, total, m2, minimum, maximum))
+        return stats
+    
+    def merge(self, other):
+        """Element-wise combination of two aligned sets of states"""
+        count = self.count + other.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = np.where((self.count > 0) & (other.count > 0),
+                             other.sum / other.count - self.sum / self.count, 0.0)
+            correction = np.where(count > 0, delta ** 2 * self.count * other.count / count, 0.0)
+        return RunningStats(count, self.sum + other.sum, self.m2 + other.m2 + correction,
+                            np.minimum(self.min, other.min), np.maximum(self.max, other.max))
+    
+    def reduce(self, groups, n_groups):
+        """Merge states into coarser groups, e.g. day states into months.
+        
+        `groups` maps each state to its output group (-1 drops it). This is the
+        multi-way form of Chan's update, applied to all output groups at once.
+        """
+        groups = np.asarray(groups)
+        keep = (groups >= 0) & (self.count > 0)
+        groups = groups[keep]
+        count, total, m2 = self.count[keep], self.sum[keep], self.m2[keep]
+        
+        merged_count = np.bincount(groups, weights=count, minlength=n_groups)
+        merged_sum = np.bincount(groups, weights=total, minlength=n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            merged_mean = np.where(merged_count > 0, merged_sum / merged_count, 0.0)
+        spread = count * (total / count - merged_mean[groups]) ** 2
+        merged_m2 = np.bincount(groups, weights=m2 + spread, minlength=n_groups)
+        
+        minimum = np.full(n_groups, np.inf)
+        maximum = np.full(n_groups, -np.inf)
+        np.minimum.at(minimum, groups, self.min[keep])
+        np.maximum.at(maximum, groups, self.max[keep])
+        return RunningStats(merged_count, merged_sum, merged_m2, minimum, maximum)
+    
+    def total(self):
+        """All states merged into a single one"""
+        return self.reduce(np.zeros(len(self.count), dtype=np.int64), 1)
+    
+    def __getitem__(self, index):
+        return RunningStats(self.count[index], self.sum[index], self.m2[index],
+                            self.min[index], self.max[index])
+    
+    def __len__(self):
+        return len(self.count)
+    
+    @property
+    def mean(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 0, self.sum / self.count, np.nan)
+    
+    def variance(self, ddof=1):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > ddof, self.m2 / (self.count - ddof), np.nan)
+    
+    def std(self, ddof=1):
+        return np.sqrt(self.variance(ddof))
+    
+    def to_frame(self, index=None):
+        return pd.DataFrame({
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.mean,
+            'std': self.std(),
+            'min': np.where(self.count > 0, self.min, np.nan),
+            'max': np.where(self.count > 0, self.max, np.nan)
+        }, index=index)
+
+class PartitionedStats:
+    """Consumption and cost states per day and partition (e.g. location)"""
+    
+    def __init__(self, data, partition_column='location'):
+        self.partition_column = partition_column if partition_column in data.columns else None
+        day_codes, self.days = pd.factorize(pd.DatetimeIndex(data['timestamp']).normalize(), sort=True)
+        if self.partition_column:
+            part_codes, self.partitions = pd.factorize(data[partition_column].fillna('Unknown'), sort=True)
+        else:
+            part_codes, self.partitions = np.zeros(len(data), dtype=np.int64), pd.Index(['All'])
+        
+        # State i belongs to day i // n_partitions and partition i % n_partitions
+        keys = day_codes * len(self.partitions) + part_codes
+        n_states = len(self.days) * len(self.partitions)
+        self.consumption = RunningStats.from_values(keys, data['consumption_kwh'].to_numpy(dtype=float), n_states)
+        self.cost = RunningStats.from_values(
+            keys, data['cost'].to_numpy(dtype=float) if 'cost' in data.columns else np.zeros(len(data)), n_states)
+    
+    def select(self, start=None, end=None, partitions=None):
+        """Output group per state: its day for states in the date range and partitions, else -1"""
+        day_index = np.repeat(np.arange(len(self.days)), len(self.partitions))
+        part_index = np.tile(np.arange(len(self.partitions)), len(self.days))
+        selected = np.ones(len(day_index), dtype=bool)
+        if start is not None:
+            selected &= (self.days >= pd.Timestamp(start))[day_index]
+        if end is not None:
+            selected &= (self.days <= pd.Timestamp(end))[day_index]
+        if partitions is not None:
+            selected &= self.partitions.isin(partitions)[part_index]
+        return np.where(selected, day_index, -1)
+    
+    def daily(self, start=None, end=None, partitions=None):
+        """Per-day consumption and cost states for the selection"""
+        groups = self.select(start, end, partitions)
+        return (self.consumption.reduce(groups, len(self.days)),
+                self.cost.reduce(groups, len(self.days)))
+    
+    def append(self, new_rows):
+        """States including newly arrived rows, without rescanning the existing data"""
+        batch = PartitionedStats(new_rows, self.partition_column or '')
+        days = self.days.union(batch.days)
+        partitions = self.partitions.union(batch.partitions)
+        result = PartitionedStats.__new__(PartitionedStats)
+        result.partition_column, result.days, result.partitions = self.partition_column, days, partitions
+        result.consumption = self._aligned(self.consumption, days, partitions).merge(
+            batch._aligned(batch.consumption, days, partitions))
+        result.cost = self._aligned(self.cost, days, partitions).merge(
+            batch._aligned(batch.cost, days, partitions))
+        return result
+    
+    def _aligned(self, stats, days, partitions):
+        """States re-laid out on a larger day x partition grid"""
+        day_index = np.repeat(days.get_indexer(self.days), len(self.partitions))
+        part_index = np.tile(partitions.get_indexer(self.partitions), len(self.days))
+        return stats.reduce(day_index * len(partitions) + part_index, len(days) * len(partitions))
+
+def get_partitioned_stats(data, partition_column='location'):
+    """Partition states for a dataset, computed once for as long as that dataset object lives"""
+    return _PARTITIONS.get(data, lambda: PartitionedStats(data, partition_column), partition_column)
+
+def carry_forward_stats(old_data, new_data, new_rows):
+    """Reuse partition states of `old_data` for `new_data` = old_data + new_rows"""
+    _PARTITIONS.carry_forward(old_data, new_data, lambda stats: stats.append(new_rows))
\ No newline at end of file
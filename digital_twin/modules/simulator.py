@@ -0,0 +1,200 @@
+import os
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from modules.frame_cache import frame_cache
+
+PARALLEL_MIN_WORK = 5_000_000
+
+# Candidate changes evaluated for the savings recommendations. Each scenario is a
+# list of changes applied to the full interval history:
+#   shift     - move `fraction` of matching load in `window` (start, end hour) to `target`
+#   reduce    - cut matching load by `fraction`, optionally only within `window`
+#   tariff    - price the result with a different TariffEngine
+# Changes match rows by `category` and/or `device`.
+RECOMMENDED_SCENARIOS = [
+    {
+        'name': 'Shift HVAC load out of peak hours',
+        'tip': 'Pre-cool before 16:00 and move 20% of HVAC load out of the 16-20h peak',
+        'changes': [{'type': 'shift', 'category': 'HVAC', 'fraction': 0.2, 'window': (16, 21), 'target': (12, 16)}]
+    },
+    {
+        'name': 'Upgrade lighting to high-efficiency LEDs',
+        'tip': 'Replace remaining lighting with high-efficiency LED fixtures (-50% lighting load)',
+        'changes': [{'type': 'reduce', 'category': 'Lighting', 'fraction': 0.5}]
+    },
+    {
+        'name': 'Use programmable thermostats',
+        'tip': 'Set back HVAC outside working hours (-30% HVAC load from 20h to 6h)',
+        'changes': [{'type': 'reduce', 'category': 'HVAC', 'fraction': 0.3, 'window': (20, 6)}]
+    },
+    {
+        'name': 'Switch off idle equipment overnight',
+        'tip': 'Unplug or schedule equipment off from 22h to 6h (-50% overnight equipment load)',
+        'changes': [{'type': 'reduce', 'category': 'Equipment', 'fraction': 0.5, 'window': (22, 6)}]
+    },
+    {
+        'name': 'Replace equipment with efficient models',
+        'tip': 'Replace equipment with energy-efficient models (-25% equipment load)',
+        'changes': [{'type': 'reduce', 'category': 'Equipment', 'fraction': 0.25}]
+    }
+]
+
+# Every recommendation at once; simulated together since the changes overlap
+ALL_RECOMMENDATIONS = {
+    'name': 'All recommendations',
+    'changes': [change for scenario in RECOMMENDED_SCENARIOS for change in scenario['changes']]
+}
+
+# Savings of the recommendations per dataset, once simulated
+_RECOMMENDED_SAVINGS = frame_cache('recommended_savings')
+
+class WhatIfSimulator:
+    """Apply candidate changes to the interval history and re-cost it"""
+    
+    def __init__(self, data, tariff=None):
+        self.tariff = tariff
+        
+        # Extract the columns every scenario needs once; only these arrays (not
+        # the frame) are sent to worker processes
+        self.timestamps = data['timestamp'].to_numpy()
+        timestamps = pd.DatetimeIndex(self.timestamps)
+        self.kwh = data['consumption_kwh'].to_numpy(dtype=float)
+        self.rates = data['rate_per_kwh'].to_numpy(dtype=float) if 'rate_per_kwh' in data.columns else None
+        self.hours = timestamps.hour.to_numpy()
+        self.columns = {
+            column: data[column].to_numpy()
+            for column in ['category', 'device', 'location'] if column in data.columns
+        }
+        
+        # Shifted load stays at its site and day: one code per (day, location)
+        day_codes = pd.factorize(timestamps.normalize())[0]
+        if 'location' in self.columns:
+            site_codes, sites = pd.factorize(self.columns['location'], use_na_sentinel=False)
+            day_codes = day_codes * len(sites) + site_codes
+        self.site_day_codes = day_codes
+        self.n_site_days = day_codes.max() + 1 if len(day_codes) else 0
+        self.baseline = self._price(self.kwh, self.tariff)
+    
+    def _hour_mask(self, window):
+        """Rows whose hour falls in [start, end); windows may wrap past midnight"""
+        start, end = window
+        if start <= end:
+            return (self.hours >= start) & (self.hours < end)
+        return (self.hours >= start) | (self.hours < end)
+    
+    def _row_mask(self, change):
+        """Rows matched by a change's category/device filters and hour window"""
+        mask = np.ones(len(self.kwh), dtype=bool)
+        for column in ['category', 'device']:
+            if change.get(column) is not None:
+                if column not in self.columns:
+                    return np.zeros(len(self.kwh), dtype=bool)
+                mask &= self.columns[column] == change[column]
+        if change.get('window') is not None:
+            mask &= self._hour_mask(change['window'])
+        return mask
+    
+    def _price(self, kwh, tariff):
+        """Total cost of a consumption vector under a tariff, or at the recorded rates"""
+        if tariff is None:
+            if self.rates is None:
+                raise ValueError("Data has no rate_per_kwh column; a tariff is required")
+            return float(np.nansum(kwh * self.rates))
+        
+        frame = pd.DataFrame({'timestamp': self.timestamps, 'consumption_kwh': kwh})
+        if 'location' not in self.columns:
+            return float(tariff.monthly_bill(frame).total_cost.sum())
+        
+        # Demand charges and tiers apply per site, as on each site's own bill
+        frame['location'] = self.columns['location']
+        return float(tariff.monthly_bill(frame, by='location').total_cost.sum())
+    
+    def apply(self, changes):
+        """Consumption vector after applying the changes, plus the tariff to price it with"""
+        kwh = self.kwh.copy()
+        tariff = self.tariff
+        
+        for change in changes:
+            if change['type'] == 'tariff':
+                tariff = change['tariff']
+            elif change['type'] == 'reduce':
+                kwh[self._row_mask(change)] *= 1 - change['fraction']
+            elif change['type'] == 'shift':
+                kwh = self._shift(kwh, change)
+            else:
+                raise ValueError(f"Unknown change type: {change['type']}")
+        
+        return kwh, tariff
+    
+    def _shift(self, kwh, change):
+        """Move a fraction of matching load into the target hours of the same site and day"""
+        source = self._row_mask(change)
+        moved = np.where(source, kwh * change['fraction'], 0.0)
+        
+        # Spread each site-day's moved energy evenly over its target-hour rows
+        target_filter = {key: value for key, value in change.items() if key in ('category', 'device')}
+        target = self._row_mask(dict(target_filter, window=change['target']))
+        codes = self.site_day_codes
+        moved_per_day = np.bincount(codes, weights=moved, minlength=self.n_site_days)
+        targets_per_day = np.bincount(codes, weights=target, minlength=self.n_site_days)
+        
+        # Site-days without any target rows keep their load where it was
+        shiftable = targets_per_day[codes] > 0
+        moved = np.where(shiftable, moved, 0.0)
+        moved_per_day = np.where(targets_per_day > 0, moved_per_day, 0.0)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            added_per_row = np.where(target, moved_per_day[codes] / targets_per_day[codes], 0.0)
+        return kwh - moved + added_per_row
+    
+    def run(self, scenario):
+        """Savings of one scenario against the baseline history"""
+        kwh, tariff = self.apply(scenario['changes'])
+        cost = self._price(kwh, tariff)
+        
+        return {
+            'scenario': scenario.get('name', 'Scenario'),
+            'baseline_kwh': self.kwh.sum(),
+            'scenario_kwh': kwh.sum(),
+            'baseline_cost': self.baseline,
+            'scenario_cost': cost,
+            'savings': self.baseline - cost,
+            'savings_pct': (self.baseline - cost) / self.baseline * 100 if self.baseline else 0.0
+        }
+    
+    def run_many(self, scenarios, max_workers=None):
+        """Evaluate many scenarios, in worker processes when the set is large"""
+        max_workers = max_workers or os.cpu_count() or 1
+        
+        # Process start-up only pays off once scenarios x rows is large
+        if len(scenarios) * len(self.kwh) < PARALLEL_MIN_WORK or max_workers == 1:
+            results = [self.run(scenario) for scenario in scenarios]
+        else:
+            # Each worker receives the simulator (and its arrays) once, not per scenario
+            chunksize = max(1, len(scenarios) // (max_workers * 4))
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(self,)) as executor:
+                results = list(executor.map(_run_in_worker, scenarios, chunksize=chunksize))
+        
+        return pd.DataFrame(results)
+
+def recommended_savings(data, simulate=False):
+    """Savings of each recommended scenario, then of all of them, on `data`'s history.
+    
+    None until simulated: with `simulate` the first call runs the scenarios,
+    and every session viewing the same dataset shares the results.
+    """
+    savings = _RECOMMENDED_SAVINGS.get(data, dict)
+    if 'results' not in savings and simulate:
+        savings['results'] = WhatIfSimulator(data).run_many(RECOMMENDED_SCENARIOS + [ALL_RECOMMENDATIONS])
+    return savings.get('results')
+
+_worker_simulator = None
+
+def _init_worker(simulator):
+    global _worker_simulator
+    _worker_simulator = simulator
+
+def _run_in_worker(scenario):
+    return _worker_simulator.run(scenario)
\ No newline at end of file
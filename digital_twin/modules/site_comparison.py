@@ -0,0 +1,203 @@
+import os
+import time
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from modules.frame_cache import frame_cache
+
+PARALLEL_MIN_ROWS = 2_000_000
+SITES_PER_TASK = 64
+
+METRICS = {
+    'total_kwh': 'Total Consumption (kWh)',
+    'cost_per_kwh': 'Cost per kWh ($)',
+    'avg_kw': 'Average Demand (kW)',
+    'peak_kw': 'Peak Demand (kW)',
+    'peak_ratio': 'Peak-to-Average Ratio',
+    'night_share': 'Night Share (22-6h)'
+}
+
+# Site comparisons per dataset
+_COMPARISONS = frame_cache('site_comparisons')
+
+class SiteComparison:
+    """Per-site profiles and benchmarks for many sites.
+    
+    Readings are sorted by site once, so each site is a contiguous slice of a few
+    flat arrays. Batches of sites are profiled in a thread or process pool that
+    reads those arrays in place (shared memory for processes) instead of
+    receiving a pickled copy of the frame.
+    """
+    
+    def __init__(self, data, site_column='location'):
+        if site_column in data.columns:
+            site_codes, self.sites = pd.factorize(data[site_column].fillna('Unknown'), sort=True)
+        else:
+            site_codes, self.sites = np.zeros(len(data), dtype=np.int64), pd.Index(['All Sites'])
+        
+        seconds = pd.DatetimeIndex(data['timestamp']).asi8 // 10**9
+        order = np.lexsort((seconds, site_codes))
+        self.arrays = {
+            'seconds': seconds[order],
+            'kwh': data['consumption_kwh'].to_numpy(dtype=float)[order],
+            'cost': (data['cost'].to_numpy(dtype=float) if 'cost' in data.columns else np.zeros(len(data)))[order]
+        }
+        self.offsets = np.searchsorted(site_codes[order], np.arange(len(self.sites) + 1))
+        
+        gaps = np.diff(np.unique(self.arrays['seconds']))
+        self.interval_seconds = int(np.median(gaps)) if len(gaps) else 3600
+        self._profiles = None
+        self.last_run = None
+    
+    def _tasks(self):
+        return [(start, min(start + SITES_PER_TASK, len(self.sites)))
+                for start in range(0, len(self.sites), SITES_PER_TASK)]
+    
+    def compute(self, mode='auto', max_workers=None):
+        """Metrics and 24-hour profiles for every site.
+        
+        `mode` is 'serial', 'thread', 'process' or 'auto' (processes once the
+        data is large enough to repay the start-up cost).
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        if mode == 'auto':
+            large = len(self.arrays['kwh']) >= PARALLEL_MIN_ROWS and max_workers > 1
+            mode = 'process' if large else 'serial'
+        
+        started = time.perf_counter()
+        tasks = self._tasks()
+        if mode == 'serial' or len(tasks) == 1:
+            mode = 'serial'
+            results = [_profile_sites(self.arrays, self.offsets, self.interval_seconds, task) for task in tasks]
+        elif mode == 'thread':
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(
+                    lambda task: _profile_sites(self.arrays, self.offsets, self.interval_seconds, task), tasks))
+        else:
+            results = self._compute_in_processes(tasks, max_workers)
+        
+        metrics = pd.concat([result[0] for result in results], ignore_index=True)
+        metrics.index = pd.Index(self.sites, name='site')
+        profiles = pd.DataFrame(np.vstack([result[1] for result in results]),
+                                index=metrics.index, columns=range(24))
+        self._profiles = (metrics, profiles)
+        self.last_run = (mode, time.perf_counter() - started)
+        return metrics, profiles
+    
+    def _compute_in_processes(self, tasks, max_workers):
+        """Run the tasks in worker processes attached to shared copies of the arrays"""
+        blocks = {}
+        try:
+            for name, values in self.arrays.items():
+                block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+                blocks[name] = block
+            
+            layout = {name: (blocks[name].name, values.shape, values.dtype.str) for name, values in self.arrays.items()}
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(layout, self.offsets, self.interval_seconds)) as executor:
+                return list(executor.map(_profile_in_worker, tasks))
+        finally:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+    
+    @property
+    def profiles(self):
+        if self._profiles is None:
+            self.compute()
+        return self._profiles
+    
+    def rank(self, metric, ascending=False):
+        """Sites ordered by a metric, with their rank and percentile among all sites"""
+        metrics = self.profiles[0]
+        ranked = metrics.sort_values(metric, ascending=ascending).copy()
+        ranked.insert(0, 'rank', np.arange(1, len(ranked) + 1))
+        ranked['percentile'] = metrics[metric].rank(pct=True).reindex(ranked.index) * 100
+        return ranked
+    
+    def cluster(self, n_clusters=4, random_state=42):
+        """Group sites with similar daily load shapes (KMeans on normalized profiles)"""
+        from sklearn.cluster import KMeans
+        
+        metrics, profiles = self.profiles
+        usable = profiles.notna().all(axis=1).to_numpy()
+        labels = np.full(len(profiles), -1)
+        if not usable.any():
+            # No site has consumption to take a shape from: nothing to cluster
+            return pd.Series(labels, index=profiles.index, name='cluster'), pd.DataFrame(columns=range(24), dtype=float)
+        n_clusters = min(n_clusters, int(usable.sum()))
+        
+        # Hourly shares plus a scaled peak ratio, so clusters reflect shape and peakiness
+        features = np.column_stack([profiles.to_numpy()[usable],
+                                    np.log1p(metrics['peak_ratio'].to_numpy()[usable]) / 24])
+        model = KMeans(n_clusters=n_clusters, n_init=10, random_state=random_state).fit(features)
+        
+        labels[usable] = model.labels_
+        centroids = pd.DataFrame(model.cluster_centers_[:, :24], columns=range(24))
+        return pd.Series(labels, index=profiles.index, name='cluster'), centroids
+
+def _profile_sites(arrays, offsets, interval_seconds, task):
+    """Metrics and hour-of-day consumption shares for the sites in [start, end)"""
+    start, end = task
+    lo, hi = offsets[start], offsets[end]
+    seconds, kwh, cost = arrays['seconds'][lo:hi], arrays['kwh'][lo:hi], arrays['cost'][lo:hi]
+    n_sites = end - start
+    local = np.repeat(np.arange(n_sites), np.diff(offsets[start:end + 1]))
+    
+    total_kwh = np.bincount(local, weights=kwh, minlength=n_sites)
+    total_cost = np.bincount(local, weights=cost, minlength=n_sites)
+    hours = (seconds // 3600) % 24
+    hourly = np.bincount(local * 24 + hours, weights=kwh, minlength=n_sites * 24).reshape(n_sites, 24)
+    night = hourly[:, [22, 23, 0, 1, 2, 3, 4, 5]].sum(axis=1)
+    
+    # Site load per interval: readings sharing a timestamp are summed
+    new_interval = np.r_[True, (local[1:] != local[:-1]) | (seconds[1:] != seconds[:-1])] if len(local) else local.astype(bool)
+    starts = np.flatnonzero(new_interval)
+    interval_kw = (np.add.reduceat(kwh, starts) if len(starts) else kwh) / (interval_seconds / 3600)
+    interval_site = local[starts]
+    peak_kw = np.full(n_sites, np.nan)
+    np.fmax.at(peak_kw, interval_site, interval_kw)
+    
+    # Average demand over each site's metered span
+    first = np.full(n_sites, np.nan)
+    last = np.full(n_sites, np.nan)
+    present = np.diff(offsets[start:end + 1]) > 0
+    first[present] = seconds[offsets[start:end][present] - lo]
+    last[present] = seconds[offsets[start + 1:end + 1][present] - lo - 1]
+    hours_metered = (last - first + interval_seconds) / 3600
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_kw = total_kwh / hours_metered
+        metrics = pd.DataFrame({
+            'total_kwh': total_kwh,
+            'total_cost': total_cost,
+            'cost_per_kwh': total_cost / total_kwh,
+            'avg_kw': avg_kw,
+            'peak_kw': peak_kw,
+            'peak_ratio': peak_kw / avg_kw,
+            'night_share': night / total_kwh
+        })
+        profiles = hourly / total_kwh[:, None]
+    return metrics, profiles
+
+_worker_state = {}
+
+def _init_worker(layout, offsets, interval_seconds):
+    blocks = {name: shared_memory.SharedMemory(name=block_name) for name, (block_name, _, _) in layout.items()}
+    _worker_state['blocks'] = blocks
+    _worker_state['arrays'] = {
+        name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=blocks[name].buf)
+        for name, (_, shape, dtype) in layout.items()
+    }
+    _worker_state['offsets'] = offsets
+    _worker_state['interval_seconds'] = interval_seconds
+
+def _profile_in_worker(task):
+    return _profile_sites(_worker_state['arrays'], _worker_state['offsets'],
+                          _worker_state['interval_seconds'], task)
+
+def get_site_comparison(data):
+    """Site comparison for a dataset, built once for as long as that dataset object lives"""
+    return _COMPARISONS.get(data, lambda: SiteComparison(data))
\ No newline at end of file
@@ -0,0 +1,218 @@
+import copy
+import pandas as pd
+import numpy as np
+from modules.frame_cache import frame_cache
+
+RELATIVE_ACCURACY = 0.01
+MIN_VALUE = 1e-9
+ZERO_BUCKET = np.iinfo(np.int32).min
+
+# Load sketches per dataset
+_SKETCHES = frame_cache('load_sketches')
+
+class QuantileSketch:
+    """Mergeable relative-error quantile sketch (DDSketch) for many groups at once.
+    
+    Values fall into logarithmic buckets whose width is a fixed fraction of the
+    value, so each quantile is returned within `relative_accuracy` of the value
+    at that rank. Merging is adding bucket counts, which makes sketches per site,
+    category and month combine exactly into any coarser selection.
+    """
+    
+    def __init__(self, keys, buckets, counts, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.keys, self.buckets, self.counts = self._consolidate(
+            np.asarray(keys, dtype=np.int64), np.asarray(buckets, dtype=np.int32), np.asarray(counts, dtype=float))
+    
+    @classmethod
+    def from_values(cls, keys, values, relative_accuracy=RELATIVE_ACCURACY):
+        """Sketch of the values per integer key (negative keys are skipped)"""
+        keys = np.asarray(keys, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        valid = (keys >= 0) & ~np.isnan(values)
+        keys, values = keys[valid], values[valid]
+        
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            buckets = np.ceil(np.log(values) / np.log(gamma))
+        buckets = np.where(values > MIN_VALUE, buckets, ZERO_BUCKET).astype(np.int32)
+        return cls(keys, buckets, np.ones(len(values)), relative_accuracy)
+    
+    @staticmethod
+    def _consolidate(keys, buckets, counts):
+        """Sort entries by (key, bucket) and add up duplicates"""
+        if not len(keys):
+            return keys, buckets, counts
+        # Pack (key, bucket) into one int64 so the distinct entries come from a single hash pass
+        packed = (keys << 32) | (buckets.astype(np.int64) - ZERO_BUCKET)
+        codes, uniques = pd.factorize(packed, sort=True)
+        counts = np.bincount(codes, weights=counts, minlength=len(uniques))
+        return uniques >> 32, ((uniques & 0xFFFFFFFF) + ZERO_BUCKET).astype(np.int32), counts
+    
+    def merge(self, other):
+        """Sketch holding the values of both sketches (keys must mean the same groups)"""
+        return QuantileSketch(np.r_[self.keys, other.keys], np.r_[self.buckets, other.buckets],
+                              np.r_[self.counts, other.counts], self.relative_accuracy)
+    
+    def regroup(self, mapping):
+        """Merge groups: `mapping[key]` is the new key of each group (-1 drops it)"""
+        new_keys = np.asarray(mapping, dtype=np.int64)[self.keys]
+        keep = new_keys >= 0
+        return QuantileSketch(new_keys[keep], self.buckets[keep], self.counts[keep], self.relative_accuracy)
+    
+    def _values(self, buckets):
+        """Representative value of each bucket (zero for the zero bucket)"""
+        values = 2 * self.gamma ** buckets.astype(float) / (self.gamma + 1)
+        return np.where(buckets == ZERO_BUCKET, 0.0, values)
+    
+    def counts_per_key(self, n_keys):
+        return np.bincount(self.keys, weights=self.counts, minlength=n_keys)
+    
+    def quantiles(self, qs, n_keys):
+        """Array of shape (n_keys, len(qs)) with each group's quantiles (NaN if empty)"""
+        qs = np.atleast_1d(np.asarray(qs, dtype=float))
+        totals = self.counts_per_key(n_keys)
+        cumulative = np.cumsum(self.counts)
+        before = np.cumsum(totals) - totals
+        
+        # Rank of each quantile inside its group, shifted by the counts of all earlier groups
+        targets = before[:, None] + qs[None, :] * np.maximum(totals[:, None] - 1, 0)
+        positions = np.searchsorted(cumulative, targets, side='right')
+        positions = np.minimum(positions, len(cumulative) - 1)
+        
+        result = self._values(self.buckets[positions]) if len(cumulative) else np.full(targets.shape, np.nan)
+        result[totals == 0] = np.nan
+        return result
+
+class LoadSketches:
+    """Demand (kW) sketches per site/month and per site/category/month.
+    
+    Site sketches hold each site's total load per interval, which is what a
+    load-duration curve ranks; category sketches hold the load of each category
+    at each site. Both merge into any selection of sites, categories and months.
+    """
+    
+    def __init__(self, data, site_column='location', category_column='category',
+                 relative_accuracy=RELATIVE_ACCURACY):
+        self.site_column = site_column if site_column in data.columns else None
+        self.category_column = category_column if category_column in data.columns else None
+        self.relative_accuracy = relative_accuracy
+        self.interval_hours = self._infer_interval(data)
+        self.sites = pd.Index([])
+        self.categories = pd.Index([])
+        self.months = pd.PeriodIndex([], freq='M')
+        self.site_sketch = QuantileSketch([], [], [], relative_accuracy)
+        self.category_sketch = QuantileSketch([], [], [], relative_accuracy)
+        self.append(data)
+    
+    @staticmethod
+    def _infer_interval(data):
+        """Typical reading spacing in hours"""
+        gaps = np.diff(np.unique(pd.DatetimeIndex(data['timestamp']).asi8))
+        return float(np.median(gaps)) / 3.6e12 if len(gaps) else 1.0
+    
+    def _codes(self, values, attribute):
+        """Codes of values in a growing label index; new labels are appended"""
+        labels = getattr(self, attribute)
+        uniques = pd.Index(pd.unique(values))
+        added = uniques.difference(labels, sort=False)
+        if len(added):
+            labels = labels.append(added.sort_values())
+            setattr(self, attribute, labels)
+        return labels.get_indexer(values)
+    
+    def _remap(self, sketch, old_shape, new_shape):
+        """Re-key a sketch after its label indexes have grown"""
+        if old_shape == new_shape or not len(sketch.keys):
+            return sketch
+        index = np.unravel_index(np.arange(np.prod(old_shape)), old_shape)
+        return sketch.regroup(np.ravel_multi_index(index, new_shape))
+    
+    def append(self, new_rows):
+        """Fold newly arrived rows into the sketches; their intervals are assumed new"""
+        if new_rows.empty:
+            return
+        old_site_shape = (len(self.sites), len(self.months))
+        old_category_shape = (len(self.sites), len(self.categories), len(self.months))
+        
+        timestamps = pd.DatetimeIndex(new_rows['timestamp'])
+        sites = new_rows[self.site_column].fillna('Unknown').to_numpy() if self.site_column else np.full(len(new_rows), 'All Sites')
+        categories = new_rows[self.category_column].fillna('Other').to_numpy() if self.category_column else np.full(len(new_rows), 'All')
+        site_codes = self._codes(sites, 'sites')
+        category_codes = self._codes(categories, 'categories')
+        month_codes = self._codes(timestamps.to_period('M'), 'months')
+        ts_codes = pd.factorize(timestamps.asi8)[0]
+        kw = new_rows['consumption_kwh'].to_numpy(dtype=float) / self.interval_hours
+        
+        n_sites, n_categories, n_months = len(self.sites), len(self.categories), len(self.months)
+        self.site_sketch = self._remap(self.site_sketch, old_site_shape, (n_sites, n_months))
+        self.category_sketch = self._remap(self.category_sketch, old_category_shape, (n_sites, n_categories, n_months))
+        
+        # Total load per (site, interval) and per (site, category, interval)
+        site_keys, site_load = self._interval_load(site_codes, ts_codes, month_codes, kw, n_months)
+        self.site_sketch = self.site_sketch.merge(
+            QuantileSketch.from_values(site_keys, site_load, self.relative_accuracy))
+        
+        category_keys, category_load = self._interval_load(site_codes * n_categories + category_codes,
+                                                           ts_codes, month_codes, kw, n_months)
+        self.category_sketch = self.category_sketch.merge(
+            QuantileSketch.from_values(category_keys, category_load, self.relative_accuracy))
+    
+    @staticmethod
+    def _interval_load(group_codes, ts_codes, month_codes, kw, n_months):
+        """Summed load per (group, interval), keyed by group * n_months + month"""
+        codes, uniques = pd.factorize(group_codes.astype(np.int64) * (ts_codes.max() + 1) + ts_codes)
+        load = np.bincount(codes, weights=kw, minlength=len(uniques))
+        # Month of each (group, interval) from any of its rows
+        first_row = np.empty(len(uniques), dtype=np.int64)
+        first_row[codes] = np.arange(len(codes))
+        return (uniques // (ts_codes.max() + 1)) * n_months + month_codes[first_row], load
+    
+    def _selection(self, sites=None, categories=None, months=None):
+        """Per-site sketch for the selected sites, categories (None = whole site) and months"""
+        site_mask = np.ones(len(self.sites), dtype=bool) if sites is None else self.sites.isin(sites)
+        month_mask = np.ones(len(self.months), dtype=bool) if months is None else self.months.isin(months)
+        
+        if categories is None:
+            site_index, month_index = np.unravel_index(np.arange(len(self.sites) * len(self.months)),
+                                                       (len(self.sites), len(self.months)))
+            keep = site_mask[site_index] & month_mask[month_index]
+            return self.site_sketch.regroup(np.where(keep, site_index, -1))
+        
+        category_mask = self.categories.isin(categories)
+        site_index, category_index, month_index = np.unravel_index(
+            np.arange(len(self.sites) * len(self.categories) * len(self.months)),
+            (len(self.sites), len(self.categories), len(self.months)))
+        keep = site_mask[site_index] & category_mask[category_index] & month_mask[month_index]
+        return self.category_sketch.regroup(np.where(keep, site_index, -1))
+    
+    def percentiles(self, percentiles=(50, 95, 99), sites=None, categories=None, months=None):
+        """Percentile demand (kW) per site for the selection"""
+        sketch = self._selection(sites, categories, months)
+        values = sketch.quantiles(np.asarray(percentiles) / 100, len(self.sites))
+        table = pd.DataFrame(values, index=pd.Index(self.sites, name='site'),
+                             columns=[f'P{p:g}_kw' for p in percentiles])
+        table.insert(0, 'intervals', sketch.counts_per_key(len(self.sites)).astype(int))
+        return table[table['intervals'] > 0]
+    
+    def load_duration(self, sites=None, categories=None, months=None, points=201):
+        """Load-duration curves: demand exceeded for each share of the time, per site"""
+        exceeded = np.linspace(0, 100, points)
+        sketch = self._selection(sites, categories, months)
+        values = sketch.quantiles(1 - exceeded / 100, len(self.sites))
+        present = sketch.counts_per_key(len(self.sites)) > 0
+        curves = pd.DataFrame(values[present], index=self.sites[present], columns=exceeded)
+        return curves.rename_axis(index='site', columns='percent_of_time').stack().rename('demand_kw').reset_index()
+
+def get_load_sketches(data):
+    """Load sketches for a dataset, built once for as long as that dataset object lives"""
+    return _SKETCHES.get(data, lambda: LoadSketches(data))
+
+def carry_forward_sketches(old_data, new_data, new_rows):
+    """Reuse the sketches of `old_data` for `new_data` = old_data + new_rows"""
+    def extend(sketches):
+        sketches = copy.deepcopy(sketches)
+        sketches.append(new_rows)
+        return sketches
+    _SKETCHES.carry_forward(old_data, new_data, extend)
\ No newline at end of file
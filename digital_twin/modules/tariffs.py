@@ -0,0 +1,337 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+WEEKDAYS = [0, 1, 2, 3, 4]
+ALL_DAYS = [0, 1, 2, 3, 4, 5, 6]
+
+# Example commercial time-of-use tariff. Hours are hour-of-day (0-23),
+# weekdays follow pandas (Monday=0) and months are calendar months (1-12).
+DEFAULT_TARIFF = {
+    'name': 'Commercial TOU',
+    'seasons': [
+        {
+            'name': 'Summer',
+            'months': [6, 7, 8, 9],
+            'base_rate': 0.13,
+            'demand_charge_per_kw': 14.0,
+            'periods': [
+                {'name': 'Peak', 'hours': [16, 17, 18, 19, 20], 'weekdays': WEEKDAYS, 'rate': 0.20},
+                {'name': 'Off-Peak', 'hours': [22, 23, 0, 1, 2, 3, 4, 5], 'weekdays': ALL_DAYS, 'rate': 0.08}
+            ]
+        },
+        {
+            'name': 'Winter',
+            'months': [1, 2, 3, 4, 5, 10, 11, 12],
+            'base_rate': 0.12,
+            'demand_charge_per_kw': 10.0,
+            'periods': [
+                {'name': 'Peak', 'hours': [16, 17, 18, 19, 20], 'weekdays': WEEKDAYS, 'rate': 0.18},
+                {'name': 'Off-Peak', 'hours': [22, 23, 0, 1, 2, 3, 4, 5], 'weekdays': ALL_DAYS, 'rate': 0.08}
+            ]
+        }
+    ],
+    # Blocks are per billing month; the adder applies to energy within the block
+    'tiers': [
+        {'up_to_kwh': 2000, 'adder': 0.0},
+        {'up_to_kwh': None, 'adder': 0.02}
+    ],
+    'fixed_monthly_charge': 0.0
+}
+
+class TariffEngine:
+    """Vectorized tariff engine for time-of-use, seasonal, tiered and demand pricing.
+    
+    Rates are resolved through a (month, weekday, hour) lookup table, so pricing
+    an interval dataset is a single gather over the rows regardless of how many
+    seasons and periods the tariff defines.
+    """
+    
+    BASE_PERIOD = 'Base'
+    
+    def __init__(self, tariff):
+        self.tariff = tariff
+        self.name = tariff.get('name', 'Custom Tariff')
+        self.tiers = tariff.get('tiers') or []
+        self.fixed_monthly_charge = tariff.get('fixed_monthly_charge', 0.0)
+        
+        self.period_names = [self.BASE_PERIOD]
+        for season in tariff['seasons']:
+            for period in season.get('periods', []):
+                if period['name'] not in self.period_names:
+                    self.period_names.append(period['name'])
+        
+        self.rate_table, self.period_table, self.demand_rates = self._build_tables()
+    
+    @classmethod
+    def flat(cls, rate, name='Flat Rate'):
+        """Build a single-rate tariff"""
+        return cls({
+            'name': name,
+            'seasons': [{'name': 'All Year', 'months': list(range(1, 13)), 'base_rate': rate, 'periods': []}]
+        })
+    
+    @classmethod
+    def from_rates(cls, base_rate, peak_rate, off_peak_rate,
+                   peak_hours=range(16, 21), off_peak_hours=(22, 23, 0, 1, 2, 3, 4, 5),
+                   peak_weekdays=WEEKDAYS, tiers=None, demand_charge_per_kw=0.0,
+                   fixed_monthly_charge=0.0):
+        """Build a year-round TOU tariff from simple peak/off-peak/base rates"""
+        return cls({
+            'name': 'Time-of-Use',
+            'seasons': [{
+                'name': 'All Year',
+                'months': list(range(1, 13)),
+                'base_rate': base_rate,
+                'demand_charge_per_kw': demand_charge_per_kw,
+                'periods': [
+                    {'name': 'Peak', 'hours': list(peak_hours), 'weekdays': list(peak_weekdays), 'rate': peak_rate},
+                    {'name': 'Off-Peak', 'hours': list(off_peak_hours), 'weekdays': ALL_DAYS, 'rate': off_peak_rate}
+                ]
+            }],
+            'tiers': tiers or [],
+            'fixed_monthly_charge': fixed_monthly_charge
+        })
+    
+    def _build_tables(self):
+        """Expand the tariff definition into (month, weekday, hour) lookup tables"""
+        rate_table = np.full((12, 7, 24), np.nan)
+        period_table = np.zeros((12, 7, 24), dtype=np.int8)
+        demand_rates = np.zeros(12)
+        
+        for season in self.tariff['seasons']:
+            months = np.asarray(season['months']) - 1
+            rate_table[months] = season['base_rate']
+            period_table[months] = 0
+            demand_rates[months] = season.get('demand_charge_per_kw', 0.0)
+            
+            # Later periods take precedence where windows overlap
+            for period in season.get('periods', []):
+                code = self.period_names.index(period['name'])
+                days = np.asarray(period.get('weekdays', ALL_DAYS))
+                hours = np.asarray(period['hours'])
+                m, d, h = np.ix_(months, days, hours)
+                rate_table[m, d, h] = period['rate']
+                period_table[m, d, h] = code
+        
+        if np.isnan(rate_table).any():
+            missing = sorted(set(np.where(np.isnan(rate_table))[0] + 1))
+            raise ValueError(f"Tariff '{self.name}' has no season covering months {missing}")
+        
+        return rate_table, period_table, demand_rates
+    
+    def _calendar_fields(self, timestamps):
+        """Billing month (months since epoch), weekday and hour as integer arrays"""
+        ts = pd.DatetimeIndex(timestamps)
+        if ts.tz is not None:
+            ts = ts.tz_localize(None)  # TOU windows follow local wall-clock time
+        values = ts.values
+        epoch_days = values.astype('datetime64[D]').astype(np.int64)
+        month_key = values.astype('datetime64[M]').astype(np.int64)
+        weekday = (epoch_days + 3) % 7  # 1970-01-01 was a Thursday
+        hour = (values - values.astype('datetime64[D]')).astype('timedelta64[h]').astype(np.int64)
+        return month_key, weekday, hour
+    
+    def _slot_index(self, month_key, weekday, hour):
+        """Flat index into the (month, weekday, hour) lookup tables"""
+        return ((month_key % 12) * 7 + weekday) * 24 + hour
+    
+    def energy_rates(self, timestamps):
+        """TOU/seasonal energy rate ($/kWh) for each timestamp"""
+        return self.rate_table.ravel()[self._slot_index(*self._calendar_fields(timestamps))]
+    
+    def periods(self, timestamps):
+        """TOU period name for each timestamp as a categorical"""
+        codes = self.period_table.ravel()[self._slot_index(*self._calendar_fields(timestamps))]
+        return pd.Categorical.from_codes(codes, categories=self.period_names)
+    
+    def cost_intervals(self, data, by=None):
+        """Price every interval row.
+        
+        Tier blocks are tracked per billing month, and per ``by`` column (e.g.
+        ``location``) when each site is billed separately. Returns a frame aligned
+        with ``data`` holding the TOU rate, the effective rate including tier
+        adders, the energy cost and the TOU period of each row.
+        """
+        priced = self._price(data, by)
+        return pd.DataFrame({
+            'tou_rate': priced['tou_rate'],
+            'effective_rate': priced['effective_rate'],
+            'energy_cost': priced['energy_cost'],
+            'period': pd.Categorical.from_codes(priced['period_codes'], categories=self.period_names)
+        }, index=data.index)
+    
+    def _price(self, data, by):
+        """Core pricing pass shared by cost_intervals and monthly_bill"""
+        month_key, weekday, hour = self._calendar_fields(data['timestamp'])
+        slots = self._slot_index(month_key, weekday, hour)
+        kwh = data['consumption_kwh'].to_numpy(dtype=float)
+        
+        tou_rate = self.rate_table.ravel()[slots]
+        energy_cost = kwh * tou_rate
+        groups, group_index = self._billing_groups(data, month_key, by)
+        
+        order = None
+        if self.tiers and len(kwh):
+            order = np.lexsort((data['timestamp'].to_numpy().view(np.int64), groups))
+            energy_cost = energy_cost + self._tier_costs(kwh, groups, order)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            effective_rate = np.where(kwh != 0, energy_cost / kwh, tou_rate)
+        
+        return {
+            'kwh': kwh,
+            'tou_rate': tou_rate,
+            'effective_rate': effective_rate,
+            'energy_cost': energy_cost,
+            'period_codes': self.period_table.ravel()[slots],
+            'month_key': month_key,
+            'groups': groups,
+            'group_index': group_index,
+            'order': order
+        }
+    
+    def _billing_groups(self, data, month_key, by):
+        """Billing-group id per row (month, optionally split by a column) and each group's first row"""
+        key = month_key
+        if by is not None:
+            site_codes = pd.factorize(data[by], use_na_sentinel=False)[0]
+            key = month_key * (site_codes.max() + 1) + site_codes
+        groups = pd.factorize(key)[0]
+        _, group_index = np.unique(groups, return_index=True)
+        return groups, group_index
+    
+    def _tier_costs(self, kwh, groups, order):
+        """Tier adder cost per row from cumulative consumption within each billing group"""
+        sorted_kwh = kwh[order]
+        sorted_groups = groups[order]
+        
+        # Cumulative consumption restarted at every billing group boundary
+        running = np.cumsum(sorted_kwh)
+        starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+        start_offset = running[starts] - sorted_kwh[starts]
+        cumulative = running - np.repeat(start_offset, np.diff(np.r_[starts, len(kwh)]))
+        previous = cumulative - sorted_kwh
+        
+        adder_cost = np.zeros(len(kwh))
+        lower = 0.0
+        for tier in self.tiers:
+            upper = np.inf if tier.get('up_to_kwh') is None else float(tier['up_to_kwh'])
+            in_block = np.clip(cumulative, lower, upper) - np.clip(previous, lower, upper)
+            adder_cost += in_block * tier.get('adder', 0.0)
+            lower = upper
+        
+        result = np.empty(len(kwh))
+        result[order] = adder_cost
+        return result
+    
+    def infer_interval_hours(self, timestamps):
+        """Typical spacing between readings in hours (defaults to hourly)"""
+        unique_ts = np.unique(pd.DatetimeIndex(timestamps).asi8)
+        if len(unique_ts) < 2:
+            return 1.0
+        return float(np.median(np.diff(unique_ts))) / 3.6e12
+    
+    def monthly_bill(self, data, by=None, interval_hours=None):
+        """Full monthly bill: TOU energy, tier adders, demand and fixed charges"""
+        if interval_hours is None:
+            interval_hours = self.infer_interval_hours(data['timestamp'])
+        
+        priced = self._price(data, by)
+        groups = priced['groups']
+        group_index = priced['group_index']
+        n_groups = len(group_index)
+        kwh = priced['kwh']
+        
+        consumption = np.bincount(groups, weights=kwh, minlength=n_groups)
+        tou_cost = np.bincount(groups, weights=kwh * priced['tou_rate'], minlength=n_groups)
+        energy_cost = np.bincount(groups, weights=priced['energy_cost'], minlength=n_groups)
+        
+        n_periods = len(self.period_names)
+        period_kwh = np.bincount(groups * n_periods + priced['period_codes'], weights=kwh,
+                                 minlength=n_groups * n_periods).reshape(n_groups, n_periods)
+        
+        # Demand is the highest interval load, with rows at the same instant summed
+        order = priced['order']
+        ts = data['timestamp'].to_numpy().view(np.int64)
+        if order is None:
+            order = np.lexsort((ts, groups))
+        sorted_groups = groups[order]
+        sorted_ts = ts[order]
+        run_starts = np.flatnonzero(np.r_[True, (sorted_groups[1:] != sorted_groups[:-1]) |
+                                                (sorted_ts[1:] != sorted_ts[:-1])])
+        interval_load = np.add.reduceat(kwh[order], run_starts)
+        run_groups = sorted_groups[run_starts]
+        group_starts = np.flatnonzero(np.r_[True, run_groups[1:] != run_groups[:-1]])
+        peak_demand = np.empty(n_groups)
+        peak_demand[run_groups[group_starts]] = np.maximum.reduceat(interval_load, group_starts) / interval_hours
+        
+        month_key = priced['month_key'][group_index]
+        bill = pd.DataFrame({
+            'month': pd.PeriodIndex(month_key.astype('datetime64[M]'), freq='M')
+        })
+        if by:
+            bill[by] = data[by].to_numpy()[group_index]
+        bill['consumption_kwh'] = consumption
+        bill['energy_cost'] = energy_cost
+        bill['tier_cost'] = energy_cost - tou_cost
+        for i, name in enumerate(self.period_names):
+            if period_kwh[:, i].any():
+                bill[f'{name}_kwh'] = period_kwh[:, i]
+        bill['peak_demand_kw'] = peak_demand
+        bill['demand_cost'] = peak_demand * self.demand_rates[month_key % 12]
+        bill['fixed_cost'] = self.fixed_monthly_charge
+        bill['total_cost'] = bill['energy_cost'] + bill['demand_cost'] + bill['fixed_cost']
+        
+        return bill.sort_values(['month'] + ([by] if by else [])).reset_index(drop=True)
+    
+    def recost(self, data, by=None):
+        """Return a copy of the dataset with rate_per_kwh and cost from this tariff"""
+        priced = self._price(data, by)
+        recosted = data.copy()
+        recosted['rate_per_kwh'] = priced['effective_rate']
+        recosted['cost'] = priced['energy_cost']
+        return recosted
+
+def show_tariff_inputs(key_prefix, base_rate=0.12, peak_rate=0.18, off_peak_rate=0.08):
+    """Streamlit inputs for a simple TOU tariff; returns a TariffEngine"""
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        base_rate = st.number_input("Base Rate ($/kWh)", value=base_rate, step=0.01, key=f"{key_prefix}_base")
+    with col2:
+        peak_rate = st.number_input("Peak Rate ($/kWh)", value=peak_rate, step=0.01, key=f"{key_prefix}_peak")
+    with col3:
+        off_peak_rate = st.number_input("Off-Peak Rate ($/kWh)", value=off_peak_rate, step=0.01, key=f"{key_prefix}_off_peak")
+    
+    with st.expander("Advanced Tariff Options"):
+        col1, col2 = st.columns(2)
+        with col1:
+            peak_window = st.slider("Peak Hours", 0, 24, (16, 21), key=f"{key_prefix}_peak_window")
+            weekdays_only = st.checkbox("Peak applies on weekdays only", value=True, key=f"{key_prefix}_weekdays")
+            fixed_charge = st.number_input("Fixed Monthly Charge ($)", min_value=0.0, value=0.0, step=1.0,
+                                           key=f"{key_prefix}_fixed")
+        with col2:
+            tier_threshold = st.number_input("Tier 2 starts at (kWh/month)", min_value=0.0, value=0.0, step=100.0,
+                                             key=f"{key_prefix}_tier_threshold",
+                                             help="Set to 0 to disable tiered pricing")
+            tier_adder = st.number_input("Tier 2 adder ($/kWh)", value=0.02, step=0.01, key=f"{key_prefix}_tier_adder")
+            demand_charge = st.number_input("Demand Charge ($/kW-month)", min_value=0.0, value=0.0, step=1.0,
+                                            key=f"{key_prefix}_demand")
+    
+    tiers = None
+    if tier_threshold > 0:
+        tiers = [{'up_to_kwh': tier_threshold, 'adder': 0.0}, {'up_to_kwh': None, 'adder': tier_adder}]
+    
+    peak_hours = range(peak_window[0], peak_window[1])
+    off_peak_hours = [h for h in (22, 23, 0, 1, 2, 3, 4, 5) if h not in peak_hours]
+    
+    return TariffEngine.from_rates(
+        base_rate, peak_rate, off_peak_rate,
+        peak_hours=peak_hours,
+        off_peak_hours=off_peak_hours,
+        peak_weekdays=WEEKDAYS if weekdays_only else ALL_DAYS,
+        tiers=tiers,
+        demand_charge_per_kw=demand_charge,
+        fixed_monthly_charge=fixed_charge
+    )
\ No newline at end of file
@@ -1,12 +1,15 @@
-from app import create_app
-import os
-
-if __name__ == '__main__':
-    app, socketio = create_app()
-    
-    # Run the application
-    socketio.run(app, 
-                host='0.0.0.0', 
-                port=5000, 
-                debug=True,
+from app import create_app, ensure_indexes
+import os
+
+if __name__ == '__main__':
+    app, socketio = create_app()
+    
+    # Refuses to start if a query would scan the collection
+    ensure_indexes(app)
+    
+    # Run the application
+    socketio.run(app, 
+                host='0.0.0.0', 
+                port=5000, 
+                debug=True,
                 allow_unsafe_werkzeug=True)
\ No newline at end of file
@@ -0,0 +1,60 @@
+import base64
+import json
+import pytest
+
+pytest.importorskip('pymongo')
+pytest.importorskip('flask_socketio')
+
+from app import create_app
+from app.routes import api
+
+@pytest.fixture
+def pages(monkeypatch):
+    """Limits the readings endpoint asks the model for; no MongoDB involved"""
+    limits = []
+    def get_readings_page(machine_id, since, after=None, limit=1000):
+        limits.append(limit)
+        return [], None
+    monkeypatch.setattr(api.cnc_model, 'get_readings_page', get_readings_page)
+    return limits
+
+@pytest.fixture
+def client():
+    app, _ = create_app({'ENSURE_INDEXES': False})
+    return app.test_client()
+
+def cursor_token(**fields):
+    token = {'since': 0, 'timestamp': 0, 'id': 'x', **fields}
+    return base64.urlsafe_b64encode(json.dumps(token).encode()).decode()
+
+@pytest.mark.parametrize('limit', [-1, -5])
+def test_negative_limit_is_rejected(client, pages, limit):
+    response = client.get(f'/api/data/m1?limit={limit}')
+    assert response.status_code == 400
+    assert 'Invalid limit' in response.get_json()['error']
+    assert pages == []
+
+@pytest.mark.parametrize('query, expected', [
+    ('', api.PAGE_SIZE),
+    ('?limit=0', api.PAGE_SIZE),
+    ('?limit=5', 5),
+    ('?limit=1000000', api.MAX_PAGE_SIZE)
+])
+def test_limit_is_clamped_to_page_sizes(client, pages, query, expected):
+    assert client.get(f'/api/data/m1{query}').status_code == 200
+    assert pages == [expected]
+
+@pytest.mark.parametrize('token', [
+    cursor_token(since=10**20),
+    cursor_token(timestamp=-10**20),
+    'not a cursor'
+])
+def test_bad_cursor_is_a_client_error(client, pages, token):
+    response = client.get('/api/data/m1', query_string={'cursor': token})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "Invalid cursor"
+    assert pages == []
+
+def test_overflowing_cursor_raises_value_error():
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        api._decode_cursor(cursor_token(since=10**20))
\ No newline at end of file
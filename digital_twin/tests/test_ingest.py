@@ -0,0 +1,134 @@
+import math
+import threading
+from datetime import datetime
+import pytest
+
+pytest.importorskip('pymongo')
+pytest.importorskip('flask_socketio')
+
+from pymongo.errors import BulkWriteError
+from app.services.ingest import WriteBehindBuffer, parse_reading, parse_timestamp
+
+RECEIVED_AT = datetime(2024, 5, 1, 12, 0, 0)
+
+def numbered(items):
+    return list(enumerate(items, 1))
+
+class FakeWriter:
+    """insert_many stand-in: records each write, can hold the first one and fail later ones"""
+    
+    def __init__(self, hold=False, errors=None):
+        self.writes = []
+        self.errors = errors or {}  # write number -> writeErrors to raise
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+    
+    def __call__(self, documents):
+        self.writes.append(list(documents))
+        self.started.set()
+        self.release.wait(5)
+        write_errors = self.errors.get(len(self.writes))
+        if write_errors:
+            raise BulkWriteError({'writeErrors': write_errors})
+
+def test_parse_reading_from_json():
+    reading = parse_reading(b'{"machine_id": 7, "timestamp": "2024-05-01T10:00:00", "cutting_time": 2.5}', RECEIVED_AT)
+    assert reading['machine_id'] == '7'
+    assert reading['timestamp'] == datetime(2024, 5, 1, 10, 0, 0)
+    assert reading['cutting_time'] == 2.5
+    assert reading['received_at'] == RECEIVED_AT
+
+def test_parse_reading_defaults_to_server_time():
+    assert parse_reading({'machine_id': 'm1'}, RECEIVED_AT)['timestamp'] == RECEIVED_AT
+
+def test_epoch_seconds_and_milliseconds_agree():
+    assert parse_timestamp(1_700_000_000, RECEIVED_AT) == parse_timestamp(1_700_000_000_000, RECEIVED_AT)
+
+@pytest.mark.parametrize('item, message', [
+    (b'{"machine_id": ', "Invalid JSON"),
+    (b'[1, 2]', "JSON object"),
+    ({'cutting_time': 1}, "machine_id is required"),
+    ({'machine_id': 'm1', 'cutting_time': '1'}, "cutting_time must be a number"),
+    ({'machine_id': 'm1', 'feed_rate': True}, "feed_rate must be a number"),
+    ({'machine_id': 'm1', 'timestamp': 'yesterday'}, "Unrecognized timestamp")
+])
+def test_parse_reading_rejects_invalid_readings(item, message):
+    with pytest.raises(ValueError, match=message):
+        parse_reading(item, RECEIVED_AT)
+
+@pytest.mark.parametrize('value', [1e20, -1e20, math.inf, -math.inf, math.nan])
+def test_out_of_range_timestamps_are_rejected(value):
+    with pytest.raises(ValueError, match="out of range"):
+        parse_timestamp(value, RECEIVED_AT)
+
+def test_ndjson_overflowing_timestamp_is_rejected():
+    # JSON numbers beyond float range parse to inf
+    with pytest.raises(ValueError, match="out of range"):
+        parse_reading(b'{"machine_id": "m1", "timestamp": 1e400}', RECEIVED_AT)
+
+def test_bad_timestamps_reject_only_their_readings():
+    writer = FakeWriter()
+    buffer = WriteBehindBuffer(writer)
+    items = numbered([
+        {'machine_id': 'm1', 'timestamp': 1_700_000_000},
+        {'machine_id': 'm1', 'timestamp': 1e20},
+        b'{"machine_id": "m1", "timestamp": 1e400}',
+        {'machine_id': 'm1', 'timestamp': -1e20},
+        {'machine_id': 'm1'}
+    ])
+    report, batches = buffer.ingest(items, RECEIVED_AT)
+    assert buffer.flush(5)
+    
+    assert report['received'] == 5
+    assert report['accepted'] == 2
+    assert [rejected['item'] for rejected in report['rejected']] == [2, 3, 4]
+    assert [batch.inserted for batch in batches] == [2]
+    assert len(writer.writes[0]) == 2
+
+def test_backpressure_reports_where_to_resume():
+    writer = FakeWriter(hold=True)
+    buffer = WriteBehindBuffer(writer, {'batch_size': 2, 'max_pending': 2, 'submit_timeout': 0.05})
+    items = numbered([{'machine_id': 'm1', 'cutting_time': value} for value in range(5)])
+    
+    report, batches = buffer.ingest(items, RECEIVED_AT)
+    assert report['accepted'] == 2
+    assert report['resume_from'] == 3
+    assert 'waiting to be written' in report['backpressure']
+    assert len(batches) == 1
+    
+    writer.release.set()
+    assert buffer.flush(5)
+    assert buffer.pending == 0
+    
+    # Resending from resume_from delivers the rest
+    report, batches = buffer.ingest(items[report['resume_from'] - 1:], RECEIVED_AT)
+    assert buffer.flush(5)
+    assert 'backpressure' not in report
+    assert report['accepted'] == 3
+    assert [reading['cutting_time'] for write in writer.writes for reading in write] == [0, 1, 2, 3, 4]
+
+def test_write_errors_map_to_items_across_combined_batches():
+    # The second write combines two requests' batches; indexes 1 and 2 are
+    # the second reading of the first request and the first of the other
+    writer = FakeWriter(hold=True, errors={2: [
+        {'index': 1, 'code': 11000, 'errmsg': 'duplicate key'},
+        {'index': 2, 'code': 121, 'errmsg': 'validation failed'}
+    ]})
+    written = []
+    buffer = WriteBehindBuffer(writer, on_written=written.extend)
+    
+    buffer.ingest(numbered([{'machine_id': 'm0'}]), RECEIVED_AT)
+    assert writer.started.wait(5)
+    _, (batch_a,) = buffer.ingest([(10, {'machine_id': 'a1'}), (11, {'machine_id': 'a2'})], RECEIVED_AT)
+    _, (batch_b,) = buffer.ingest([(20, {'machine_id': 'b1'}), (21, {'machine_id': 'b2'})], RECEIVED_AT)
+    writer.release.set()
+    assert buffer.flush(5)
+    
+    assert [len(write) for write in writer.writes] == [1, 4]
+    assert batch_a.errors == [{'item': 11, 'code': 11000, 'error': 'duplicate key'}]
+    assert batch_b.errors == [{'item': 20, 'code': 121, 'error': 'validation failed'}]
+    assert (batch_a.inserted, batch_b.inserted) == (1, 1)
+    assert buffer.get(batch_b.id).result()['status'] == 'written'
+    assert [reading['machine_id'] for reading in written] == ['m0', 'a1', 'b2']
\ No newline at end of file
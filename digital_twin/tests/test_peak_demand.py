@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.peak_demand import PeakDemandEngine
+
+def readings(site, start, count, kwh):
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=count, freq='15min'),
+        'location': site,
+        'consumption_kwh': kwh
+    })
+
+@pytest.fixture
+def two_sites():
+    # Site B has a single reading, so its windows start right at the data's origin
+    return pd.concat([readings('A', '2024-01-01 00:00', 4, 10.0),
+                      readings('B', '2024-01-01 00:00', 1, 1.0)], ignore_index=True)
+
+@pytest.mark.parametrize('window_minutes', [15, 60, 120, 24 * 60])
+def test_windows_stay_within_their_site(two_sites, window_minutes):
+    demand = PeakDemandEngine(two_sites).rolling_demand(window_minutes)
+    
+    site_b = demand[demand['site'] == 'B']
+    assert site_b['energy_kwh'].tolist() == [1.0]
+    site_a = demand[demand['site'] == 'A']
+    readings_per_window = min(window_minutes // 15, 4)
+    expected = np.minimum(np.arange(1, 5), readings_per_window) * 10.0
+    np.testing.assert_allclose(site_a['energy_kwh'], expected)
+
+def test_top_peaks_of_short_site(two_sites):
+    peaks = PeakDemandEngine(two_sites).top_peaks(window_minutes=120, k=1)
+    assert peaks.set_index('site')['energy_kwh'].to_dict() == {'A': 40.0, 'B': 1.0}
\ No newline at end of file
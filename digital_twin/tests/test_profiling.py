@@ -0,0 +1,24 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('streamlit')
+
+from modules.profiling import _json_records, summarize
+
+def test_json_export_writes_untracked_memory_as_null():
+    history = [
+        {'page': 'Dashboard', 'kind': 'load', 'name': 'Load data', 'duration_ms': 1.5,
+         'memory_delta_kb': np.nan, 'memory_peak_kb': np.nan, 'run': 1},
+        {'page': 'Dashboard', 'kind': 'load', 'name': 'Load data', 'duration_ms': 2.5,
+         'memory_delta_kb': np.nan, 'memory_peak_kb': np.nan, 'run': 2}
+    ]
+    export = json.dumps({'summary': _json_records(summarize(history)),
+                         'records': _json_records(pd.DataFrame(history))}, allow_nan=False)
+    
+    exported = json.loads(export)
+    assert exported['summary'][0]['mean_memory_kb'] is None
+    assert exported['summary'][0]['calls'] == 2
+    assert exported['records'][1]['memory_peak_kb'] is None
+    assert exported['records'][1]['duration_ms'] == 2.5
\ No newline at end of file
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.simulator import WhatIfSimulator
+from modules.tariffs import TariffEngine, DEFAULT_TARIFF
+
+SHIFT = {'type': 'shift', 'category': 'HVAC', 'fraction': 0.5, 'window': (16, 21), 'target': (12, 16)}
+
+def two_sites():
+    # Site A has load at 18h and a target row at 13h; site B only a target row
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(['2024-01-01 18:00', '2024-01-01 13:00', '2024-01-01 13:00']),
+        'consumption_kwh': [10.0, 0.0, 0.0],
+        'rate_per_kwh': [0.12, 0.12, 0.12],
+        'category': ['HVAC'] * 3,
+        'location': ['A', 'A', 'B']
+    })
+
+def test_shift_stays_within_site():
+    kwh, _ = WhatIfSimulator(two_sites()).apply([SHIFT])
+    np.testing.assert_allclose(kwh, [5.0, 5.0, 0.0])
+
+def test_shift_keeps_load_of_site_without_target_rows():
+    data = two_sites()
+    data.loc[1, 'location'] = 'B'
+    kwh, _ = WhatIfSimulator(data).apply([SHIFT])
+    np.testing.assert_allclose(kwh, [10.0, 0.0, 0.0])
+
+def test_tariff_bill_is_per_site():
+    # The sites peak at different hours: their demand charges add up
+    data = two_sites()
+    data.loc[2, 'consumption_kwh'] = 8.0
+    tariff = TariffEngine(DEFAULT_TARIFF)
+    simulator = WhatIfSimulator(data, tariff)
+    assert simulator.baseline == pytest.approx(tariff.monthly_bill(data, by='location').total_cost.sum())
\ No newline at end of file
@@ -0,0 +1,58 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+
+pytest.importorskip('pymongo')
+
+from app.models.cnc_data import CNCDataModel, TWIN_FIELDS
+from app.services.digital_twin_service import DigitalTwinService
+
+class FakeModel(CNCDataModel):
+    """Serves fetch_columns from a list of documents (newest first) instead of MongoDB"""
+    
+    def __init__(self, documents):
+        super().__init__()
+        self.documents = documents
+    
+    def fetch_columns(self, machine_id=None, start_date=None, end_date=None, fields=TWIN_FIELDS, **kwargs):
+        return self._to_columns([doc for doc in self.documents if doc['timestamp'] >= start_date], fields)
+
+def readings(count, **fields):
+    now = datetime.now()
+    return [dict({'timestamp': now - timedelta(minutes=minute), 'cutting_time': 2.0 + minute % 3,
+                  'spindle_speed': 1200.0, 'feed_rate': 0.5}, **fields)
+            for minute in range(count)]
+
+def test_null_and_missing_fields_serialize_as_json():
+    documents = readings(30)
+    documents[0]['cutting_time'] = None
+    del documents[0]['feed_rate']
+    documents[5]['spindle_speed'] = None
+    
+    state = DigitalTwinService(FakeModel(documents))._load_twin_state('m1')
+    
+    # Strict JSON: a NaN anywhere would be written as the invalid token NaN
+    json.dumps(state, default=str, allow_nan=False)
+    assert state['status']['current_cutting_time'] is None
+    assert state['status']['feed_rate'] == 0
+    assert state['time_series']['cutting_times'][0] is None
+    assert state['time_series']['spindle_speeds'][5] is None
+    assert state['time_series']['feed_rates'][0] == 0
+    assert state['maintenance_prediction']['prediction'] == 'Normal operation'
+    assert state['anomalies'] == []
+
+def test_null_cutting_times_are_not_anomalies():
+    documents = readings(30, cutting_time=2.0)
+    documents[3]['cutting_time'] = 20.0
+    for document in documents[10:15]:
+        document['cutting_time'] = None
+    
+    anomalies = DigitalTwinService(FakeModel(documents))._load_twin_state('m1')['anomalies']
+    assert [anomaly['cutting_time'] for anomaly in anomalies] == [20.0]
+
+def test_all_null_cutting_times():
+    state = DigitalTwinService(FakeModel(readings(30, cutting_time=None)))._load_twin_state('m1')
+    
+    json.dumps(state, default=str, allow_nan=False)
+    assert state['maintenance_prediction']['prediction'] == 'Insufficient data'
+    assert state['anomalies'] == []
\ No newline at end of file